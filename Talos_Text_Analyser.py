@@ -1,7 +1,7 @@
 # #################################
 # TALOS - Advanced Text File Analyzer
 # Input: .txt file
-# Export: CSV/Excel
+# Export: CSV/Excel/Parquet/Arrow (+ gzip/zstd CSV)
 # - Word List with Occurrences
 # - Noun List and Occurrences
 # - Proper Name List (Person)
@@ -14,741 +14,2632 @@
 # Christophe Roche - Advanced Version
 # #################################
 
+import time
+_MODULE_START = time.perf_counter()  # Reference point for --startup-timing
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from tkinter.scrolledtext import ScrolledText
-from collections import Counter
-import pandas as pd
+from collections import Counter, OrderedDict, deque
 import threading
 import os
+import sys
+import importlib
 from pathlib import Path
 import re
-import time
+import json
 import queue
+import io
+import hashlib
+from array import array
+from contextlib import contextmanager, nullcontext
 
-class TextAnalyzer:
+# Heavy dependencies (pandas, openpyxl, spacy, stanza, langdetect) are imported
+# on first use; PREWARM_MODULES are imported in the background once the window is up.
+PREWARM_MODULES = ('langdetect', 'pandas', 'openpyxl', 'spacy')
+
+class Vocabulary:
+    """Interns strings (POS tags, word forms) to compact integer IDs"""
     def __init__(self):
-        self.nlp = None
-        self.stanza_nlp = None  # For Ancient Greek
-        self.nlp_loading = False
-        self.detected_language = "Unknown"
-        self.selected_file = None
-        self.file_content = None
-        self.custom_pattern = None
-        self.analysis_queue = queue.Queue()
-        self.setup_gui()
+        self.ids = {}
+        self.strings = []
         
-    def detect_language(self, text):
-        """Improved language detection with better English recognition"""
-        try:
-            # Try to use langdetect library if available
-            from langdetect import detect, DetectorFactory, detect_langs
-            DetectorFactory.seed = 0  # For consistent results
-            
-            # Take a sample of the text for faster detection
-            sample = text[:3000] if len(text) > 3000 else text
-            
-            # Get probability distribution of languages
-            try:
-                lang_probs = detect_langs(sample)
-                # If English has decent probability, prefer it
-                for lang_prob in lang_probs:
-                    if lang_prob.lang == 'en' and lang_prob.prob > 0.3:
-                        return "English"
-                
-                # Otherwise use the top detection
-                detected = detect(sample)
-            except:
-                detected = 'en'  # Default to English if detection fails
-            
-            # Map language codes to full names
-            lang_map = {
-                'en': 'English', 'fr': 'French', 'es': 'Spanish', 'de': 'German',
-                'it': 'Italian', 'pt': 'Portuguese', 'nl': 'Dutch', 'ru': 'Russian',
-                'zh-cn': 'Chinese', 'ja': 'Japanese', 'ko': 'Korean', 'ar': 'Arabic',
-                'el': 'Modern Greek'
-            }
-            
-            detected_lang = lang_map.get(detected, "English")  # Default to English
-            
-            # Additional check for Ancient Greek vs Modern Greek
-            if detected_lang == "Modern Greek":
-                text_lower = text.lower()
-                # Enhanced Ancient Greek detection
-                ancient_greek_indicators = [
-                    # Polytonic marks
-                    'ἀ', 'ἁ', 'ἂ', 'ἃ', 'ἄ', 'ἅ', 'ἆ', 'ἇ', 'ἐ', 'ἑ', 'ἒ', 'ἓ', 'ἔ', 'ἕ',
-                    'ἠ', 'ἡ', 'ἢ', 'ἣ', 'ἤ', 'ἥ', 'ἦ', 'ἧ', 'ἰ', 'ἱ', 'ἲ', 'ἳ', 'ἴ', 'ἵ',
-                    'ὀ', 'ὁ', 'ὂ', 'ὃ', 'ὄ', 'ὅ', 'ὐ', 'ὑ', 'ὒ', 'ὓ', 'ὔ', 'ὕ', 'ὖ', 'ὗ',
-                    'ὠ', 'ὡ', 'ὢ', 'ὣ', 'ὤ', 'ὥ', 'ὦ', 'ὧ', 'ὰ', 'ὲ', 'ὴ', 'ὶ', 'ὸ', 'ὺ', 'ὼ',
-                    'ᾀ', 'ᾁ', 'ᾂ', 'ᾃ', 'ᾄ', 'ᾅ', 'ᾆ', 'ᾇ', 'ᾐ', 'ᾑ', 'ᾒ', 'ᾓ', 'ᾔ', 'ᾕ',
-                    'ᾖ', 'ᾗ', 'ᾠ', 'ᾡ', 'ᾢ', 'ᾣ', 'ᾤ', 'ᾥ', 'ᾦ', 'ᾧ', 'ᾰ', 'ᾱ', 'ᾲ', 'ᾳ',
-                    'ᾴ', 'ᾶ', 'ᾷ', 'ῂ', 'ῃ', 'ῄ', 'ῆ', 'ῇ', 'ῐ', 'ῑ', 'ῒ', 'ΐ', 'ῖ', 'ῗ',
-                    'ῠ', 'ῡ', 'ῢ', 'ΰ', 'ῤ', 'ῥ', 'ῦ', 'ῧ', 'ῲ', 'ῳ', 'ῴ', 'ῶ', 'ῷ',
-                    # Ancient Greek specific words
-                    'καὶ', 'τὸ', 'τίν', 'τοῦ', 'ἐν', 'τῆς', 'εἰς', 'τῶν', 'τὰς', 'ὃ', 'ἡ', 'τόн',
-                    'αὐτὸν', 'αὐτοῦ', 'ἐστι', 'γὰρ', 'δὲ', 'οὐ', 'μὴ', 'ἀλλὰ', 'ἄν', 'ἔστι', 'ὅτι',
-                    'ὡς', 'μετὰ', 'πρὸς', 'διὰ', 'παρὰ', 'ἀπὸ', 'ἐπὶ', 'ὑπὸ', 'περὶ', 'σὺν', 'ἄνευ',
-                    'ἕνεκα', 'χάριν', 'ἕως', 'μέχρι', 'πρίν', 'ἐάν', 'ἵνα', 'ὅπως', 'ὅταν', 'ἐπεὶ'
-                ]
-                
-                # Modern Greek indicators
-                modern_greek_indicators = [
-                    'και', 'το', 'της', 'του', 'τα', 'με', 'σε', 'για', 'από', 'που', 'θа', 'είναι',
-                    'έχει', 'έχουν', 'ήταν', 'αυτό', 'αυτή', 'αυτά', 'αυτός', 'αυτήν', 'αυτούς'
-                ]
-                
-                # Check for polytonic marks first (strong Ancient Greek indicator)
-                has_polytonic = any(mark in text for mark in ['ἀ', 'ἁ', 'ἂ', 'ἃ', 'ἄ', 'ἅ', 'ἆ', 'ἇ', 'ὁ', 'ὃ'])
-                
-                # Count matches for each language
-                ancient_count = sum(1 for word in ancient_greek_indicators if f' {word} ' in f' {text_lower} ')
-                modern_count = sum(1 for word in modern_greek_indicators if f' {word} ' in f' {text_lower} ')
-                
-                # Determine which Greek variant
-                if has_polytonic or ancient_count > modern_count:
-                    return "Ancient Greek"
-                else:
-                    return "Modern Greek"
-            
-            return detected_lang
-            
-        except ImportError:
-            # Enhanced fallback: Better English detection
-            text_lower = text.lower()
-            words = text_lower.split()
-            total_words = len(words)
-            
-            if total_words == 0:
-                return "English"
-            
-            # Enhanced English indicators with higher weight
-            english_words = ['the', 'and', 'is', 'are', 'was', 'were', 'have', 'has', 'will', 'would', 
-                           'this', 'that', 'with', 'from', 'they', 'been', 'their', 'said', 'each', 'which',
-                           'she', 'do', 'how', 'if', 'up', 'out', 'many', 'time', 'very', 'when', 'much',
-                           'can', 'said', 'there', 'use', 'your', 'way', 'about', 'could', 'just']
-            english_count = sum(1 for word in english_words if f' {word} ' in f' {text_lower} ')
-            
-            # French indicators
-            french_words = ['le', 'la', 'les', 'de', 'du', 'des', 'et', 'est', 'sont', 'avec', 'dans', 'pour', 'sur', 'ce', 'qui', 'une', 'tout', 'nous', 'vous', 'ils']
-            french_count = sum(1 for word in french_words if f' {word} ' in f' {text_lower} ')
-            
-            # Spanish indicators
-            spanish_words = ['el', 'la', 'los', 'las', 'de', 'del', 'y', 'es', 'son', 'con', 'en', 'por', 'para', 'que', 'un', 'una', 'todo', 'pero', 'más', 'como']
-            spanish_count = sum(1 for word in spanish_words if f' {word} ' in f' {text_lower} ')
-            
-            # German indicators
-            german_words = ['der', 'die', 'das', 'und', 'ist', 'sind', 'mit', 'von', 'zu', 'haben', 'auf', 'für', 'ein', 'eine', 'nicht', 'sich', 'auch', 'werden', 'bei', 'noch']
-            german_count = sum(1 for word in german_words if f' {word} ' in f' {text_lower} ')
-            
-            # Italian indicators
-            italian_words = ['il', 'la', 'le', 'di', 'e', 'che', 'un', 'una', 'con', 'per', 'in', 'da', 'del', 'della', 'dei', 'delle', 'sono', 'è', 'hanno', 'sia']
-            italian_count = sum(1 for word in italian_words if f' {word} ' in f' {text_lower} ')
-            
-            # Modern Greek indicators  
-            modern_greek_words = ['το', 'η', 'και', 'του', 'της', 'στην', 'στον', 'με', 'για', 'από', 'όλα', 'αυτό', 'που', 'θα', 'είναι', 'έχει', 'μια', 'στα', 'ένα', 'όμως']
-            modern_greek_count = sum(1 for word in modern_greek_words if f' {word} ' in f' {text_lower} ')
-            
-            # Ancient Greek indicators
-            ancient_greek_words = ['καὶ', 'τὸ', 'τίν', 'τοῦ', 'ἐν', 'τῆς', 'εἰς', 'τῶν', 'τὰς', 'ὃ', 'ἡ', 'τόн',
-                                 'αὐτὸν', 'αὐτοῦ', 'ἐστι', 'γὰρ', 'δὲ', 'οὐ', 'μὴ', 'ἀλλὰ', 'ἄν', 'ἔστι', 'ὅτι',
-                                 'ὡς', 'μετὰ', 'πρὸς', 'διὰ', 'παρὰ', 'ἀπὸ', 'ἐπὶ', 'ὑπὸ', 'περὶ', 'σὺν', 'ἄνευ',
-                                 'ἕνεκα', 'χάριν', 'ἕως', 'μέχρι', 'πρίν', 'ἐάν', 'ἵνα', 'ὅπως', 'ὅταν', 'ἐπεὶ']
-            ancient_greek_count = sum(1 for word in ancient_greek_words if f' {word} ' in f' {text_lower} ')
-            
-            # Check for polytonic marks (strong Ancient Greek indicator)
-            has_polytonic = any(mark in text for mark in ['ἀ', 'ἁ', 'ἂ', 'ἃ', 'ἄ', 'ἅ', 'ἆ', 'ἇ', 'ὁ', 'ὃ'])
-            
-            # Calculate percentages
-            english_pct = (english_count / total_words) * 100
-            french_pct = (french_count / total_words) * 100
-            spanish_pct = (spanish_count / total_words) * 100
-            german_pct = (german_count / total_words) * 100
-            italian_pct = (italian_count / total_words) * 100
-            modern_greek_pct = (modern_greek_count / total_words) * 100
-            ancient_greek_pct = (ancient_greek_count / total_words) * 100
-            
-            # Ancient Greek has priority if detected
-            if has_polytonic or ancient_greek_pct > 1.0:  # Even small percentage indicates Ancient Greek
-                return "Ancient Greek"
-            
-            # English bias: if English percentage is decent, prefer it
-            if english_pct >= 2.0 or english_count >= 5:
-                return "English"
-            
-            max_pct = max(english_pct, french_pct, spanish_pct, german_pct, italian_pct, modern_greek_pct)
-            
-            if max_pct == 0:
-                return "English"  # Default to English
-            elif max_pct == modern_greek_pct:
-                return "Modern Greek"
-            elif max_pct == italian_pct:
-                return "Italian"
-            elif max_pct == french_pct:
-                return "French"
-            elif max_pct == spanish_pct:
-                return "Spanish"
-            elif max_pct == german_pct:
-                return "German"
-            else:
-                return "English"
-                
-        except Exception:
-            return "English"  # Always default to English
+    def add(self, string):
+        """Return the ID of string, adding it if new"""
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+    
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+    
+    def __len__(self):
+        return len(self.strings)
+
+
+class AnalysisResult(Counter):
+    """Counter of analysis results with a per-language breakdown (language -> Counter)"""
+    def __init__(self, iterable=None, by_language=None):
+        super().__init__(iterable)
+        self.by_language = by_language if by_language is not None else {}
         
-    def lazy_load_nlp(self, language="en"):
-        """Lazy loading of NLP models with Stanza for Ancient Greek"""
-        if self.nlp_loading:
-            return False
-            
-        # If it's Ancient Greek and we haven't loaded Stanza yet
-        if language == "Ancient Greek" and self.stanza_nlp is None:
-            self.nlp_loading = True
-            try:
-                import stanza
-                self.update_status("Loading Ancient Greek model (Stanza)...", self.colors['accent'])
-                self.stanza_nlp = stanza.Pipeline("grc")
-                self.nlp_loading = False
-                self.update_status("Ancient Greek model loaded", self.colors['success'])
-                return True
-            except Exception as e:
-                messagebox.showerror("Stanza Error", 
-                    "Stanza model for Ancient Greek is not available.\n"
-                    "Run: stanza.download('grc')\n"
-                    f"Error: {str(e)}")
-                self.nlp_loading = False
-                return False
+    def __reduce__(self):
+        return (self.__class__, (dict(self),), self.__dict__)
+
+
+class PatternCounter(AnalysisResult):
+    """Counter of (POS IDs, word IDs) pattern keys, decoded through its vocabulary"""
+    def __init__(self, iterable=None, vocab=None):
+        super().__init__(iterable)
+        self.vocab = vocab if vocab is not None else getattr(iterable, 'vocab', None)
+    
+    def pos_pattern(self, key):
+        """POS part of a key, e.g. 'ADJ_NOUN'"""
+        return "_".join(self.vocab[pos_id] for pos_id in key[0])
+    
+    def words(self, key):
+        """Word part of a key, e.g. 'beautiful house'"""
+        return " ".join(self.vocab[word_id] for word_id in key[1])
+    
+    def label(self, key):
+        """Display form of a key, e.g. '[ADJ_NOUN]: beautiful house'"""
+        return f"[{self.pos_pattern(key)}]: {self.words(key)}"
+
+
+class CollocationResult(PatternCounter):
+    """Pattern counts with association scores per key: (PMI, log-likelihood, t-score)"""
+    SCORE_COLUMNS = ('PMI', 'Log_Likelihood', 'T_Score')
+    
+    def __init__(self, iterable=None, vocab=None, scores=None):
+        super().__init__(iterable, vocab)
+        self.scores = scores if scores is not None else {}
+    
+    def ranked(self):
+        """(key, count) pairs, strongest log-likelihood first"""
+        scores = self.scores
+        return sorted(self.items(), key=lambda item: scores[item[0]][1], reverse=True)
+    
+    def score_columns(self, keys):
+        """Score columns for keys, named as in SCORE_COLUMNS"""
+        scores = self.scores
+        return {name: [scores[key][i] for key in keys] for i, name in enumerate(self.SCORE_COLUMNS)}
+
+
+def association_scores(o11, r1, c1, n):
+    """PMI, log-likelihood (G2) and t-score arrays from pair counts o11, left totals r1,
+    right totals c1 and the number of candidate pairs n (2x2 contingency tables)"""
+    import numpy as np
+    
+    o11, r1, c1 = (np.asarray(values, dtype=np.float64) for values in (o11, r1, c1))
+    observed = np.stack([o11, r1 - o11, c1 - o11, n - r1 - c1 + o11])
+    expected = np.stack([r1 * c1, r1 * (n - c1), (n - r1) * c1, (n - r1) * (n - c1)]) / n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(observed > 0, observed * np.log(observed / expected), 0.0)
+    log_likelihood = 2 * terms.sum(axis=0)
+    pmi = np.log2(o11 / expected[0])
+    t_score = (o11 - expected[0]) / np.sqrt(o11)
+    return pmi, log_likelihood, t_score
+
+
+class TokenTable:
+    """Annotated tokens of one parsed text span, stored as integer ID columns"""
+    # Token flags
+    ALPHA = 1
+    STOP = 2
+    SPACE = 4
+    TRAILING_SPACE = 8
+    
+    def __init__(self, language, engine):
+        self.language = language
+        self.engine = engine              # 'spacy' or 'stanza'
+        self.form = array('i')            # Vocabulary IDs
+        self.lower = array('i')
+        self.lemma = array('i')
+        self.pos = array('i')
+        self.ent_type = array('i')        # Entity label ID, -1 outside entities
+        self.ent_iob = array('b')         # 0 outside, 1 begin, 2 inside
+        self.flags = array('B')
+        self.idx = array('q')             # Character offset in the analysed text
+        self.sent_starts = array('i')     # Token index of each sentence start
         
-        # For all other languages, use spaCy
-        if language != "Ancient Greek" and self.nlp is None:
-            self.nlp_loading = True
-            try:
-                import spacy
-                
-                # Language model mapping
-                model_map = {
-                    "English": "en_core_web_sm",
-                    "French": "fr_core_news_sm",
-                    "Spanish": "es_core_news_sm",
-                    "German": "de_core_news_sm",
-                    "Italian": "it_core_news_sm",
-                    "Portuguese": "pt_core_news_sm",
-                    "Dutch": "nl_core_news_sm",
-                    "Modern Greek": "el_core_news_sm"
-                }
-                
-                model_name = model_map.get(language, "en_core_web_sm")
-                
-                try:
-                    self.update_status(f"Loading {language} model (spaCy)...", self.colors['accent'])
-                    self.nlp = spacy.load(model_name)
-                    self.update_status(f"{language} model loaded", self.colors['success'])
-                except OSError:
-                    # Fallback to English if specific language model not available
-                    self.update_status("Falling back to English model...", self.colors['accent'])
-                    self.nlp = spacy.load("en_core_web_sm")
-                    messagebox.showwarning("Model Warning", 
-                        f"Language model for {language} not found. Using English model.\n"
-                        f"For better results, install: python -m spacy download {model_name}")
-                
-                self.nlp_loading = False
-                return True
-            except Exception as e:
-                messagebox.showerror("NLP Error", 
-                    "spaCy model 'en_core_web_sm' is not installed.\n"
-                    "Run: python -m spacy download en_core_web_sm\n"
-                    f"Error: {str(e)}")
-                self.nlp_loading = False
-                return False
+    def __len__(self):
+        return len(self.form)
+    
+    def entity_spans(self):
+        """Yield (start, end, label ID) for each entity (token indices, end exclusive)"""
+        start = None
+        for i, iob in enumerate(self.ent_iob):
+            if start is not None and iob != 2:
+                yield start, i, self.ent_type[start]
+                start = None
+            if iob == 1:
+                start = i
+        if start is not None:
+            yield start, len(self.ent_iob), self.ent_type[start]
+            
+    def span_text(self, start, end, strings):
+        """Text of tokens start..end, rebuilt from forms and trailing whitespace"""
+        parts = []
+        for i in range(start, end):
+            parts.append(strings[self.form[i]])
+            if i < end - 1 and self.flags[i] & self.TRAILING_SPACE:
+                parts.append(" ")
+        return "".join(parts)
+    
+    def extend(self, other, offset=0):
+        """Append the tokens of other, shifting its character offsets by offset"""
+        base = len(self.form)
+        self.sent_starts.extend(base + start for start in other.sent_starts)
+        for column in ('form', 'lower', 'lemma', 'pos', 'ent_type', 'ent_iob', 'flags'):
+            getattr(self, column).extend(getattr(other, column))
+        self.idx.extend(offset + idx for idx in other.idx)
+
+
+class AnnotationCache:
+    """Content-addressed LRU cache of paragraph annotations: (model, hash of the paragraph text
+    without outer whitespace) -> TokenTable with offsets relative to the paragraph. Bounded by
+    the number of cached tokens; the tables share the engine's vocabulary. Thread-safe: the GUI,
+    the service and corpus builds may use one cache from several threads."""
+    DEFAULT_TOKENS = 1000000
+    
+    def __init__(self, max_tokens=DEFAULT_TOKENS):
+        self.max_tokens = max_tokens
+        self.entries = OrderedDict()
+        self.tokens = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
         
-        # Return True if we already have the right model loaded
-        return (language == "Ancient Greek" and self.stanza_nlp is not None) or \
-               (language != "Ancient Greek" and self.nlp is not None)
+    @staticmethod
+    def key(model, text):
+        """Cache key of an (outer-whitespace stripped) paragraph annotated by model"""
+        return model, hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def get(self, key):
+        """Cached table for key (None on a miss), counting the lookup"""
+        with self.lock:
+            table = self.entries.get(key)
+            if table is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return table
+    
+    def miss(self):
+        """Count a lookup known to miss (a paragraph queued for parsing)"""
+        with self.lock:
+            self.misses += 1
+    
+    def put(self, key, table):
+        """Cache table under key, evicting the least recently used tables beyond max_tokens"""
+        with self.lock:
+            if len(table) > self.max_tokens or key in self.entries:
+                return
+            self.entries[key] = table
+            self.tokens += len(table)
+            while self.tokens > self.max_tokens:
+                _, evicted = self.entries.popitem(last=False)
+                self.tokens -= len(evicted)
+    
+    def hit_rate(self):
+        """Share of lookups served from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def stats(self):
+        """Counters for reports and the service health check"""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate(), 4),
+                    "paragraphs": len(self.entries), "tokens": self.tokens, "max_tokens": self.max_tokens}
 
-    def get_nlp_doc(self, text, language):
-        """Get processed document using appropriate NLP library"""
-        if language == "Ancient Greek" and self.stanza_nlp is not None:
-            # For Stanza, return the processed document directly
-            return self.stanza_nlp(text)
-        elif language != "Ancient Greek" and self.nlp is not None:
-            # For spaCy, normal processing
-            return self.nlp(text)
-        else:
+
+class ResultCache:
+    """LRU cache of finished analysis results (see TextAnalyzer.result_key), bounded by their
+    estimated size in bytes. Cached results are shared, not copied: callers must not modify them."""
+    DEFAULT_MB = 256
+    
+    def __init__(self, max_bytes=DEFAULT_MB * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (result, size, time cached)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def size(result):
+        """Approximate memory held by result: its counters (overall and per language) and scores"""
+        size = 0
+        for counter in [result, *getattr(result, 'by_language', {}).values()]:
+            size += sys.getsizeof(counter)
+            for key in counter:
+                size += sys.getsizeof(key) + 32  # Key and count
+                if isinstance(key, tuple):
+                    size += sum(sys.getsizeof(part) for part in key)
+        return size + sum(sys.getsizeof(scores) for scores in getattr(result, 'scores', {}).values())
+    
+    def get(self, key):
+        """(result, time cached) for key (None on a miss), counting the lookup"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
             return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[2]
+    
+    def put(self, key, result):
+        """Cache result under key, evicting the least recently used results beyond max_bytes"""
+        size = self.size(result)
+        if size > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous[1]
+        self.entries[key] = (result, size, time.time())
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted, _) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+    
+    def hit_rate(self):
+        """Share of lookups served from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
 
-    def setup_gui(self):
-        """Modern GUI setup with English interface"""
-        self.window = tk.Tk()
-        self.window.title("TALOS - Advanced Text File Analyzer")
+
+class ConcordanceIndex:
+    """Positional inverted index over the TokenTables of one text: lowercase word, lowercase
+    lemma and (entity label, entity text) -> positions ((table number << 32) | token), for KWIC
+    lookups. Lookups keep only the occurrences the analyses count, so hits match result counts."""
+    def __init__(self, vocab):
+        self.vocab = vocab
+        self.tables = []
+        self.words = {}  # lowercase form ID -> array of positions
+        self.lemmas = {}  # lowercase lemma ID -> array of positions
+        self.entities = {}  # (label ID, entity text) -> array of first-token positions
+        self._lower_lemma = {}  # lemma ID -> lowercase lemma ID
         
-        # Modern dark theme
-        self.colors = {
-            'bg_primary': '#1e1e2e',      # Primary dark background
-            'bg_secondary': '#2a2a3e',     # Secondary background
-            'accent': '#3b82f6',           # Modern blue
-            'accent_hover': '#2563eb',     # Blue hover
-            'text_primary': '#ffffff',     # Primary text
-            'text_secondary': '#a1a1aa',   # Secondary text
-            'success': '#22c55e',          # Success green
-            'border': '#374151',           # Borders
-            'warning': '#f59e0b',          # Warning orange
-            'error': '#ef4444'             # Error red
-        }
+    def add_table(self, table):
+        """Index a freshly encoded table"""
+        base = len(self.tables) << 32
+        self.tables.append(table)
+        words, lemmas, lower_lemma = self.words, self.lemmas, self._lower_lemma
+        strings, add = self.vocab.strings, self.vocab.add
         
-        self.setup_window_style()
-        self.create_header()
-        self.create_main_content()
-        self.create_status_bar()
+        for i, (lower, lemma) in enumerate(zip(table.lower, table.lemma)):
+            position = base | i
+            postings = words.get(lower)
+            if postings is None:
+                postings = words[lower] = array('q')
+            postings.append(position)
+            
+            lemma_id = lower_lemma.get(lemma)
+            if lemma_id is None:
+                lemma_id = lower_lemma[lemma] = add(strings[lemma].lower())
+            postings = lemmas.get(lemma_id)
+            if postings is None:
+                postings = lemmas[lemma_id] = array('q')
+            postings.append(position)
         
-        # Window configuration
-        self.center_window(850, 900)
+        for start, end, label in table.entity_spans():
+            self.entities.setdefault((label, table.span_text(start, end, strings)), array('q')).append(base | start)
+    
+    def token_spans(self, kind, item, pos=None, label=None):
+        """(table number, first token, end token) of each occurrence of item. kind is 'word',
+        'lemma', 'entity' or 'pattern' (item is then a PatternCounter key); pos restricts word
+        occurrences to a POS tag, label entities to an entity label. Only the occurrences the
+        analyses count are returned (alphabetic tokens; lemmas of longer non-stop words, or for
+        Stanza of words whose lemma differs; Stanza names capitalised PROPN/NOUN forms)."""
+        ids, strings = self.vocab.ids, self.vocab.strings
+        alpha, stop = TokenTable.ALPHA, TokenTable.STOP
+        if kind == 'pattern':
+            return self.pattern_spans(item)
+        spans = []
+        if kind == 'entity':
+            for position in self.entities.get((ids.get(label), item), ()):
+                table, start = self.tables[position >> 32], position & 0xFFFFFFFF
+                end = start + 1
+                while end < len(table) and table.ent_iob[end] == 2:
+                    end += 1
+                spans.append((position >> 32, start, end))
         
-    def setup_window_style(self):
-        """Window style configuration"""
-        self.window.configure(bg=self.colors['bg_primary'])
+        # Words, lemmas and (Stanza) capitalised names through the word postings
+        postings = (self.lemmas if kind == 'lemma' else self.words).get(ids.get(item.lower()), ())
+        pos_id = ids.get(pos) if pos else None
+        form_id = ids.get(item)
+        name_tags = {ids.get("PROPN"), ids.get("NOUN")}
+        for position in postings:
+            table, i = self.tables[position >> 32], position & 0xFFFFFFFF
+            flags, form = table.flags[i], strings[table.form[i]]
+            if kind == 'entity':
+                keep = (table.engine == 'stanza' and table.form[i] == form_id and table.pos[i] in name_tags and
+                        form[0].isupper() and len(form) > 2)
+            elif kind == 'lemma':
+                if table.engine == 'stanza':
+                    lemma = strings[table.lemma[i]]
+                    keep = flags & alpha and len(form) > 2 and lemma and lemma.lower() != form.lower()
+                else:
+                    keep = flags & alpha and not flags & stop and len(form) > 2
+            else:
+                keep = flags & alpha and (pos_id is None or table.pos[i] == pos_id)
+            if keep:
+                spans.append((position >> 32, i, i + 1))
+        return spans
+    
+    def pattern_spans(self, key):
+        """Occurrences of a (POS IDs, word IDs) pattern key: candidates from the postings of its
+        first word, verified over the following alphabetic tokens"""
+        pos_ids, word_ids = key
+        alpha = TokenTable.ALPHA
+        spans = []
+        for position in self.words.get(word_ids[0], ()):
+            table, i = self.tables[position >> 32], position & 0xFFFFFFFF
+            if table.pos[i] != pos_ids[0] or not table.flags[i] & alpha:
+                continue
+            j, matched = i, True
+            for expected_pos, expected_word in zip(pos_ids[1:], word_ids[1:]):
+                j += 1
+                while j < len(table) and not table.flags[j] & alpha:
+                    j += 1
+                if j >= len(table) or table.pos[j] != expected_pos or table.lower[j] != expected_word:
+                    matched = False
+                    break
+            if matched:
+                spans.append((position >> 32, i, j + 1))
+        return spans
+    
+    def char_span(self, table_number, start, end):
+        """Character offsets in the text of a token span"""
+        table = self.tables[table_number]
+        return table.idx[start], table.idx[end - 1] + len(self.vocab[table.form[end - 1]])
+
+
+PARAGRAPH_BREAK_RE = re.compile(r"\n[ \t\r\f\v]*\n")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?;\u037e\u0387\u00b7])\s+")
+NON_SPACE_RE = re.compile(r"\S")
+
+
+# Universal POS tags accepted in token patterns (CONJ: the pre-v2 name of CCONJ)
+UNIVERSAL_POS = ("ADJ", "ADP", "ADV", "AUX", "CCONJ", "CONJ", "DET", "INTJ", "NOUN", "NUM", "PART", "PRON",
+                 "PROPN", "PUNCT", "SCONJ", "SYM", "VERB", "X")
+PATTERN_TEST = r"(?:\*|(?:word|lemma)=[^\s()|&?*+{}]+|[A-Za-z]+)"
+PATTERN_TOKEN_RE = re.compile(rf"{PATTERN_TEST}(?:[|&]{PATTERN_TEST})*")
+PATTERN_QUANTIFIER_RE = re.compile(r"[?*+]|\{(\d+)(?:(,)(\d*))?\}")
+
+
+class TokenPattern:
+    """Token pattern compiled to a DFA over integer-encoded tokens.
+    
+    A pattern is a sequence of token tests separated by spaces. A test is a POS tag, '*' (any
+    token), word=<form> or lemma=<lemma> (case-insensitive); tests joined by '|' are
+    alternatives and by '&' must all hold, e.g. 'NOUN|PROPN' or 'VERB&lemma=be'. A test or a
+    parenthesised group may be followed without a space by '?', '*', '+' or {m,n}, and ' | '
+    between sequences is an alternation: 'DET? ADJ* (NOUN|PROPN)', '(ADJ NOUN | NOUN ADP NOUN)'.
+    
+    Matching is one pass over the alphabetic tokens of a table: each token becomes the bit mask
+    of the tests it passes, and the DFA is built lazily over these masks. DFA states keep their
+    threads grouped by start token, earliest first, so that every token where a match ends
+    yields the longest match ending there; per token this costs at most one step per start
+    group, whose number is bounded by the pattern, never by the text. Matches are at most
+    MAX_MATCH tokens long, so that '*+' and the like do not match whole tables."""
+    MAX_REPEAT = 20  # Largest bound of {m,n}
+    MAX_STATES = 10000  # Largest NFA: nested repetitions multiply its size
+    MAX_MATCH = 50  # Longest match in tokens
+    
+    def __init__(self, pattern, vocab):
+        self.source = pattern if isinstance(pattern, str) else " ".join(pattern)
+        self.vocab = vocab
+        self.atoms = []  # (kind, value) of each test bit: ('pos', id), ('word', id), ('lemma', lowercase string)
+        self.tests = []  # Per token test: list of required bit masks, any of which passes
+        self.edges = []  # Per NFA state: [(test index, next state)]
+        self.epsilon = []  # Per NFA state: next states without consuming a token
+        tree = self.parse(self.source)
+        self.start, self.accept = self.build(tree)
+        self.start_closure = self.closure({self.start})
+        if self.accept in self.start_closure:
+            raise ValueError(f"Pattern '{self.source}' can match no tokens at all")
+        if self.min_length(tree) > self.MAX_MATCH:
+            raise ValueError(f"Pattern '{self.source}' only matches more than {self.MAX_MATCH} tokens")
+        self.pos_bits, self.word_bits, self.lemma_bits = {}, {}, {}
+        for bit, (kind, value) in enumerate(self.atoms):
+            bits = {'pos': self.pos_bits, 'word': self.word_bits, 'lemma': self.lemma_bits}[kind]
+            bits[value] = bits.get(value, 0) | 1 << bit
+        self.states = {(): 0}  # DFA state (groups of NFA states) -> number
+        self.groups = [()]
+        self.transitions = {}  # (DFA state, mask) -> (next DFA state, kept start registers, accepting group)
+        self.lemma_masks = {}  # Lemma ID -> bits, filled as lemmas are met
+    
+    @staticmethod
+    def name(pattern):
+        """Pattern as one word for run and export names, e.g. 'DET?_ADJ*_NOUN'"""
+        return "_".join(pattern.split() if isinstance(pattern, str) else pattern)
+    
+    # Parsing: pattern -> ('test', index) | ('seq', items) | ('alt', options) | ('repeat', item, min, max)
+    def lex(self, source):
+        lexemes, i, after_item = [], 0, False
+        while i < len(source):
+            char = source[i]
+            if char.isspace():
+                i, after_item = i + 1, False
+                continue
+            quantifier = PATTERN_QUANTIFIER_RE.match(source, i) if after_item else None
+            if quantifier:
+                if quantifier.group(1) is None:
+                    low, high = {'?': (0, 1), '*': (0, None), '+': (1, None)}[quantifier.group()]
+                else:
+                    low = int(quantifier.group(1))
+                    high = low if quantifier.group(2) is None else (int(quantifier.group(3)) if quantifier.group(3) else None)
+                    if (high if high is not None else low) > self.MAX_REPEAT or (high is not None and high < low):
+                        raise ValueError(f"Pattern repetition {quantifier.group()}: bounds must be in order "
+                                         f"and at most {self.MAX_REPEAT}")
+                lexemes.append(('repeat', low, high))
+                i = quantifier.end()
+                continue
+            if char in "()|":
+                lexemes.append((char,))
+                i, after_item = i + 1, char == ")"
+                continue
+            token = PATTERN_TOKEN_RE.match(source, i)
+            if not token:
+                raise ValueError(f"Pattern error at '{source[i:i + 20]}'")
+            lexemes.append(('test', self.add_test(token.group())))
+            i, after_item = token.end(), True
+        return lexemes
+    
+    def add_test(self, text):
+        """Index of the token test for text, e.g. 'NOUN|PROPN' or 'VERB&lemma=be'"""
+        options = []
+        for option in text.split("|"):
+            required = 0
+            for test in option.split("&"):
+                if test == "*":
+                    continue
+                kind, _, value = test.rpartition("=")
+                if kind:
+                    atom = ('word', self.vocab.add(value.lower())) if kind == "word" else ('lemma', value.lower())
+                else:
+                    if value.upper() not in UNIVERSAL_POS:
+                        raise ValueError(f"Unknown POS tag '{value}' (expected one of: {', '.join(UNIVERSAL_POS)})")
+                    atom = ('pos', self.vocab.add(value.upper()))
+                if atom not in self.atoms:
+                    self.atoms.append(atom)
+                required |= 1 << self.atoms.index(atom)
+            options.append(required)
+        self.tests.append(options)
+        return len(self.tests) - 1
+    
+    def parse(self, source):
+        lexemes = self.lex(source)
+        lexemes.append(('end',))
+        position = [0]
         
-        # ttk styles
-        self.style = ttk.Style()
-        self.style.theme_use('clam')
+        def peek():
+            return lexemes[position[0]][0]
         
-        # Custom style configuration
-        self.style.configure('Modern.TButton',
-                           background=self.colors['accent'],
-                           foreground='white',
-                           borderwidth=0,
-                           focuscolor='none',
-                           padding=(20, 10))
+        def take():
+            position[0] += 1
+            return lexemes[position[0] - 1]
         
-        self.style.map('Modern.TButton',
-                      background=[('active', self.colors['accent_hover']),
-                                ('pressed', '#1d4ed8')])
+        def alternation():
+            options = [sequence()]
+            while peek() == "|":
+                take()
+                options.append(sequence())
+            return options[0] if len(options) == 1 else ('alt', options)
         
-    def create_header(self):
-        """Header creation with logo and title"""
-        header_frame = tk.Frame(self.window, bg=self.colors['bg_primary'], height=80)
-        header_frame.pack(fill=tk.X, padx=20, pady=(20, 0))
-        header_frame.pack_propagate(False)
+        def sequence():
+            items = []
+            while peek() not in ("|", ")", "end"):
+                if peek() == "(":
+                    take()
+                    item = alternation()
+                    if take()[0] != ")":
+                        raise ValueError(f"Pattern '{source}': missing ')'")
+                elif peek() == "test":
+                    item = take()
+                else:
+                    raise ValueError(f"Pattern '{source}': repetition without a token before it")
+                while peek() == "repeat":
+                    _, low, high = take()
+                    item = ('repeat', item, low, high)
+                items.append(item)
+            if not items:
+                raise ValueError(f"Pattern '{source}': empty pattern or alternative")
+            return items[0] if len(items) == 1 else ('seq', items)
         
-        # Main title with modern style
-        title_frame = tk.Frame(header_frame, bg=self.colors['bg_primary'])
-        title_frame.pack(expand=True)
+        tree = alternation()
+        if peek() != "end":
+            raise ValueError(f"Pattern '{source}': unbalanced ')'")
+        return tree
+    
+    @classmethod
+    def min_length(cls, node):
+        """Fewest tokens a parsed pattern node matches"""
+        kind = node[0]
+        if kind == 'test':
+            return 1
+        if kind == 'seq':
+            return sum(cls.min_length(item) for item in node[1])
+        if kind == 'alt':
+            return min(cls.min_length(option) for option in node[1])
+        return node[2] * cls.min_length(node[1])
+    
+    # Thompson construction: each node becomes (entry state, exit state)
+    def new_state(self):
+        if len(self.edges) >= self.MAX_STATES:
+            raise ValueError(f"Pattern '{self.source}' is too large (more than {self.MAX_STATES:,} states); "
+                             "use fewer or smaller nested repetitions")
+        self.edges.append([])
+        self.epsilon.append([])
+        return len(self.edges) - 1
+    
+    def build(self, node):
+        kind = node[0]
+        if kind == 'test':
+            entry, exit = self.new_state(), self.new_state()
+            self.edges[entry].append((node[1], exit))
+            return entry, exit
+        if kind == 'seq':
+            entry, exit = self.build(node[1][0])
+            for item in node[1][1:]:
+                item_entry, item_exit = self.build(item)
+                self.epsilon[exit].append(item_entry)
+                exit = item_exit
+            return entry, exit
+        if kind == 'alt':
+            entry, exit = self.new_state(), self.new_state()
+            for option in node[1]:
+                option_entry, option_exit = self.build(option)
+                self.epsilon[entry].append(option_entry)
+                self.epsilon[option_exit].append(exit)
+            return entry, exit
+        _, item, low, high = node
+        entry = exit = self.new_state()
+        for _ in range(low):
+            item_entry, item_exit = self.build(item)
+            self.epsilon[exit].append(item_entry)
+            exit = item_exit
+        if high is None:
+            item_entry, item_exit = self.build(item)
+            loop = self.new_state()
+            self.epsilon[exit].append(loop)
+            self.epsilon[loop].append(item_entry)
+            self.epsilon[item_exit].append(loop)
+            exit = loop
+        else:
+            end = self.new_state()
+            for _ in range(high - low):
+                item_entry, item_exit = self.build(item)
+                self.epsilon[exit].append(item_entry)
+                self.epsilon[exit].append(end)
+                exit = item_exit
+            self.epsilon[exit].append(end)
+            exit = end
+        return entry, exit
+    
+    def closure(self, states):
+        stack, seen = list(states), set(states)
+        while stack:
+            for state in self.epsilon[stack.pop()]:
+                if state not in seen:
+                    seen.add(state)
+                    stack.append(state)
+        return frozenset(seen)
+    
+    def transition(self, state, mask):
+        """Compute and cache the DFA transition of state on a token with test bits mask"""
+        passed = {i for i, options in enumerate(self.tests) if any(mask & required == required for required in options)}
+        groups, kept, seen = [], [], set()
+        # Threads of earlier starts come first; a new thread starts at this token
+        for register, group in enumerate(self.groups[state] + (self.start_closure,)):
+            moved = {target for nfa_state in group for test, target in self.edges[nfa_state] if test in passed}
+            moved = self.closure(moved) - seen if moved else frozenset()
+            if moved:
+                groups.append(moved)
+                kept.append(register)
+                seen |= moved
+        groups = tuple(groups)
+        number = self.states.get(groups)
+        if number is None:
+            number = self.states[groups] = len(self.groups)
+            self.groups.append(groups)
+        accepting = next((i for i, group in enumerate(groups) if self.accept in group), -1)
+        result = self.transitions[(state, mask)] = (number, kept, accepting)
+        return result
+    
+    def finditer(self, pos_ids, word_ids, lemma_ids):
+        """(start, end) of the longest match of at most MAX_MATCH tokens ending at each token of
+        parallel ID sequences"""
+        pos_bits, word_bits, lemma_bits = self.pos_bits, self.word_bits, self.lemma_bits
+        lemma_masks, strings, transitions = self.lemma_masks, self.vocab.strings, self.transitions
+        state, starts = 0, []
+        window = deque(maxlen=self.MAX_MATCH)  # Masks of the last MAX_MATCH tokens
+        for i, (pos_id, word_id, lemma_id) in enumerate(zip(pos_ids, word_ids, lemma_ids)):
+            mask = pos_bits.get(pos_id, 0) | word_bits.get(word_id, 0)
+            if lemma_bits:
+                lemma_mask = lemma_masks.get(lemma_id)
+                if lemma_mask is None:
+                    lemma_mask = lemma_masks[lemma_id] = lemma_bits.get(strings[lemma_id].lower(), 0) if lemma_id >= 0 else 0
+                mask |= lemma_mask
+            window.append(mask)
+            step = transitions.get((state, mask)) or self.transition(state, mask)
+            state, kept, accepting = step
+            starts.append(i)
+            starts = [starts[register] for register in kept]
+            if starts and starts[0] <= i - self.MAX_MATCH:
+                # The earliest thread outgrew MAX_MATCH: start over from the window's tokens only
+                state, starts = 0, []
+                for start, mask in enumerate(window, i + 1 - len(window)):
+                    state, kept, accepting = transitions.get((state, mask)) or self.transition(state, mask)
+                    starts.append(start)
+                    starts = [starts[register] for register in kept]
+            if accepting >= 0:
+                yield starts[accepting], i + 1
+
+
+def iter_text_spans(text, max_chars=2000, start=0, end=None):
+    """Yield (start, end) spans of the paragraphs of text[start:end], splitting paragraphs
+    longer than max_chars at sentence boundaries"""
+    if end is None:
+        end = len(text)
+    breaks = [(m.start(), m.end()) for m in PARAGRAPH_BREAK_RE.finditer(text, start, end)]
+    breaks.append((end, end))
+    
+    for end, next_start in breaks:
+        if NON_SPACE_RE.search(text, start, end):
+            if end - start <= max_chars:
+                yield start, end
+            else:
+                # Long paragraph: group sentences into pieces of about max_chars
+                piece_start = start
+                for m in SENTENCE_END_RE.finditer(text, start, end):
+                    if m.start() - piece_start >= max_chars:
+                        yield piece_start, m.start()
+                        piece_start = m.end()
+                if NON_SPACE_RE.search(text, piece_start, end):
+                    yield piece_start, end
+        start = next_start
+
+
+# Compressed inputs, recognised by their magic bytes
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz")
+]
+TEXT_FILETYPES = [("Text files", "*.txt *.txt.gz *.txt.bz2 *.txt.xz"),
+                  ("Compressed text", "*.gz *.bz2 *.xz"), ("All files", "*.*")]
+SNIFF_BYTES = 64 * 1024
+LEGACY_ENCODINGS = ("cp1253", "iso-8859-7", "cp1252")  # Greek legacy code pages first
+GREEK_CHAR_RE = re.compile(r"[\u0370-\u03ff]")
+
+
+def open_binary(path):
+    """Open path for reading bytes, decompressing gzip/bz2/xz on the fly; returns (stream, compression)"""
+    with open(path, 'rb') as f:
+        magic = f.read(6)
+    for prefix, compression in COMPRESSION_MAGIC:
+        if magic.startswith(prefix):
+            if compression == "gzip":
+                import gzip
+                return gzip.open(path, 'rb'), compression
+            if compression == "bz2":
+                import bz2
+                return bz2.open(path, 'rb'), compression
+            import lzma
+            return lzma.open(path, 'rb'), compression
+    return open(path, 'rb', buffering=SNIFF_BYTES), None
+
+
+def sniff_encoding(sample):
+    """Guess the encoding of a byte sample: BOM, then UTF-8, then the legacy code page
+    that decodes to the most Greek letters (cp1253 and iso-8859-7 differ in a few positions)"""
+    for bom, encoding in ((b"\xef\xbb\xbf", "utf-8-sig"), (b"\xff\xfe", "utf-16"), (b"\xfe\xff", "utf-16")):
+        if sample.startswith(bom):
+            return encoding
+    
+    try:
+        # The sample may end inside a multi-byte character
+        import codecs
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    return legacy_encoding(sample)
+
+
+def legacy_encoding(sample):
+    """The legacy code page that decodes a byte sample to the most Greek letters"""
+    best, best_score = LEGACY_ENCODINGS[-1], -1
+    for encoding in LEGACY_ENCODINGS:
+        try:
+            decoded = sample.decode(encoding)
+        except UnicodeDecodeError:
+            continue  # Byte undefined in this code page
+        # Greek letters count for, symbols that only appear in mis-decoded Greek count against
+        score = len(GREEK_CHAR_RE.findall(decoded)) - 10 * sum(decoded.count(c) for c in "¶΅¢")
+        if score > best_score:
+            best, best_score = encoding, score
+    return best
+
+
+def sniff_non_ascii(path):
+    """Encoding of a file whose head sniffed as UTF-8 but which is not valid UTF-8 further on,
+    from its first non-ASCII blocks: a legacy code page, or 'utf-8' if most of their non-ASCII
+    text is valid UTF-8 (a UTF-8 file with a few corrupt bytes)"""
+    stream, _ = open_binary(path)
+    sample = bytearray()
+    with stream:
+        while len(sample) < SNIFF_BYTES:
+            block = stream.read(SNIFF_BYTES)
+            if not block:
+                break
+            if not block.isascii():
+                sample += block
+    decoded = sample.decode('utf-8', errors='replace')
+    invalid = decoded.count('\ufffd')
+    if invalid < sum(1 for char in decoded if char > '\x7f') - invalid:
+        return "utf-8"
+    return legacy_encoding(bytes(sample))
+
+
+def read_text_file(path, profile=None):
+    """Read a (possibly compressed) text file in one streaming pass without temporary files.
+    With a FileProfile, the profile is computed over the text as it is decoded.
+    Returns (text, encoding, compression)."""
+    stream, compression = open_binary(path)
+    with stream:
+        # The first buffer fill is the sniff sample; decoding then continues from the same stream
+        buffered = io.BufferedReader(stream, SNIFF_BYTES) if compression else stream
+        encoding = sniff_encoding(buffered.peek(SNIFF_BYTES)[:SNIFF_BYTES])
+        try:
+            with io.TextIOWrapper(buffered, encoding=encoding, newline=None) as reader:
+                return read_profiled(reader, profile), encoding, compression
+        except UnicodeDecodeError:
+            pass
+    
+    if encoding == "utf-8":
+        # A legacy file whose head is ASCII: sniff its non-ASCII part and decode again
+        encoding = sniff_non_ascii(path)
+        if encoding != "utf-8":
+            if profile is not None:
+                profile.__init__()
+            stream, compression = open_binary(path)
+            try:
+                with io.TextIOWrapper(stream, encoding=encoding, newline=None) as reader:
+                    return read_profiled(reader, profile), encoding, compression
+            except UnicodeDecodeError:
+                pass
+    
+    # Invalid bytes past the sniffed sample: decode again, replacing them
+    if profile is not None:
+        profile.__init__()
+    stream, compression = open_binary(path)
+    with io.TextIOWrapper(stream, encoding=encoding, errors="replace", newline=None) as reader:
+        return read_profiled(reader, profile), f"{encoding} (invalid bytes replaced)", compression
+
+
+def read_text_head(path, chars):
+    """The first chars characters of a (possibly compressed) text file, reading no further than
+    needed (undecodable bytes replaced). Returns (head, encoding, compression)."""
+    stream, compression = open_binary(path)
+    with stream:
+        buffered = io.BufferedReader(stream, SNIFF_BYTES) if compression else stream
+        encoding = sniff_encoding(buffered.peek(SNIFF_BYTES)[:SNIFF_BYTES])
+        with io.TextIOWrapper(buffered, encoding=encoding, errors="replace", newline=None) as reader:
+            return reader.read(chars), encoding, compression
+
+
+def read_profiled(reader, profile=None):
+    """All text of reader, fed to profile chunk by chunk on the way"""
+    if profile is None:
+        return reader.read()
+    chunks = []
+    while True:
+        chunk = reader.read(FileProfile.CHUNK_CHARS)
+        if not chunk:
+            break
+        profile.update(chunk)
+        chunks.append(chunk)
+    profile.finish()
+    return "".join(chunks)
+
+
+def text_size_hint(path):
+    """Approximate decompressed size of path in bytes (gzip stores it; others assume 4:1)"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        magic = f.read(6)
+        if magic.startswith(b"\x1f\x8b") and size >= 4:
+            f.seek(-4, os.SEEK_END)
+            # ISIZE is the size modulo 2**32; never assume less than the compressed size
+            return max(size, int.from_bytes(f.read(4), 'little'))
+    if any(magic.startswith(prefix) for prefix, _ in COMPRESSION_MAGIC):
+        return size * 4
+    return size
+
+
+# A non-blank line after a blank line (or after the start of the text, see FileProfile.update)
+PARAGRAPH_START_RE = re.compile(r"\n[^\S\n]*\n[^\S\n]*\S")
+
+
+class FileProfile:
+    """Character, word, line and paragraph counts, language sample and content hash of a text,
+    computed in one streaming pass while it is read (see read_text_file). Words are split on
+    whitespace; paragraphs are runs of non-blank lines."""
+    CHUNK_CHARS = 1024 * 1024
+    SAMPLE_CHARS = 5000  # Language detection sample (the start of the text)
+    
+    def __init__(self):
+        self.chars = self.words = self.lines = self.paragraphs = 0
+        self.sample = ""
+        self.language = None  # Detected from the sample, when the text is loaded
+        self.encoding = self.compression = None
+        self.content_hash = None  # Same as TextAnalyzer.text_hash
+        self.hasher = hashlib.blake2b(digest_size=16)
+        # Stream state: in a word, last complete line blank, non-blank text on the current line
+        self.in_word = False
+        self.previous_blank = True
+        self.line_text = False
+        self.ended_line = False
         
-        tk.Label(title_frame, 
-                text="TALOS AI4SSH",
-                font=('Segoe UI', 28, 'bold'),
-                fg=self.colors['accent'],
-                bg=self.colors['bg_primary']).pack()
-                
-        tk.Label(title_frame,
-                text="Advanced Intelligent Text File Analyzer",
-                font=('Segoe UI', 12),
-                fg=self.colors['text_secondary'],
-                bg=self.colors['bg_primary']).pack()
-        
-    def create_main_content(self):
-        """Main content creation"""
-        main_frame = tk.Frame(self.window, bg=self.colors['bg_primary'])
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+    @classmethod
+    def for_text(cls, text):
+        """Profile of a text already in memory"""
+        profile = cls()
+        for start in range(0, len(text), cls.CHUNK_CHARS):
+            profile.update(text[start:start + cls.CHUNK_CHARS])
+        profile.finish()
+        return profile
+    
+    def update(self, chunk):
+        """Count the next chunk of the text"""
+        if len(self.sample) < self.SAMPLE_CHARS:
+            self.sample += chunk[:self.SAMPLE_CHARS - len(self.sample)]
+        self.chars += len(chunk)
+        self.hasher.update(chunk.encode('utf-8', 'surrogatepass'))
         
-        # File selection section (FIRST)
-        self.create_file_selection(main_frame)
+        # A word cut by the chunk boundary was counted with the previous chunk
+        self.words += len(chunk.split()) - (self.in_word and not chunk[0].isspace())
+        self.in_word = not chunk[-1].isspace()
         
-        # Action buttons section
-        self.create_action_buttons(main_frame)
+        # The prefix stands for the end of the previous chunk, as far as paragraph starts go
+        prefix = "x" if self.line_text else ("\n\n" if self.previous_blank else "x\n")
+        self.paragraphs += len(PARAGRAPH_START_RE.findall(prefix + chunk))
+        newlines = chunk.count('\n')
+        self.lines += newlines
+        self.ended_line = chunk[-1] == '\n'
+        if newlines:
+            last = chunk.rfind('\n')
+            before = chunk.rfind('\n', 0, last)
+            self.previous_blank = not (chunk[before + 1:last].strip() or (before < 0 and self.line_text))
+            self.line_text = bool(chunk[last + 1:].strip())
+        else:
+            self.line_text = self.line_text or bool(chunk.strip())
+    
+    def finish(self):
+        """Complete the counts once the whole text went through update"""
+        if self.chars and not self.ended_line:
+            self.lines += 1  # Last line without a line break
+        self.content_hash = self.hasher.hexdigest()
+        self.hasher = None
+        return self
+
+
+# Local data directory (metrics, caches, stores); override with TALOS_HOME
+TALOS_HOME = Path(os.environ.get("TALOS_HOME", Path.home() / ".talos"))
+
+
+class RunTrace:
+    """Timed stages of one analysis run; summarised in the results header,
+    appended to the metrics log and exportable as a Chrome trace"""
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.events = []  # (stage, start perf_counter, duration s, thread id)
         
-        # Languages support info section
-        self.create_language_info(main_frame)
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work as stage `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append((name, start, time.perf_counter() - start, threading.get_ident()))
+            
+    def add_events(self, events):
+        """Include events recorded elsewhere (e.g. while loading the file)"""
+        self.events.extend(events)
+    
+    def durations(self):
+        """Total seconds per stage; 'extract' is analysis time not spent loading models or parsing"""
+        totals = {}
+        for name, _, duration, _ in self.events:
+            totals[name] = totals.get(name, 0.0) + duration
+        if 'analysis' in totals:
+            nested = sum(totals.get(name, 0.0) for name in ('load_model', 'store', 'checkpoint', 'cache', 'parse', 'encode', 'index'))
+            totals['extract'] = max(0.0, totals.pop('analysis') - nested)
+        return totals
+    
+    def to_chrome_trace(self):
+        """Chrome trace ('Trace Event Format') dict, viewable in chrome://tracing or Perfetto"""
+        origin = min((start for _, start, _, _ in self.events), default=0.0)
+        events = [{
+            "name": name, "cat": "talos", "ph": "X", "pid": os.getpid(), "tid": thread_id,
+            "ts": (start - origin) * 1e6, "dur": duration * 1e6
+        } for name, start, duration, thread_id in self.events]
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"run": self.name, "started": self.started}}
+
+
+def format_duration(seconds):
+    """Human-readable duration: '850 ms' or '4.2 s'"""
+    return f"{seconds * 1000:.0f} ms" if seconds < 1 else f"{seconds:.1f} s"
+
+
+class ParseCheckpoint:
+    """Annotated chunks of a long parse, persisted under TALOS_HOME/checkpoints as they complete,
+    so that an interrupted parse of the same text with the same models resumes after its last
+    finished chunk. Chunk files hold their own strings, not Vocabulary IDs."""
+    COLUMNS = ('form', 'lower', 'lemma', 'pos', 'ent_type')
+    
+    def __init__(self, directory, vocab):
+        self.directory = Path(directory)
+        self.vocab = vocab
+        self.enabled = True  # Cleared when the directory turns out not to be writable
         
-        # Results area
-        self.create_results_area(main_frame)
+    @classmethod
+    def for_text(cls, text_hash, chunk_chars, vocab):
+        """Checkpoint of the text with content hash text_hash parsed in chunks of chunk_chars"""
+        digest = hashlib.blake2b(f"{text_hash}:{chunk_chars}".encode('ascii'), digest_size=16)
+        return cls(TALOS_HOME / "checkpoints" / digest.hexdigest(), vocab)
+    
+    def path(self, language, model, number):
+        """File of the number-th chunk of language parsed by model"""
+        name = re.sub(r'\W+', '_', f"{language}_{model}")
+        return self.directory / f"{name}_{number:06d}.chunk"
+    
+    def load(self, language, model, number, start, end):
+        """TokenTable of a finished chunk (None if it is missing, unreadable or for other offsets)"""
+        import pickle
         
-    def create_file_selection(self, parent):
-        """File selection section - NOW FIRST"""
-        file_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], relief=tk.RAISED, bd=1)
-        file_frame.pack(fill=tk.X, pady=(0, 15))
+        try:
+            with open(self.path(language, model, number), 'rb') as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        if saved.get("span") != (start, end):
+            return None
         
-        # Title and button in same row
-        header_frame = tk.Frame(file_frame, bg=self.colors['bg_secondary'])
-        header_frame.pack(fill=tk.X, padx=15, pady=10)
+        # Chunk-local string numbers -> IDs of this run's vocabulary (the last one stands for -1)
+        ids = [self.vocab.add(string) for string in saved["strings"]] + [-1]
+        table = TokenTable(saved["language"], saved["engine"])
+        for column in self.COLUMNS:
+            getattr(table, column).extend(ids[i] for i in saved[column])
+        for column in ('ent_iob', 'flags', 'idx', 'sent_starts'):
+            setattr(table, column, saved[column])
+        return table
+    
+    def save(self, language, model, number, start, end, table):
+        """Persist a finished chunk (written to a temporary file, then renamed into place)"""
+        import pickle
         
-        tk.Label(header_frame,
-                text="📁 Step 1: Select Your Text File",
-                font=('Segoe UI', 14, 'bold'),
-                fg=self.colors['text_primary'],
-                bg=self.colors['bg_secondary']).pack(side=tk.LEFT)
+        if not self.enabled:
+            return
+        strings, local = [], {-1: -1}  # -1 (no entity) stays -1: ids[-1] in load()
+        saved = {"language": table.language, "engine": table.engine, "span": (start, end), "strings": strings}
+        for column in self.COLUMNS:
+            values = array('i')
+            for string_id in getattr(table, column):
+                number_in_chunk = local.get(string_id)
+                if number_in_chunk is None:
+                    number_in_chunk = local[string_id] = len(strings)
+                    strings.append(self.vocab[string_id])
+                values.append(number_in_chunk)
+            saved[column] = values
+        for column in ('ent_iob', 'flags', 'idx', 'sent_starts'):
+            saved[column] = getattr(table, column)
         
-        # Select file button
-        select_btn = tk.Button(header_frame,
-                              text="📂 Browse File",
-                              command=self.select_file,
-                              bg=self.colors['accent'],
-                              fg='white',
-                              font=('Segoe UI', 10, 'bold'),
-                              relief=tk.FLAT,
-                              bd=0,
-                              padx=15,
-                              pady=8,
-                              cursor='hand2')
-        select_btn.pack(side=tk.RIGHT)
+        path = self.path(language, model, number)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(path.with_suffix(".tmp"), 'wb') as f:
+                pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path.with_suffix(".tmp"), path)
+        except OSError:
+            self.enabled = False  # Checkpoints are best effort
+    
+    def discard(self):
+        """Delete the checkpoint once the parse has completed"""
+        import shutil
         
-        # Hover effects for button
-        select_btn.bind("<Enter>", lambda e: select_btn.config(bg=self.colors['accent_hover']))
-        select_btn.bind("<Leave>", lambda e: select_btn.config(bg=self.colors['accent']))
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class TokenStore:
+    """Disk-backed token columns of one annotated text, written by the parse and read back
+    through NumPy memmaps one table at a time: raw ID columns (form, lower, lemma, POS, entity,
+    ...), a vocabulary of their own (vocab.jsonl) and a manifest listing the tables, written last"""
+    COLUMNS = {'form': 'i4', 'lower': 'i4', 'lemma': 'i4', 'pos': 'i4', 'ent_type': 'i4',
+               'ent_iob': 'i1', 'flags': 'u1', 'idx': 'i8', 'sent_starts': 'i4'}
+    STRING_COLUMNS = ('form', 'lower', 'lemma', 'pos', 'ent_type')
+    
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.manifest = None
         
-        # File display area
-        self.file_name_label = tk.Label(file_frame,
-                                      text="❌ No file selected yet",
-                                      font=('Segoe UI', 10),
-                                      fg=self.colors['text_secondary'],
-                                      bg=self.colors['bg_secondary'],
-                                      wraplength=800,
-                                      justify='left')
-        self.file_name_label.pack(anchor='w', padx=15, pady=(0, 15))
+    @classmethod
+    def for_text(cls, text_hash, models):
+        """Store of the text with content hash text_hash annotated by models (language -> model name)"""
+        key = json.dumps([text_hash, sorted(models.items())]).encode('utf-8')
+        return cls(TALOS_HOME / "tokens" / hashlib.blake2b(key, digest_size=16).hexdigest())
+    
+    def complete(self):
+        """True if the store has been completely written (reads its manifest)"""
+        try:
+            with open(self.directory / "manifest.json", encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return True
+    
+    def writer(self, vocab):
+        """TokenStoreWriter replacing the store's contents"""
+        return TokenStoreWriter(self, vocab)
+    
+    def tables(self, vocab):
+        """StoredTables of a complete store, with IDs interned in vocab"""
+        return StoredTables(self, vocab)
 
-    def create_action_buttons(self, parent):
-        """Modern action buttons creation - NO FILE SELECTION"""
-        button_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], relief=tk.RAISED, bd=1)
-        button_frame.pack(fill=tk.X, pady=(0, 15))
+
+class TokenStoreWriter:
+    """Appends TokenTables to a TokenStore while a text is parsed, in a temporary directory of its
+    own; finish() writes the vocabulary and the manifest and moves the directory into place,
+    close() discards it"""
+    def __init__(self, store, vocab):
+        import numpy as np
+        import tempfile
         
-        # Section title
-        tk.Label(button_frame,
-                text="📊 Step 2: Choose Your Analysis Type",
-                font=('Segoe UI', 14, 'bold'),
-                fg=self.colors['text_primary'],
-                bg=self.colors['bg_secondary']).pack(pady=(15, 10))
+        self.store = store
+        self.vocab = vocab
+        store.directory.parent.mkdir(parents=True, exist_ok=True)
+        self.directory = Path(tempfile.mkdtemp(prefix=f"{store.directory.name}.", suffix=".tmp",
+                                               dir=store.directory.parent))
+        self.files = {column: open(self.directory / f"{column}.bin", 'wb') for column in TokenStore.COLUMNS}
+        self.local = np.full(len(vocab), -1, dtype=np.int64)  # Engine vocabulary ID -> store ID
+        self.strings = []
+        self.tables = []  # [language, engine, first token, end token, first sentence, end sentence]
+        self.tokens = self.sentences = 0
         
-        # Button container
-        buttons_container = tk.Frame(button_frame, bg=self.colors['bg_secondary'])
-        buttons_container.pack(pady=(0, 15))
+    def store_ids(self, ids):
+        """Store IDs of engine vocabulary IDs (new strings are added to the store vocabulary)"""
+        import numpy as np
         
-        # Button configuration with text icons
-        buttons_config = [
-            ("📝 Word Analysis", lambda: self.handle_analysis(1), "Complete word frequency analysis"),
-            ("🏷️ Noun Analysis", lambda: self.handle_analysis(2), "Common noun extraction"),
-            ("👥 Person Names", lambda: self.handle_analysis(3), "Person name recognition"),
-            ("🌍 Location Names", lambda: self.handle_analysis(4), "Location identification"),
-            ("🔤 Lemmatization", lambda: self.handle_analysis(5), "Lemmatized word analysis"),
-            ("🎯 Pattern Extraction", lambda: self.show_pattern_selector(), "Custom lexical-syntactic patterns")
-        ]
+        if len(self.local) < len(self.vocab):
+            grown = np.full(len(self.vocab), -1, dtype=np.int64)
+            grown[:len(self.local)] = self.local
+            self.local = grown
+        valid = ids >= 0
+        new = np.unique(ids[valid][self.local[ids[valid]] < 0])
+        if len(new):
+            self.local[new] = np.arange(len(self.strings), len(self.strings) + len(new))
+            self.strings.extend(self.vocab.strings[string_id] for string_id in new.tolist())
+        return np.where(valid, self.local[np.where(valid, ids, 0)], -1).astype(np.int32)
+    
+    def append(self, table):
+        """Write the tokens of a freshly encoded table"""
+        import numpy as np
         
-        for i, (text, command, tooltip) in enumerate(buttons_config):
-            btn = tk.Button(buttons_container,
-                          text=text,
-                          command=command,
-                          bg=self.colors['accent'],
-                          fg='white',
-                          font=('Segoe UI', 10, 'bold'),
-                          relief=tk.FLAT,
-                          bd=0,
-                          padx=15,
-                          pady=10,
-                          cursor='hand2')
-            
-            # Hover effect
-            btn.bind("<Enter>", lambda e, b=btn: b.config(bg=self.colors['accent_hover']))
-            btn.bind("<Leave>", lambda e, b=btn: b.config(bg=self.colors['accent']))
-            
-            # Grid positioning 3x2
-            row, col = i // 3, i % 3
-            btn.grid(row=row, column=col, padx=6, pady=5, sticky='ew')
-            
-        # Column weight configuration
-        for i in range(3):
-            buttons_container.grid_columnconfigure(i, weight=1)
+        for column in TokenStore.STRING_COLUMNS:
+            ids = np.frombuffer(getattr(table, column), dtype=np.int32)
+            self.files[column].write(self.store_ids(ids).tobytes())
+        for column in ('ent_iob', 'flags', 'idx', 'sent_starts'):
+            self.files[column].write(getattr(table, column).tobytes())
+        self.tables.append([table.language, table.engine, self.tokens, self.tokens + len(table),
+                            self.sentences, self.sentences + len(table.sent_starts)])
+        self.tokens += len(table)
+        self.sentences += len(table.sent_starts)
     
-    def create_language_info(self, parent):
-        """Language support information section"""
-        lang_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], relief=tk.RAISED, bd=1)
-        lang_frame.pack(fill=tk.X, pady=(0, 15))
+    def close(self):
+        """Discard the store being written"""
+        import shutil
         
-        tk.Label(lang_frame,
-                text="🌍 Supported Languages",
-                font=('Segoe UI', 12, 'bold'),
-                fg=self.colors['text_primary'],
-                bg=self.colors['bg_secondary']).pack(anchor='w', padx=15, pady=(10, 5))
+        for f in self.files.values():
+            f.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def finish(self, models):
+        """Complete the store: vocabulary, then the manifest (models: language -> model key),
+        then move it into place. If another engine completed the same store meanwhile, that one is kept."""
+        import shutil
         
-        # Language list with flags - more compact display
-        languages = ["   🇺🇸 English", "🇬🇷 Modern Greek", "🏛️ Ancient Greek (models auto-installed when needed)"]
+        for f in self.files.values():
+            f.close()
+        with open(self.directory / "vocab.jsonl", 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(string, ensure_ascii=False) + "\n" for string in self.strings)
+        with open(self.directory / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump({"tokens": self.tokens, "tables": self.tables, "models": models,
+                       "columns": TokenStore.COLUMNS}, f, ensure_ascii=False)
+        target = self.store.directory
+        try:
+            os.rename(self.directory, target)
+            return
+        except OSError:
+            if not self.store.complete():
+                shutil.rmtree(target, ignore_errors=True)  # An incomplete store from before
+                try:
+                    os.rename(self.directory, target)
+                    return
+                except OSError:
+                    pass
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class StoredTables:
+    """The TokenTables of a TokenStore as a sequence: each table is read from the memmapped
+    columns when accessed (the OS page cache does the rest) and remapped to the engine vocabulary"""
+    def __init__(self, store, vocab):
+        import numpy as np
         
-        # Create compact language display
-        lang_text = "  • " + "   • ".join(languages)
+        self.entries = store.manifest["tables"]
+        with open(store.directory / "vocab.jsonl", encoding='utf-8') as f:
+            ids = [vocab.add(json.loads(line)) for line in f]
+        self.ids = np.array(ids + [-1], dtype=np.int32)  # Store ID -> engine ID; -1 (no entity) stays -1
+        self.columns = {}
+        for column, dtype in TokenStore.COLUMNS.items():
+            path = store.directory / f"{column}.bin"
+            # Empty files cannot be mapped
+            self.columns[column] = (np.memmap(path, dtype=dtype, mode='r') if path.stat().st_size
+                                    else np.zeros(0, dtype=dtype))
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __getitem__(self, number):
+        language, engine, first, end, first_sentence, end_sentence = self.entries[number]
+        columns = self.columns
+        table = TokenTable(language, engine)
+        for column in TokenStore.STRING_COLUMNS:
+            getattr(table, column).frombytes(self.ids[columns[column][first:end]].tobytes())
+        for column in ('ent_iob', 'flags', 'idx'):
+            getattr(table, column).frombytes(columns[column][first:end].tobytes())
+        table.sent_starts.frombytes(columns['sent_starts'][first_sentence:end_sentence].tobytes())
+        return table
+    
+    def __iter__(self):
+        return (self[number] for number in range(len(self.entries)))
+
+
+class LanguageIdentifier:
+    """Language identification engine: one tokenisation pass per sample, set lookups
+    against indicator lexicons and character trigram profiles. Built once, see
+    get_language_identifier()."""
+    
+    # Language codes returned by langdetect
+    LANGDETECT_NAMES = {
+        'en': 'English', 'fr': 'French', 'es': 'Spanish', 'de': 'German',
+        'it': 'Italian', 'pt': 'Portuguese', 'nl': 'Dutch', 'ru': 'Russian',
+        'zh-cn': 'Chinese', 'ja': 'Japanese', 'ko': 'Korean', 'ar': 'Arabic',
+        'el': 'Modern Greek'
+    }
+    
+    ANCIENT_GREEK_WORDS = frozenset([
+        'καὶ', 'τὸ', 'τίν', 'τοῦ', 'ἐν', 'τῆς', 'εἰς', 'τῶν', 'τὰς', 'ὃ', 'ἡ', 'τόν',
+        'αὐτὸν', 'αὐτοῦ', 'ἐστι', 'γὰρ', 'δὲ', 'οὐ', 'μὴ', 'ἀλλὰ', 'ἄν', 'ἔστι', 'ὅτι',
+        'ὡς', 'μετὰ', 'πρὸς', 'διὰ', 'παρὰ', 'ἀπὸ', 'ἐπὶ', 'ὑπὸ', 'περὶ', 'σὺν', 'ἄνευ',
+        'ἕνεκα', 'χάριν', 'ἕως', 'μέχρι', 'πρίν', 'ἐάν', 'ἵνα', 'ὅπως', 'ὅταν', 'ἐπεὶ'
+    ])
+    
+    # Modern Greek markers used to separate the two Greek variants
+    MODERN_GREEK_MARKERS = frozenset([
+        'και', 'το', 'της', 'του', 'τα', 'με', 'σε', 'για', 'από', 'που', 'θα', 'είναι',
+        'έχει', 'έχουν', 'ήταν', 'αυτό', 'αυτή', 'αυτά', 'αυτός', 'αυτήν', 'αυτούς'
+    ])
+    
+    # Indicator lexicons for the offline fallback (ties are broken by the trigram profiles)
+    LEXICONS = {
+        'Modern Greek': frozenset(['το', 'η', 'και', 'του', 'της', 'στην', 'στον', 'με', 'για', 'από',
+                                   'όλα', 'αυτό', 'που', 'θα', 'είναι', 'έχει', 'μια', 'στα', 'ένα', 'όμως']),
+        'Italian': frozenset(['il', 'la', 'le', 'di', 'e', 'che', 'un', 'una', 'con', 'per', 'in', 'da',
+                              'del', 'della', 'dei', 'delle', 'sono', 'è', 'hanno', 'sia']),
+        'French': frozenset(['le', 'la', 'les', 'de', 'du', 'des', 'et', 'est', 'sont', 'avec', 'dans',
+                             'pour', 'sur', 'ce', 'qui', 'une', 'tout', 'nous', 'vous', 'ils']),
+        'Spanish': frozenset(['el', 'la', 'los', 'las', 'de', 'del', 'y', 'es', 'son', 'con', 'en', 'por',
+                              'para', 'que', 'un', 'una', 'todo', 'pero', 'más', 'como']),
+        'German': frozenset(['der', 'die', 'das', 'und', 'ist', 'sind', 'mit', 'von', 'zu', 'haben', 'auf',
+                             'für', 'ein', 'eine', 'nicht', 'sich', 'auch', 'werden', 'bei', 'noch']),
+        'English': frozenset(['the', 'and', 'is', 'are', 'was', 'were', 'have', 'has', 'will', 'would',
+                              'this', 'that', 'with', 'from', 'they', 'been', 'their', 'said', 'each', 'which',
+                              'she', 'do', 'how', 'if', 'up', 'out', 'many', 'time', 'very', 'when', 'much',
+                              'can', 'there', 'use', 'your', 'way', 'about', 'could', 'just'])
+    }
+    
+    # Seed sentences for the character trigram profiles
+    PROFILE_SEEDS = {
+        'English': "the people of the city said that they would not have been there when the ship "
+                   "arrived with all their friends and which of these things could be done about it",
+        'French': "les gens de la ville ont dit qu'ils ne seraient pas là quand le navire est arrivé "
+                  "avec tous leurs amis et ce que nous pouvons faire pour eux dans cette maison",
+        'Spanish': "la gente de la ciudad dijo que no estarían allí cuando llegara el barco con todos "
+                   "sus amigos y lo que podemos hacer por ellos en esta casa para siempre",
+        'German': "die leute der stadt sagten dass sie nicht dort sein würden wenn das schiff mit "
+                  "allen ihren freunden ankommt und was wir für sie in diesem haus tun können",
+        'Italian': "la gente della città ha detto che non sarebbero stati lì quando la nave è arrivata "
+                   "con tutti i loro amici e quello che possiamo fare per loro in questa casa",
+        'Modern Greek': "οι άνθρωποι της πόλης είπαν ότι δεν θα ήταν εκεί όταν έφτασε το πλοίο με όλους "
+                        "τους φίλους τους και τι μπορούμε να κάνουμε για αυτούς σε αυτό το σπίτι",
+        'Ancient Greek': "ἐν ἀρχῇ ἦν ὁ λόγος καὶ ὁ λόγος ἦν πρὸς τὸν θεόν καὶ θεὸς ἦν ὁ λόγος ἄνδρα μοι "
+                         "ἔννεπε μοῦσα πολύτροπον ὃς μάλα πολλὰ πλάγχθη ἐπεὶ τροίης ἱερὸν πτολίεθρον ἔπερσεν"
+    }
+    
+    # Minimum cosine similarity for a profile-only decision
+    MIN_PROFILE_SCORE = 0.1
+    
+    TOKEN_RE = re.compile(r"\w+")
+    # Greek Extended block: breathings, accents and iota subscripts of polytonic Greek
+    POLYTONIC_RE = re.compile(r"[\u1f00-\u1fff]")
+    
+    def __init__(self):
+        # langdetect is optional; import and seed it once
+        try:
+            from langdetect import DetectorFactory, detect_langs
+            DetectorFactory.seed = 0  # For consistent results
+            self.detect_langs = detect_langs
+        except ImportError:
+            self.detect_langs = None
         
-        lang_display = tk.Label(lang_frame,
-                               text=lang_text,
-                               font=('Segoe UI', 9),
-                               fg=self.colors['text_secondary'],
-                               bg=self.colors['bg_secondary'],
-                               wraplength=850,
-                               justify='left')
-        lang_display.pack(anchor='w', padx=15, pady=(0, 5))
+        self.profiles = {}
+        for language, seed in self.PROFILE_SEEDS.items():
+            profile = self.trigram_counts(seed.split())
+            norm = sum(count * count for count in profile.values()) ** 0.5
+            self.profiles[language] = (profile, norm)
+            
+    @staticmethod
+    def trigram_counts(tokens):
+        """Character trigram counts over space-padded tokens"""
+        counts = Counter()
+        for token in tokens:
+            padded = f" {token} "
+            counts.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return counts
+    
+    def profile_scores(self, tokens, candidates=None):
+        """Cosine similarity of the sample's trigram profile to each language profile"""
+        sample = self.trigram_counts(tokens[:500])
+        sample_norm = sum(count * count for count in sample.values()) ** 0.5 or 1.0
+        scores = {}
+        for language, (profile, norm) in self.profiles.items():
+            if candidates is None or language in candidates:
+                dot = sum(count * profile.get(gram, 0) for gram, count in sample.items())
+                scores[language] = dot / (sample_norm * norm)
+        return scores
+    
+    def greek_variant(self, text, token_set):
+        """Distinguish Ancient from Modern Greek"""
+        # Polytonic marks are a strong Ancient Greek indicator
+        if self.POLYTONIC_RE.search(text):
+            return "Ancient Greek"
+        ancient_count = len(token_set & self.ANCIENT_GREEK_WORDS)
+        modern_count = len(token_set & self.MODERN_GREEK_MARKERS)
+        return "Ancient Greek" if ancient_count > modern_count else "Modern Greek"
+    
+    def offline_languages(self):
+        """Languages the lexicon/profile detector can recognise without langdetect"""
+        return set(self.LEXICONS) | {"Ancient Greek"}
+    
+    def detect(self, text, use_langdetect=True):
+        """Return the language name for a text sample"""
+        # Tokenise the sample once; everything below is set/dict lookups
+        tokens = self.TOKEN_RE.findall(text.lower())
+        token_set = set(tokens)
         
-        # Installation note
-        note_label = tk.Label(lang_frame,
-                             text="💡 spaCy for modern languages, Stanza for Ancient Greek (models auto-installed when needed)",
-                             font=('Segoe UI', 8),
-                             fg=self.colors['text_secondary'],
-                             bg=self.colors['bg_secondary'],
-                             wraplength=750)
-        note_label.pack(anchor='w', padx=15, pady=(0, 10))
+        if use_langdetect and self.detect_langs is not None:
+            try:
+                lang_probs = self.detect_langs(text[:3000])
+                # If English has decent probability, prefer it
+                for lang_prob in lang_probs:
+                    if lang_prob.lang == 'en' and lang_prob.prob > 0.3:
+                        return "English"
+                detected = lang_probs[0].lang if lang_probs else 'en'
+            except Exception:
+                detected = 'en'  # Default to English if detection fails
+            
+            detected_lang = self.LANGDETECT_NAMES.get(detected, "English")
+            if detected_lang == "Modern Greek":
+                return self.greek_variant(text, token_set)
+            return detected_lang
         
-    def create_results_area(self, parent):
-        """Results display area with modern style"""
-        results_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], relief=tk.RAISED, bd=1)
-        results_frame.pack(fill=tk.BOTH, expand=True)
+        # Offline detection from the indicator lexicons
+        total_words = len(tokens)
+        if total_words == 0:
+            return "English"
         
-        # Results area header with progress bar
-        header = tk.Frame(results_frame, bg=self.colors['bg_secondary'])
-        header.pack(fill=tk.X, padx=15, pady=(15, 10))
+        # Ancient Greek has priority if detected (even a small percentage)
+        ancient_count = len(token_set & self.ANCIENT_GREEK_WORDS)
+        if self.POLYTONIC_RE.search(text) or ancient_count * 100 / total_words > 1.0:
+            return "Ancient Greek"
         
-        # Title
-        self.results_title = tk.Label(header,
-                text="📊 Analysis Results",
-                font=('Segoe UI', 12, 'bold'),
-                fg=self.colors['text_primary'],
-                bg=self.colors['bg_secondary'])
-        self.results_title.pack(side=tk.LEFT)
+        counts = {language: len(token_set & lexicon) for language, lexicon in self.LEXICONS.items()}
         
-        # Progress bar for analysis
-        self.results_progress = ttk.Progressbar(header, mode='determinate', length=200)
-        self.results_progress.pack(side=tk.RIGHT, padx=(10, 0))
+        # English bias: if English percentage is decent, prefer it
+        if counts['English'] * 100 / total_words >= 2.0 or counts['English'] >= 5:
+            return "English"
         
-        # Progress label
-        self.progress_label = tk.Label(header,
-                                     text="0%",
-                                     font=('Segoe UI', 9),
-                                     fg=self.colors['text_secondary'],
-                                     bg=self.colors['bg_secondary'],
-                                     width=5)
-        self.progress_label.pack(side=tk.RIGHT)
+        best_count = max(counts.values())
+        if best_count == 0:
+            # No lexicon evidence: fall back to the character profiles
+            scores = self.profile_scores(tokens)
+        else:
+            candidates = [language for language, count in counts.items() if count == best_count]
+            if len(candidates) == 1:
+                return candidates[0]
+            scores = self.profile_scores(tokens, candidates)
         
-        # Text area with modern style
-        text_frame = tk.Frame(results_frame, bg=self.colors['border'], bd=2)
-        text_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 15))
+        best_language = max(scores, key=scores.get)
+        return best_language if scores[best_language] >= self.MIN_PROFILE_SCORE else "English"
+
+
+_language_identifier = None
+
+
+def package_version(name):
+    """Installed version of the distribution name (None if it is not installed)"""
+    from importlib import metadata
+    
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def get_language_identifier():
+    """Shared LanguageIdentifier, created on first use"""
+    global _language_identifier
+    if _language_identifier is None:
+        _language_identifier = LanguageIdentifier()
+    return _language_identifier
+
+
+def env_number(name, default, kind=int):
+    """Numeric setting from environment variable name; default (with a warning) if it is malformed"""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return kind(value)
+    except ValueError:
+        print(f"⚠️ Ignoring {name}={value!r}: not a number, using the default", file=sys.stderr)
+        return default
+
+
+class TextAnalyzer:
+    # Language model mapping
+    SPACY_MODELS = {
+        "English": "en_core_web_sm",
+        "French": "fr_core_news_sm",
+        "Spanish": "es_core_news_sm",
+        "German": "de_core_news_sm",
+        "Italian": "it_core_news_sm",
+        "Portuguese": "pt_core_news_sm",
+        "Dutch": "nl_core_news_sm",
+        "Modern Greek": "el_core_news_sm"
+    }
+    
+    # Segment-level language detection
+    SEGMENT_MAX_CHARS = 2000     # Long paragraphs are split at sentence ends
+    SEGMENT_MIN_CHARS = 80       # Shorter paragraphs inherit their neighbour's language
+    SEGMENT_MIN_SHARE = 0.02     # Languages below this share of the text are treated as noise
+    PIPE_BATCH_SIZE = 64         # Texts per nlp.pipe batch
+    
+    # Annotation cache
+    CACHE_PARAGRAPH_CHARS = 2000  # Longer paragraphs are cached in sentence groups of about this size
+    
+    # Parse checkpoints
+    CHECKPOINT_MIN_CHARS = 200000  # Shorter texts are not checkpointed
+    CHECKPOINT_CHUNK_CHARS = 50000  # Largest chunk of a checkpointed parse
+    
+    # File profiles
+    FILE_PROFILES = 64  # Profiles kept by read_file (per path, modification time and size)
+    
+    def __init__(self, startup_timing=False, headless=False):
+        self.startup_timing = startup_timing
+        self.mark_startup("module imported")
         
-        self.text_area = ScrolledText(text_frame,
-                                    wrap=tk.WORD,
-                                    font=('Consolas', 11),
-                                    bg='#ffffff',
-                                    fg='#1f2937',
-                                    selectbackground=self.colors['accent'],
-                                    selectforeground='white',
-                                    borderwidth=0,
-                                    padx=15,
-                                    pady=10)
-        self.text_area.pack(fill=tk.BOTH, expand=True)
-        
-        # Initial message
-        self.text_area.insert(tk.END, 
-                             "🚀 Welcome to TALOS Advanced Text Analyzer!\n\n"
-                             "📁 Step 1: Select a text file using the 'Browse File' button above\n"
-                             "📊 Step 2: Choose an analysis type\n"
-                             "💾 Step 3: Export results to Excel\n\n"
-                             "💡 Tips:\n"
-                             "• 'Person Names' and 'Location Names' use AI processing\n"
-                             "• 'Lemmatization' provides base word forms\n"
-                             "• 'Pattern Extraction' finds linguistic patterns like [adj][noun]\n"
-                             "• Language is automatically detected for each file\n"
-                             "• First AI analysis may take a few seconds to load\n"
-                             "• Ancient Greek uses Stanza NLP, other languages use spaCy\n"
-                             "• Supported formats: .txt files\n\n"
-                             "📂 Select a file to get started!")
+        self.nlp = None
+        self.stanza_nlp = None  # For Ancient Greek
+        self.nlp_loading = False
+        self.detected_language = "Unknown"
+        self.selected_file = None
+        self.file_content = None
+        self.file_encoding = None  # Detected encoding of the selected file
+        self.file_compression = None  # 'gzip', 'bz2', 'xz' or None
+        self.custom_pattern = None
+        self.vocab = Vocabulary()  # Shared string <-> ID table for annotations and patterns
+        self.spacy_models = {}  # Loaded spaCy pipelines per language
+        self.language_segments = []  # [language, start, end] per detected segment
+        self.segment_routing = True  # Route each language's segments to its own model
+        self.analysis_queue = queue.Queue()
+        self.trace = None  # RunTrace of the run in progress
+        self.load_events = []  # Timed stages of loading the current file
+        self.file_loading = False  # Selected file still being read in the background
+        self.load_generation = 0  # Incremented per file selection; stale background loads are dropped
+        self.trace_dir = os.environ.get("TALOS_TRACE_DIR")  # Chrome-trace output directory
+        budget_mb = env_number("TALOS_MEMORY_BUDGET_MB", None)
+        # Only headless engines parse with several processes: nlp.pipe(n_process=...) forks, and forking
+        # the Tk process is unsafe
+        self.memory_governor = MemoryGovernor(budget_mb * 1024 ** 2 if budget_mb and budget_mb > 0 else None,
+                                              max_workers=None if headless else 1)
+        self.memory_plan = None  # MemoryPlan of the last parse
+        self.peak_rss = None  # Peak RSS in bytes of the last analysis run
+        self.annotations = None  # TokenTables of the current text, when the governor keeps them
+        self.concordance = None  # ConcordanceIndex over the kept annotations
+        self.word_positions = None  # Word -> (start, end) character offsets, flattened, for word-analysis concordances
+        self.result_rows = None  # (first line, items, result, export name) of the displayed rows
+        self.backend_url = os.environ.get("TALOS_BACKEND_URL")  # Analysis service used instead of local models
+        cache_tokens = env_number("TALOS_ANNOTATION_CACHE_TOKENS", AnnotationCache.DEFAULT_TOKENS)
+        self.annotation_cache = AnnotationCache(cache_tokens) if cache_tokens > 0 else None
+        self.cache_run = None  # (hits, lookups) of the annotation cache in the last parse
+        result_cache_mb = env_number("TALOS_RESULT_CACHE_MB", ResultCache.DEFAULT_MB, float)
+        self.result_cache = ResultCache(int(result_cache_mb * 1024 ** 2)) if result_cache_mb > 0 else None
+        self.checkpoints = os.environ.get("TALOS_CHECKPOINTS", "1") != "0"  # Resumable long parses
+        self.checkpoint_run = None  # (resumed chunks, chunks) of the last checkpointed parse
+        self.token_stores = os.environ.get("TALOS_TOKEN_STORE", "0") != "0"  # Parses kept on disk for re-analysis
+        self.file_hash = None  # Content hash of the loaded text (from its FileProfile, or computed when needed)
+        self.file_profile = None  # FileProfile of the selected file
+        self.file_profiles = OrderedDict()  # (path, mtime, size) -> FileProfile, most recent last
+        self.run_pattern = None  # Token pattern of the run in progress (custom patterns)
+        store_enabled = os.environ.get("TALOS_RESULT_STORE", "1") != "0"
+        self.result_store = ResultStore(TALOS_HOME / "results.sqlite") if store_enabled else None
         
-        # Make text area read-only initially
-        self.text_area.config(state=tk.DISABLED)
-    
-    def create_status_bar(self):
-        """Modern status bar"""
-        self.status_frame = tk.Frame(self.window, bg=self.colors['bg_secondary'], height=30)
-        self.status_frame.pack(fill=tk.X, side=tk.BOTTOM)
-        self.status_frame.pack_propagate(False)
+        # Modern dark theme
+        self.colors = {
+            'bg_primary': '#1e1e2e',      # Primary dark background
+            'bg_secondary': '#2a2a3e',     # Secondary background
+            'accent': '#3b82f6',           # Modern blue
+            'accent_hover': '#2563eb',     # Blue hover
+            'text_primary': '#ffffff',     # Primary text
+            'text_secondary': '#a1a1aa',   # Secondary text
+            'success': '#22c55e',          # Success green
+            'border': '#374151',           # Borders
+            'warning': '#f59e0b',          # Warning orange
+            'error': '#ef4444'             # Error red
+        }
         
-        self.status_label = tk.Label(self.status_frame,
-                                   text="Ready - Please select a file",
-                                   font=('Segoe UI', 9),
-                                   fg=self.colors['text_secondary'],
-                                   bg=self.colors['bg_secondary'])
-        self.status_label.pack(side=tk.LEFT, padx=15, pady=6)
+        # GUI analyses run in a separate NLP worker process (TALOS_NLP_WORKER=0: in a thread)
+        self.nlp_worker = None
+        if not headless and os.environ.get("TALOS_NLP_WORKER", "1") != "0":
+            self.nlp_worker = NLPWorker()
+        self.run_models = None  # Model keys reported by the NLP worker for the run in progress
         
-        # Progress bar
-        self.progress = ttk.Progressbar(self.status_frame, mode='indeterminate', length=100)
-        self.progress.pack(side=tk.RIGHT, padx=15, pady=6)
+        self.window = None
+        if not headless:
+            self.setup_gui()
         
-    def update_status(self, message, color=None):
-        """Update status bar"""
-        if color is None:
-            color = self.colors['text_secondary']
-        self.status_label.config(text=message, fg=color)
-        self.window.update()
+    def detect_language(self, text):
+        """Improved language detection with better English recognition"""
+        try:
+            return get_language_identifier().detect(text)
+        except Exception:
+            return "English"  # Always default to English
         
-    def update_results_progress(self, value, max_value=100):
-        """Update the progress bar in the results area"""
-        if value > max_value:
-            value = max_value
+    def lazy_load_nlp(self, language="en"):
+        """Lazy loading of NLP models with Stanza for Ancient Greek"""
+        if self.nlp_loading:
+            return False
             
-        percentage = int((value / max_value) * 100)
-        self.results_progress['value'] = percentage
-        self.progress_label.config(text=f"{percentage}%")
-        self.window.update()
-        
-    def reset_results_progress(self):
-        """Reset the progress bar in the results area"""
-        self.results_progress['value'] = 0
-        self.progress_label.config(text="0%")
-        
-    def start_progress(self):
-        """Start indeterminate progress bar"""
-        self.progress.start(10)
-        
-    def stop_progress(self):
-        """Stop progress bar"""
-        self.progress.stop()
-        
-    def center_window(self, width, height):
-        """Center window on screen"""
-        screen_width = self.window.winfo_screenwidth()
-        screen_height = self.window.winfo_screenheight()
-        x = (screen_width - width) // 2
-        y = (screen_height - height) // 2
-        self.window.geometry(f"{width}x{height}+{x}+{y}")
-        
-    def select_file(self):
-        """File selection with validation and content loading"""
-        file = filedialog.askopenfilename(
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
-            title="Select a text file"
-        )
-        
-        if file:
-            # File validation
-            if not os.path.exists(file):
-                messagebox.showerror("Error", "The selected file does not exist.")
+        # If it's Ancient Greek and we haven't loaded Stanza yet
+        if language == "Ancient Greek" and self.stanza_nlp is None:
+            self.nlp_loading = True
+            try:
+                import stanza
+                self.update_status("Loading Ancient Greek model (Stanza)...", self.colors['accent'])
+                self.stanza_nlp = stanza.Pipeline("grc")
+                self.nlp_loading = False
+                self.update_status("Ancient Greek model loaded", self.colors['success'])
+                return True
+            except Exception as e:
+                self.show_error("Stanza Error", 
+                    "Stanza model for Ancient Greek is not available.\n"
+                    "Run: stanza.download('grc')\n"
+                    f"Error: {str(e)}")
+                self.nlp_loading = False
                 return False
-                
-            file_size = os.path.getsize(file)
-            if file_size > 50 * 1024 * 1024:  # 50MB limit
-                if not messagebox.askyesno("Large File", 
-                                         f"File size is {file_size//1024//1024}MB. "
-                                         "Processing may be slow. Continue?"):
-                    return False
-            
-            # Load file content and detect language
+        
+        # For all other languages, use spaCy (one pipeline per language)
+        if language != "Ancient Greek" and language not in self.spacy_models:
+            self.nlp_loading = True
             try:
-                self.update_status("Loading file and detecting language...", self.colors['accent'])
-                self.start_progress()
+                import spacy
                 
-                with open(file, 'r', encoding='utf-8') as f:
-                    self.file_content = f.read()
-                    sample_text = self.file_content[:5000]  # First 5000 chars for detection
-                    
-                self.detected_language = self.detect_language(sample_text)
-                self.selected_file = file
+                model_name = self.SPACY_MODELS.get(language, "en_core_web_sm")
+                
+                try:
+                    self.update_status(f"Loading {language} model (spaCy)...", self.colors['accent'])
+                    self.spacy_models[language] = spacy.load(model_name)
+                    self.update_status(f"{language} model loaded", self.colors['success'])
+                except OSError:
+                    # Fallback to English if specific language model not available
+                    self.update_status("Falling back to English model...", self.colors['accent'])
+                    if "English" not in self.spacy_models:
+                        self.spacy_models["English"] = spacy.load("en_core_web_sm")
+                    self.spacy_models[language] = self.spacy_models["English"]
+                    self.show_warning("Model Warning", 
+                        f"Language model for {language} not found. Using English model.\n"
+                        f"For better results, install: python -m spacy download {model_name}")
                 
+                self.nlp_loading = False
             except Exception as e:
-                messagebox.showerror("Error", f"Could not read file: {str(e)}")
-                self.stop_progress()
+                self.show_error("NLP Error", 
+                    "spaCy model 'en_core_web_sm' is not installed.\n"
+                    "Run: python -m spacy download en_core_web_sm\n"
+                    f"Error: {str(e)}")
+                self.nlp_loading = False
                 return False
+        
+        if language != "Ancient Greek":
+            self.nlp = self.spacy_models[language]
+        
+        # Return True if we already have the right model loaded
+        return (language == "Ancient Greek" and self.stanza_nlp is not None) or \
+               (language != "Ancient Greek" and self.nlp is not None)
+
+    def get_nlp_doc(self, text, language):
+        """Get processed document using appropriate NLP library"""
+        if language == "Ancient Greek" and self.stanza_nlp is not None:
+            # For Stanza, return the processed document directly
+            return self.stanza_nlp(text)
+        elif language != "Ancient Greek" and language in self.spacy_models:
+            # For spaCy, normal processing
+            return self.spacy_models[language](text)
+        else:
+            return None
+
+    def get_nlp_docs(self, texts, language, batch_size=None, workers=1):
+        """Process several texts of one language in batches; yields one document per text"""
+        batch_size = batch_size or self.PIPE_BATCH_SIZE
+        if len(texts) == 1:
+            return [self.get_nlp_doc(texts[0], language)]
+        
+        if language == "Ancient Greek":
+            # Stanza bulk processing, batch_size documents at a time
+            import stanza
             
-            # Display selected file with language
-            file_path = Path(file)
-            language_flag = self.get_language_flag(self.detected_language)
-            
-            # File info display
-            file_size_mb = file_size / (1024 * 1024)
-            word_count = len(self.file_content.split())
-            
-            display_text = (
-                f"✅ {file_path.name}\n"
-                f"   📂 {file_path.parent}\n"
-                f"   🌍 Language: {language_flag} {self.detected_language}\n"
-                f"   📄 Size: {file_size_mb:.1f} MB | Words: {word_count:,}"
-            )
-            
-            self.file_name_label.config(text=display_text, fg=self.colors['success'])
-            self.update_status(f"File loaded: {file_path.name} ({self.detected_language})", self.colors['success'])
-            self.stop_progress()
+            def stanza_batches():
+                for i in range(0, len(texts), batch_size):
+                    yield from self.stanza_nlp([stanza.Document([], text=text) for text in texts[i:i + batch_size]])
+            return stanza_batches()
+        
+        if workers > 1:
+            return self.spacy_models[language].pipe(texts, batch_size=batch_size, n_process=workers)
+        return self.spacy_models[language].pipe(texts, batch_size=batch_size)
+
+    def detect_segment_languages(self, text, language=None):
+        """Detect the language of each paragraph of text, whose overall language is language
+        (default: detected_language); returns merged [language, start, end] segments"""
+        identifier = get_language_identifier()
+        language = language or self.detected_language
+        if language not in identifier.offline_languages():
+            # Segments are detected offline; other languages are not routed
+            return [[language, 0, len(text)]]
+        
+        segments = []
+        pending_start = None  # Leading short paragraphs wait for the first detected language
+        
+        for start, end in iter_text_spans(text, self.SEGMENT_MAX_CHARS):
+            if end - start < self.SEGMENT_MIN_CHARS:
+                # Too short to detect reliably: inherit the previous segment's language
+                if segments:
+                    segments[-1][2] = end
+                elif pending_start is None:
+                    pending_start = start
+                continue
             
-            # Display beginning of text in results area
-            self.display_file_preview()
+            language = identifier.detect(text[start:min(end, start + 1000)], use_langdetect=False)
+            if pending_start is not None:
+                start, pending_start = pending_start, None
             
-            return True
-        return False
-    
-    def get_language_flag(self, language):
-        """Get flag emoji for language"""
-        flags = {
-            'English': '🇺🇸', 'French': '🇫🇷', 'Spanish': '🇪🇸', 'German': '🇩🇪',
-            'Italian': '🇮🇹', 'Portuguese': '🇵🇹', 'Dutch': '🇳🇱', 'Russian': '🇷🇺',
-            'Chinese': '🇨🇳', 'Japanese': '🇯🇵', 'Korean': '🇰🇷', 'Arabic': '🇸🇦',
-            'Modern Greek': '🇬🇷', 'Ancient Greek': '🏛️'
-        }
-        return flags.get(language, '🏳️')
+            if segments and segments[-1][0] == language:
+                segments[-1][2] = end
+            else:
+                segments.append([language, start, end])
         
-    def handle_analysis(self, option):
-        """Main handler for analyses - NO FILE SELECTION"""
-        # Check if file is loaded
-        if not self.selected_file or not self.file_content:
-            messagebox.showwarning("No File Selected", 
-                                 "⚠️ Please select a text file first using the 'Browse File' button!")
-            return
-            
-        # Analysis configuration
-        analysis_config = {
-            1: ("words", "📝 Word Analysis", self.analyze_words),
-            2: ("nouns", "🏷️ Noun Analysis", self.analyze_nouns),
-            3: ("persons", "👥 Person Analysis", lambda: self.analyze_entities("PERSON")),
-            4: ("locations", "🌍 Location Analysis", lambda: self.analyze_entities("GPE")),
-            5: ("lemmas", "🔤 Lemmatization Analysis", self.analyze_lemmas),
-            6: ("patterns", "🎯 Pattern Extraction", self.analyze_patterns)
-        }
+        if pending_start is not None:
+            if segments:
+                segments[0][1] = pending_start
+            else:
+                segments.append([self.detected_language, pending_start, len(text)])
         
-        if option not in analysis_config:
-            return
-            
-        export_name, title, analyze_func = analysis_config[option]
+        # Languages with only a marginal share are treated as detection noise
+        shares = Counter()
+        for language, start, end in segments:
+            shares[language] += end - start
+        total = sum(shares.values()) or 1
+        main_language = shares.most_common(1)[0][0] if shares else None
         
-        # Progress display
-        self.update_status(f"Analysis in progress...", self.colors['accent'])
-        self.start_progress()
-        self.reset_results_progress()
-        self.text_area.config(state=tk.NORMAL)
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(tk.END, f"{title}\n{'='*50}\n\n⏳ Processing...")
-        self.text_area.config(state=tk.DISABLED)
-        self.window.update()
+        merged = []
+        for language, start, end in segments:
+            if shares[language] / total < self.SEGMENT_MIN_SHARE:
+                language = main_language
+            if merged and merged[-1][0] == language:
+                merged[-1][2] = end
+            else:
+                merged.append([language, start, end])
         
-        # Background analysis with timeout check
-        def run_analysis():
+        return merged
+
+    def language_groups(self):
+        """Map each language of the loaded text to its (start, end) spans"""
+        languages = {language for language, _, _ in self.language_segments}
+        if self.segment_routing and len(languages) > 1:
+            groups = {}
+            for language, start, end in self.language_segments:
+                groups.setdefault(language, []).append((start, end))
+            return groups
+        
+        return {self.detected_language: [(0, len(self.file_content))]}
+
+    def language_shares(self):
+        """Share of the loaded text per language, largest first"""
+        shares = Counter()
+        for language, spans in self.language_groups().items():
+            shares[language] = sum(end - start for start, end in spans)
+        total = sum(shares.values()) or 1
+        return [(language, chars / total) for language, chars in shares.most_common()]
+
+    def engine_name(self, languages=None):
+        """NLP engine label ('Stanza', 'spaCy' or both) for the given languages"""
+        if languages is None:
+            languages = list(self.language_groups())
+        engines = {'Stanza' if language == "Ancient Greek" else 'spaCy' for language in languages}
+        return " + ".join(sorted(engines))
+
+    def annotate(self):
+        """Parse the loaded text, routing each language's segments to its own pipeline.
+        Returns a list of TokenTable, or None if a model could not be loaded."""
+        if self.annotations is not None:
+            return self.annotations
+        
+        groups = self.language_groups()
+        total_chars = sum(end - start for spans in groups.values() for start, end in spans) or 1
+        processed_chars = 0
+        tables = []
+        
+        loaded_engines = [engine for engine, loaded in (('spacy', self.spacy_models), ('stanza', self.stanza_nlp))
+                          if loaded]
+        plan = self.memory_plan = self.memory_governor.plan(groups, loaded_engines)
+        # The concordance index refers to the tables, so it lives as long as they are kept
+        index = ConcordanceIndex(self.vocab) if plan.keep_annotations else None
+        
+        # A text parsed before with the same models is read back from its token store
+        store = writer = None
+        if self.token_stores:
+            store = self.token_store(groups)
+            if store.complete():
+                with self.stage("store"):
+                    tables = store.tables(self.vocab)
+                    if plan.keep_annotations:
+                        tables = list(tables)
+                if index is not None:
+                    with self.stage("index"):
+                        for table in tables:
+                            index.add_table(table)
+                    self.annotations, self.concordance = tables, index
+                self.post_progress(100)
+                return tables
+        
+        if not plan.fits:
+            self.show_warning("Memory", f"Estimated peak memory {format_bytes(plan.estimate)} exceeds "
+                                        f"the budget of {format_bytes(plan.limit)} even in small chunks.")
+        if store is not None:
             try:
-                result = analyze_func()
-                if result:
-                    self.window.after(0, lambda: self.display_results(title, result, export_name))
+                writer = store.writer(self.vocab)
+            except OSError:
+                writer = None  # The token store is best effort
+        
+        cache = self.annotation_cache
+        hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+        
+        # Long parses are checkpointed chunk by chunk, so chunks must be small enough to be worth resuming
+        checkpoint, chunk_chars = None, plan.chunk_chars
+        if self.checkpoints and len(self.file_content) >= self.CHECKPOINT_MIN_CHARS:
+            chunk_chars = min(chunk_chars or self.CHECKPOINT_CHUNK_CHARS, self.CHECKPOINT_CHUNK_CHARS)
+            with self.stage("checkpoint"):
+                checkpoint = ParseCheckpoint.for_text(self.text_hash(), chunk_chars, self.vocab)
+        resumed = chunks = 0
+        
+        try:
+            for language, spans in groups.items():
+                with self.stage("load_model"):
+                    loaded = self.lazy_load_nlp(language)
+                if not loaded:
+                    if writer is not None:
+                        writer.close()
+                    return None
+            
+                # Segments of the same language are parsed as one batch, in chunks if the governor says so
+                spans = self.chunk_spans(spans, chunk_chars)
+                model = self.model_key(language)
+                finished = []
+                if checkpoint is not None:
+                    # Resume after the last chunk that was finished before the interruption
+                    with self.stage("checkpoint"):
+                        for number, (start, end) in enumerate(spans):
+                            table = checkpoint.load(language, model, number, start, end)
+                            if table is None:
+                                break
+                            finished.append(table)
+                    resumed += len(finished)
+                    chunks += len(spans)
+            
+                remaining = spans[len(finished):]
+                if cache is not None:
+                    parsed = self.annotate_cached(remaining, language, plan, cache)
                 else:
-                    self.window.after(0, lambda: self.update_status("Analysis completed (no results)", self.colors['warning']))
-            except Exception as e:
-                self.window.after(0, lambda: messagebox.showerror("Error", f"Analysis error: {str(e)}"))
-            finally:
-                self.window.after(0, self.stop_progress)
-                self.window.after(0, lambda: self.update_results_progress(100))
+                    parsed = self.annotate_spans(remaining, language, plan)
+            
+                for number, (start, end) in enumerate(spans):
+                    if number < len(finished):
+                        table = finished[number]
+                    else:
+                        _, _, table = next(parsed)
+                        if checkpoint is not None:
+                            with self.stage("checkpoint"):
+                                checkpoint.save(language, model, number, start, end, table)
+                    if writer is not None:
+                        with self.stage("store"):
+                            writer.append(table)
+                    # Tables written to the token store are read back from it unless they are kept
+                    if writer is None or plan.keep_annotations:
+                        tables.append(table)
+                    if index is not None:
+                        with self.stage("index"):
+                            index.add_table(table)
                 
-        # Start analysis thread with timeout monitor
-        analysis_thread = threading.Thread(target=run_analysis, daemon=True)
-        analysis_thread.start()
+                    processed_chars += end - start
+                    self.post_progress(processed_chars / total_chars * 100)
         
-        # Monitor thread completion
-        self.monitor_analysis_thread(analysis_thread, title)
+        except BaseException:
+            if writer is not None:
+                writer.close()  # Nothing of a failed parse is stored
+            raise
+        
+        if cache is not None:
+            self.cache_run = (cache.hits - hits, cache.hits + cache.misses - hits - misses)
+        if checkpoint is not None:
+            checkpoint.discard()
+            self.checkpoint_run = (resumed, chunks)
+        if writer is not None:
+            with self.stage("store"):
+                writer.finish({language: self.model_key(language) for language in groups})
+                if not plan.keep_annotations and store.complete():
+                    tables = store.tables(self.vocab)
+        if plan.keep_annotations:
+            self.annotations = tables
+            self.concordance = index
+        return tables
 
-    def monitor_analysis_thread(self, thread, title, timeout=300):
-        """Monitor analysis thread with timeout"""
-        start_time = time.time()
+    def annotate_spans(self, spans, language, plan):
+        """Yield (start, end, TokenTable) per span, parsing the spans as one batch"""
+        texts = [self.file_content[start:end] for start, end in spans]
+        with self.stage("parse"):
+            docs = iter(self.get_nlp_docs(texts, language, plan.batch_size, plan.workers))
+        for start, end in spans:
+            with self.stage("parse"):
+                doc = next(docs)
+            with self.stage("encode"):
+                yield start, end, self.encode_doc(doc, language, start)
+
+    def annotate_cached(self, spans, language, plan, cache):
+        """Yield (start, end, TokenTable) per span, assembled from cached paragraph annotations;
+        only paragraphs missing from the cache (first occurrence only) are parsed"""
+        text = self.file_content
+        model = self.model_key(language)
         
-        def check_thread():
-            if thread.is_alive():
-                elapsed = time.time() - start_time
-                if elapsed < timeout:
-                    # Update progress based on elapsed time
-                    progress = min(90, int((elapsed / timeout) * 90))  # Cap at 90% until completion
-                    self.update_results_progress(progress)
-                    
+        with self.stage("cache"):
+            chunks, misses, queued = [], [], set()
+            for start, end in spans:
+                paragraphs = []
+                for piece_start, piece_end in iter_text_spans(text, self.CACHE_PARAGRAPH_CHARS, start, end):
+                    piece = text[piece_start:piece_end]
+                    stripped = piece.strip()
+                    piece_start += len(piece) - len(piece.lstrip())
+                    key = cache.key(model, stripped)
+                    parse = key not in cache and key not in queued
+                    if parse:
+                        queued.add(key)
+                        misses.append(stripped)
+                    paragraphs.append((piece_start, piece_start + len(stripped), key, parse))
+                chunks.append((start, end, paragraphs))
+        
+        with self.stage("parse"):
+            docs = iter(self.get_nlp_docs(misses, language, plan.batch_size, plan.workers) if misses else ())
+        for start, end, paragraphs in chunks:
+            table = TokenTable(language, 'stanza' if language == "Ancient Greek" else 'spacy')
+            for piece_start, piece_end, key, parse in paragraphs:
+                cached = None
+                if parse:
+                    cache.miss()
+                else:
+                    with self.stage("cache"):
+                        cached = cache.get(key)
+                if cached is None:
+                    # A miss, or a repeat whose table has been evicted since
+                    with self.stage("parse"):
+                        doc = next(docs) if parse else self.get_nlp_doc(text[piece_start:piece_end], language)
+                    with self.stage("encode"):
+                        cached = self.encode_doc(doc, language)
+                        cache.put(key, cached)
+                with self.stage("encode"):
+                    table.extend(cached, piece_start)
+            yield start, end, table
+
+    def token_store(self, groups):
+        """TokenStore of the loaded text for the models (names and versions) of its languages"""
+        return TokenStore.for_text(self.text_hash(), {language: self.model_key(language) for language in groups})
+
+    def model_key(self, language):
+        """Name and version of the pipeline annotating language (annotation cache and token store
+        keys); taken from the installed package while the pipeline is not loaded"""
+        if language == "Ancient Greek":
+            return f"stanza:grc-{package_version('stanza')}"
+        nlp = self.spacy_models.get(language)
+        if nlp is None:
+            name = self.SPACY_MODELS.get(language, "en_core_web_sm")
+            return f"spacy:{name}-{package_version(name)}"
+        meta = getattr(nlp, 'meta', {})
+        return f"spacy:{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}"
+
+    def result_key(self, name, pattern=None):
+        """Result cache key of an analysis of the loaded text: content hash, analysis, pattern,
+        languages and their routing, the models configured for them (or the analysis service)
+        and the extraction settings"""
+        if self.backend_url:
+            models = ("service", self.backend_url)
+        else:
+            models = tuple(sorted((language, "stanza:grc" if language == "Ancient Greek"
+                                   else self.SPACY_MODELS.get(language, "en_core_web_sm"))
+                                  for language in self.language_groups()))
+        settings = (tuple(map(tuple, self.PATTERN_TEMPLATES)), tuple(map(tuple, self.COLLOCATION_TEMPLATES)),
+                    self.COLLOCATION_MIN_COUNT)
+        return (self.text_hash(), name, TokenPattern.name(pattern) if pattern else None, self.detected_language,
+                tuple(map(tuple, self.language_segments)), self.segment_routing, models, settings)
+
+    def cached_result(self, title, name, pattern=None):
+        """Display the cached result of an analysis, if there is one; returns whether it did"""
+        if self.result_cache is None:
+            return False
+        cached = self.result_cache.get(self.result_key(name, pattern))
+        if cached is None:
+            return False
+        result, cached_at = cached
+        # Nothing is being analysed: no timings, memory or cache figures to show
+        self.trace = None
+        self.memory_plan = self.peak_rss = self.cache_run = self.checkpoint_run = None
+        self.display_results(title, result, name, cached=cached_at)
+        self.update_status(f"⚡ Cached result ({time.strftime('%H:%M:%S', time.localtime(cached_at))}), "
+                           "no recomputation", self.colors['success'])
+        return True
+
+    def chunk_spans(self, spans, chunk_chars):
+        """Split spans longer than chunk_chars at paragraph and sentence boundaries,
+        regrouping neighbouring pieces up to chunk_chars"""
+        if not chunk_chars:
+            return spans
+        
+        chunks = []
+        for start, end in spans:
+            if end - start <= chunk_chars:
+                chunks.append((start, end))
+                continue
+            pieces = []
+            for piece_start, piece_end in iter_text_spans(self.file_content, chunk_chars, start, end):
+                if pieces and piece_end - pieces[0][0] > chunk_chars:
+                    chunks.append((pieces[0][0], pieces[-1][1]))
+                    pieces = []
+                pieces.append((piece_start, piece_end))
+            if pieces:
+                chunks.append((pieces[0][0], pieces[-1][1]))
+        return chunks
+
+    def encode_doc(self, doc, language, offset=0):
+        """Convert a spaCy Doc or Stanza Document into a TokenTable"""
+        add = self.vocab.add
+        
+        if hasattr(doc, 'sentences'):
+            # For Stanza
+            table = TokenTable(language, 'stanza')
+            for sent in doc.sentences:
+                table.sent_starts.append(len(table.form))
+                for word in sent.words:
+                    text = word.text
+                    table.form.append(add(text))
+                    table.lower.append(add(text.lower()))
+                    table.lemma.append(add(word.lemma or ""))
+                    table.pos.append(add(word.upos or ""))
+                    table.ent_type.append(-1)
+                    table.ent_iob.append(0)
+                    table.flags.append(TokenTable.ALPHA if text.isalpha() else 0)
+                    table.idx.append(offset + (word.parent.start_char or 0))
+            return table
+        
+        # For spaCy
+        table = TokenTable(language, 'spacy')
+        iob_codes = {'B': 1, 'I': 2}
+        has_sents = doc.has_annotation("SENT_START")
+        for token in doc:
+            if has_sents and token.is_sent_start:
+                table.sent_starts.append(token.i)
+            iob = iob_codes.get(token.ent_iob_, 0)
+            table.form.append(add(token.text))
+            table.lower.append(add(token.lower_))
+            table.lemma.append(add(token.lemma_))
+            table.pos.append(add(token.pos_))
+            table.ent_type.append(add(token.ent_type_) if iob else -1)
+            table.ent_iob.append(iob)
+            table.flags.append((TokenTable.ALPHA if token.is_alpha else 0) |
+                               (TokenTable.STOP if token.is_stop else 0) |
+                               (TokenTable.SPACE if token.is_space else 0) |
+                               (TokenTable.TRAILING_SPACE if token.whitespace_ else 0))
+            table.idx.append(offset + token.idx)
+        return table
+
+    def post_progress(self, progress):
+        """Update the results progress bar from a worker thread"""
+        if self.window is not None:
+            self.window.after(0, lambda p=progress: self.update_results_progress(p))
+
+    def show_error(self, title, message):
+        """Report an error: dialog in the GUI, exception when headless"""
+        if self.window is None:
+            raise RuntimeError(f"{title}: {message}")
+        messagebox.showerror(title, message)
+
+    def show_warning(self, title, message):
+        """Report a warning: dialog in the GUI, stderr when headless"""
+        if self.window is None:
+            print(f"{title}: {message}", file=sys.stderr)
+            return
+        messagebox.showwarning(title, message)
+
+    def merge_results(self, by_language, result=None):
+        """Merge per-language counters into one result, keeping the breakdown"""
+        if result is None:
+            result = AnalysisResult()
+        for counter in by_language.values():
+            result.update(counter)
+        if len(by_language) > 1:
+            result.by_language = by_language
+        return result
+
+    def setup_gui(self):
+        """Modern GUI setup with English interface (window shell first, content deferred)"""
+        self.window = tk.Tk()
+        self.window.title("TALOS - Advanced Text File Analyzer")
+        
+        self.setup_window_style()
+        self.create_header()
+        self.create_status_bar()
+        
+        # Window configuration
+        self.center_window(850, 900)
+        self.mark_startup("window shell built")
+        
+        # The rest of the interface is built once the shell is on screen
+        self.window.after_idle(self.create_main_content)
+        
+    def setup_window_style(self):
+        """Window style configuration"""
+        self.window.configure(bg=self.colors['bg_primary'])
+        
+        # ttk styles
+        self.style = ttk.Style()
+        self.style.theme_use('clam')
+        
+        # Custom style configuration
+        self.style.configure('Modern.TButton',
+                           background=self.colors['accent'],
+                           foreground='white',
+                           borderwidth=0,
+                           focuscolor='none',
+                           padding=(20, 10))
+        
+        self.style.map('Modern.TButton',
+                      background=[('active', self.colors['accent_hover']),
+                                ('pressed', '#1d4ed8')])
+        
+    def create_header(self):
+        """Header creation with logo and title"""
+        header_frame = tk.Frame(self.window, bg=self.colors['bg_primary'], height=80)
+        header_frame.pack(fill=tk.X, padx=20, pady=(20, 0))
+        header_frame.pack_propagate(False)
+        
+        # Main title with modern style
+        title_frame = tk.Frame(header_frame, bg=self.colors['bg_primary'])
+        title_frame.pack(expand=True)
+        
+        tk.Label(title_frame, 
+                text="TALOS AI4SSH",
+                font=('Segoe UI', 28, 'bold'),
+                fg=self.colors['accent'],
+                bg=self.colors['bg_primary']).pack()
+                
+        tk.Label(title_frame,
+                text="Advanced Intelligent Text File Analyzer",
+                font=('Segoe UI', 12),
+                fg=self.colors['text_secondary'],
+                bg=self.colors['bg_primary']).pack()
+        
+    def create_main_content(self):
+        """Main content creation"""
+        main_frame = tk.Frame(self.window, bg=self.colors['bg_primary'])
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        # File selection section (FIRST)
+        self.create_file_selection(main_frame)
+        
+        # Action buttons section
+        self.create_action_buttons(main_frame)
+        
+        # Languages support info section
+        self.create_language_info(main_frame)
+        
+        # Results area
+        self.create_results_area(main_frame)
+        
+        self.mark_startup("interface ready")
+        
+        # Warm up heavy imports in the background now that the window is usable
+        self.window.after(200, self.prewarm_imports)
+        
+    def create_file_selection(self, parent):
+        """File selection section - NOW FIRST"""
+        file_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], relief=tk.RAISED, bd=1)
+        file_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        # Title and button in same row
+        header_frame = tk.Frame(file_frame, bg=self.colors['bg_secondary'])
+        header_frame.pack(fill=tk.X, padx=15, pady=10)
+        
+        tk.Label(header_frame,
+                text="📁 Step 1: Select Your Text File",
+                font=('Segoe UI', 14, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['bg_secondary']).pack(side=tk.LEFT)
+        
+        # Select file button
+        select_btn = tk.Button(header_frame,
+                              text="📂 Browse File",
+                              command=self.select_file,
+                              bg=self.colors['accent'],
+                              fg='white',
+                              font=('Segoe UI', 10, 'bold'),
+                              relief=tk.FLAT,
+                              bd=0,
+                              padx=15,
+                              pady=8,
+                              cursor='hand2')
+        select_btn.pack(side=tk.RIGHT)
+        
+        # Hover effects for button
+        select_btn.bind("<Enter>", lambda e: select_btn.config(bg=self.colors['accent_hover']))
+        select_btn.bind("<Leave>", lambda e: select_btn.config(bg=self.colors['accent']))
+        
+        # Stored results of earlier runs
+        runs_btn = tk.Button(header_frame,
+                             text="🗂️ Past Runs",
+                             command=self.show_past_runs,
+                             bg=self.colors['bg_primary'],
+                             fg='white',
+                             font=('Segoe UI', 10, 'bold'),
+                             relief=tk.FLAT,
+                             bd=0,
+                             padx=15,
+                             pady=8,
+                             cursor='hand2')
+        runs_btn.pack(side=tk.RIGHT, padx=(0, 8))
+        
+        # File display area
+        self.file_name_label = tk.Label(file_frame,
+                                      text="❌ No file selected yet",
+                                      font=('Segoe UI', 10),
+                                      fg=self.colors['text_secondary'],
+                                      bg=self.colors['bg_secondary'],
+                                      wraplength=800,
+                                      justify='left')
+        self.file_name_label.pack(anchor='w', padx=15, pady=(0, 15))
+
+    def create_action_buttons(self, parent):
+        """Modern action buttons creation - NO FILE SELECTION"""
+        button_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], relief=tk.RAISED, bd=1)
+        button_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        # Section title
+        tk.Label(button_frame,
+                text="📊 Step 2: Choose Your Analysis Type",
+                font=('Segoe UI', 14, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['bg_secondary']).pack(pady=(15, 10))
+        
+        # Button container
+        buttons_container = tk.Frame(button_frame, bg=self.colors['bg_secondary'])
+        buttons_container.pack(pady=(0, 15))
+        
+        # Button configuration with text icons
+        buttons_config = [
+            ("📝 Word Analysis", lambda: self.handle_analysis(1), "Complete word frequency analysis"),
+            ("🏷️ Noun Analysis", lambda: self.handle_analysis(2), "Common noun extraction"),
+            ("👥 Person Names", lambda: self.handle_analysis(3), "Person name recognition"),
+            ("🌍 Location Names", lambda: self.handle_analysis(4), "Location identification"),
+            ("🔤 Lemmatization", lambda: self.handle_analysis(5), "Lemmatized word analysis"),
+            ("🎯 Pattern Extraction", lambda: self.show_pattern_selector(), "Custom lexical-syntactic patterns"),
+            ("🔗 Collocations", lambda: self.handle_analysis(7), "PMI, log-likelihood and t-score of word pairs"),
+            ("📚 Corpus Matrix", lambda: self.show_corpus_matrix_dialog(), "Document x term matrix over many files")
+        ]
+        
+        for i, (text, command, tooltip) in enumerate(buttons_config):
+            btn = tk.Button(buttons_container,
+                          text=text,
+                          command=command,
+                          bg=self.colors['accent'],
+                          fg='white',
+                          font=('Segoe UI', 10, 'bold'),
+                          relief=tk.FLAT,
+                          bd=0,
+                          padx=15,
+                          pady=10,
+                          cursor='hand2')
+            
+            # Hover effect
+            btn.bind("<Enter>", lambda e, b=btn: b.config(bg=self.colors['accent_hover']))
+            btn.bind("<Leave>", lambda e, b=btn: b.config(bg=self.colors['accent']))
+            
+            # Grid positioning 4x2
+            row, col = i // 4, i % 4
+            btn.grid(row=row, column=col, padx=6, pady=5, sticky='ew')
+            
+        # Column weight configuration
+        for i in range(4):
+            buttons_container.grid_columnconfigure(i, weight=1)
+    
+    def create_language_info(self, parent):
+        """Language support information section"""
+        lang_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], relief=tk.RAISED, bd=1)
+        lang_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        tk.Label(lang_frame,
+                text="🌍 Supported Languages",
+                font=('Segoe UI', 12, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['bg_secondary']).pack(anchor='w', padx=15, pady=(10, 5))
+        
+        # Language list with flags - more compact display
+        languages = ["   🇺🇸 English", "🇬🇷 Modern Greek", "🏛️ Ancient Greek (models auto-installed when needed)"]
+        
+        # Create compact language display
+        lang_text = "  • " + "   • ".join(languages)
+        
+        lang_display = tk.Label(lang_frame,
+                               text=lang_text,
+                               font=('Segoe UI', 9),
+                               fg=self.colors['text_secondary'],
+                               bg=self.colors['bg_secondary'],
+                               wraplength=850,
+                               justify='left')
+        lang_display.pack(anchor='w', padx=15, pady=(0, 5))
+        
+        # Installation note
+        note_label = tk.Label(lang_frame,
+                             text="💡 spaCy for modern languages, Stanza for Ancient Greek (models auto-installed when needed)",
+                             font=('Segoe UI', 8),
+                             fg=self.colors['text_secondary'],
+                             bg=self.colors['bg_secondary'],
+                             wraplength=750)
+        note_label.pack(anchor='w', padx=15, pady=(0, 10))
+        
+    def create_results_area(self, parent):
+        """Results display area with modern style"""
+        results_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], relief=tk.RAISED, bd=1)
+        results_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Results area header with progress bar
+        header = tk.Frame(results_frame, bg=self.colors['bg_secondary'])
+        header.pack(fill=tk.X, padx=15, pady=(15, 10))
+        
+        # Title
+        self.results_title = tk.Label(header,
+                text="📊 Analysis Results",
+                font=('Segoe UI', 12, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['bg_secondary'])
+        self.results_title.pack(side=tk.LEFT)
+        
+        # Progress bar for analysis
+        self.results_progress = ttk.Progressbar(header, mode='determinate', length=200)
+        self.results_progress.pack(side=tk.RIGHT, padx=(10, 0))
+        
+        # Progress label
+        self.progress_label = tk.Label(header,
+                                     text="0%",
+                                     font=('Segoe UI', 9),
+                                     fg=self.colors['text_secondary'],
+                                     bg=self.colors['bg_secondary'],
+                                     width=5)
+        self.progress_label.pack(side=tk.RIGHT)
+        
+        # Text area with modern style
+        text_frame = tk.Frame(results_frame, bg=self.colors['border'], bd=2)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 15))
+        
+        self.text_area = ScrolledText(text_frame,
+                                    wrap=tk.WORD,
+                                    font=('Consolas', 11),
+                                    bg='#ffffff',
+                                    fg='#1f2937',
+                                    selectbackground=self.colors['accent'],
+                                    selectforeground='white',
+                                    borderwidth=0,
+                                    padx=15,
+                                    pady=10)
+        self.text_area.pack(fill=tk.BOTH, expand=True)
+        self.text_area.bind("<Double-Button-1>", self.on_result_double_click)
+        
+        # Initial message
+        self.text_area.insert(tk.END, 
+                             "🚀 Welcome to TALOS Advanced Text Analyzer!\n\n"
+                             "📁 Step 1: Select a text file using the 'Browse File' button above\n"
+                             "📊 Step 2: Choose an analysis type\n"
+                             "💾 Step 3: Export results to Excel\n\n"
+                             "💡 Tips:\n"
+                             "• 'Person Names' and 'Location Names' use AI processing\n"
+                             "• 'Lemmatization' provides base word forms\n"
+                             "• 'Pattern Extraction' finds linguistic patterns like [adj][noun]\n"
+                             "• Language is automatically detected for each file\n"
+                             "• First AI analysis may take a few seconds to load\n"
+                             "• Ancient Greek uses Stanza NLP, other languages use spaCy\n"
+                             "• Double-click a result row to see its occurrences in context\n"
+                             "• Supported formats: .txt files (also .gz/.bz2/.xz, legacy Greek encodings)\n\n"
+                             "📂 Select a file to get started!")
+        
+        # Make text area read-only initially
+        self.text_area.config(state=tk.DISABLED)
+    
+    def create_status_bar(self):
+        """Modern status bar"""
+        self.status_frame = tk.Frame(self.window, bg=self.colors['bg_secondary'], height=30)
+        self.status_frame.pack(fill=tk.X, side=tk.BOTTOM)
+        self.status_frame.pack_propagate(False)
+        
+        self.status_label = tk.Label(self.status_frame,
+                                   text="Ready - Please select a file",
+                                   font=('Segoe UI', 9),
+                                   fg=self.colors['text_secondary'],
+                                   bg=self.colors['bg_secondary'])
+        self.status_label.pack(side=tk.LEFT, padx=15, pady=6)
+        
+        # Progress bar
+        self.progress = ttk.Progressbar(self.status_frame, mode='indeterminate', length=100)
+        self.progress.pack(side=tk.RIGHT, padx=15, pady=6)
+        
+    def update_status(self, message, color=None):
+        """Update status bar (from any thread: Tk is only touched on the main thread)"""
+        if self.window is None:
+            return
+        if threading.current_thread() is not threading.main_thread():
+            self.window.after(0, lambda: self.update_status(message, color))
+            return
+        if color is None:
+            color = self.colors['text_secondary']
+        self.status_label.config(text=message, fg=color)
+        self.window.update_idletasks()
+        
+    def update_results_progress(self, value, max_value=100):
+        """Update the progress bar in the results area"""
+        if self.window is None:
+            return
+        if value > max_value:
+            value = max_value
+            
+        percentage = int((value / max_value) * 100)
+        self.results_progress['value'] = percentage
+        self.progress_label.config(text=f"{percentage}%")
+        self.window.update_idletasks()
+        
+    def reset_results_progress(self):
+        """Reset the progress bar in the results area"""
+        self.results_progress['value'] = 0
+        self.progress_label.config(text="0%")
+        
+    def start_progress(self):
+        """Start indeterminate progress bar"""
+        self.progress.start(10)
+        
+    def stop_progress(self):
+        """Stop progress bar"""
+        self.progress.stop()
+        
+    def center_window(self, width, height):
+        """Center window on screen"""
+        screen_width = self.window.winfo_screenwidth()
+        screen_height = self.window.winfo_screenheight()
+        x = (screen_width - width) // 2
+        y = (screen_height - height) // 2
+        self.window.geometry(f"{width}x{height}+{x}+{y}")
+        
+    def select_file(self):
+        """File selection with validation and content loading"""
+        file = filedialog.askopenfilename(
+            filetypes=TEXT_FILETYPES,
+            title="Select a text file"
+        )
+        
+        if file:
+            # File validation
+            if not os.path.exists(file):
+                messagebox.showerror("Error", "The selected file does not exist.")
+                return False
+                
+            file_size = os.path.getsize(file)
+            text_size = text_size_hint(file)  # Decompressed size for .gz/.bz2/.xz
+            fits, estimate, limit = self.memory_governor.check_file(text_size)
+            if not fits:
+                if not messagebox.askyesno("Large File", 
+                                         f"Text size is {text_size//1024//1024}MB. Loading it needs about "
+                                         f"{format_bytes(estimate)}, over the memory budget of {format_bytes(limit)}. "
+                                         "Continue?"):
+                    return False
+            
+            # Show the head of the file at once; the full read, statistics and language segments
+            # follow in the background and update the header and preview when they arrive
+            try:
+                self.update_status("Loading file and detecting language...", self.colors['accent'])
+                head, encoding, compression = read_text_head(file, FileProfile.SAMPLE_CHARS)
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not read file: {str(e)}")
+                return False
+            
+            self.load_generation += 1
+            generation = self.load_generation
+            self.file_loading = True
+            cached = self.cached_profile(file)  # Statistics are known at once for a file seen before
+            profile = cached[1] if cached else None
+            if profile is not None and profile.language is not None:
+                language = profile.language
+            else:
+                language = self.detect_language(head)
+            self.load_parsed("", language)  # Release the previous file
+            self.selected_file = file
+            self.file_encoding, self.file_compression = encoding, compression
+            self.show_file_info(file, file_size, profile)
+            self.display_file_preview(head)
+            self.start_progress()
+            
+            def load():
+                # Loading stages are kept and reported with each analysis of this file. Runs beside
+                # the Tk thread: engine state and the profile cache are only changed in finish()
+                trace = RunTrace("load")
+                try:
+                    with trace.stage("read_file"):
+                        text, profile, key = self.read_file(file, cached)
+                    language = profile.language
+                    if language is None:
+                        with trace.stage("detect_language"):
+                            language = self.detect_language(profile.sample)
+                    with trace.stage("detect_segments"):
+                        segments = self.detect_segment_languages(text, language)
+                except Exception as e:
+                    error = str(e)
+                    self.window.after(0, lambda: finish_error(error))
+                    return
+                self.window.after(0, lambda: finish(text, profile, key, language, segments, trace))
+            
+            def finish(text, profile, key, language, segments, trace):
+                if generation != self.load_generation:
+                    return  # Another file was selected meanwhile
+                self.file_loading = False
+                profile.language = language
+                self.remember_profile(key, profile)
+                self.load_text(text, file, profile, segments)
+                self.load_events = trace.events
+                self.file_encoding, self.file_compression = profile.encoding, profile.compression
+                self.show_file_info(file, file_size, profile)
+                self.display_file_preview()
+                self.update_status(f"File loaded: {Path(file).name} ({self.detected_language})", self.colors['success'])
+                self.stop_progress()
+                if "Ancient Greek" in self.language_groups():
+                    self.prewarm_imports(('stanza',))
+            
+            def finish_error(error):
+                if generation != self.load_generation:
+                    return
+                self.file_loading = False
+                self.selected_file = None
+                self.stop_progress()
+                messagebox.showerror("Error", f"Could not read file: {error}")
+            
+            threading.Thread(target=load, daemon=True).start()
+            return True
+        return False
+    
+    def show_file_info(self, file, file_size, profile=None):
+        """File panel text: name, folder, language, size, word count (once the profile is known) and encoding"""
+        file_path = Path(file)
+        language_flag = self.get_language_flag(self.detected_language)
+        file_size_mb = file_size / (1024 * 1024)
+        words = f"{profile.words:,}" if profile is not None else "counting..."
+        
+        display_text = (
+            f"✅ {file_path.name}\n"
+            f"   📂 {file_path.parent}\n"
+            f"   🌍 Language: {language_flag} {self.detected_language}\n"
+            f"   📄 Size: {file_size_mb:.1f} MB | Words: {words}\n"
+            f"   🔤 Encoding: {self.file_encoding}" + (f" ({self.file_compression})" if self.file_compression else "")
+        )
+        self.file_name_label.config(text=display_text, fg=self.colors['success'])
+    
+    @staticmethod
+    def profile_key(path):
+        """Profile cache key of path: absolute path, modification time and size"""
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+    
+    def cached_profile(self, path):
+        """(key, FileProfile) of path from the profile cache (None if the file changed or was not read).
+        Like remember_profile, for the Tk thread only."""
+        key = self.profile_key(path)
+        profile = self.file_profiles.get(key)
+        if profile is None:
+            return None
+        self.file_profiles.move_to_end(key)
+        return key, profile
+    
+    def remember_profile(self, key, profile):
+        """Put profile in the profile cache, evicting the least recently used beyond FILE_PROFILES"""
+        self.file_profiles[key] = profile
+        self.file_profiles.move_to_end(key)
+        if len(self.file_profiles) > self.FILE_PROFILES:
+            self.file_profiles.popitem(last=False)
+    
+    def read_file(self, path, cached=None):
+        """Read path with read_text_file, profiling it on the way unless cached (a cached_profile
+        result) is still current. Leaves the profile cache alone, so it may run in any thread.
+        Returns (text, FileProfile, profile cache key)."""
+        key = self.profile_key(path)
+        if cached is not None and cached[0] == key:
+            return read_text_file(path)[0], cached[1], key
+        profile = FileProfile()
+        text, profile.encoding, profile.compression = read_text_file(path, profile)
+        return text, profile, key
+    
+    def load_text(self, text, path=None, profile=None, segments=None):
+        """Make text the current document and detect its language(s). A FileProfile of the text
+        supplies its hash and, once detected, its language; segments, if given, are its
+        language segments as detected already."""
+        self.file_content = text
+        self.file_profile = profile
+        self.file_hash = profile.content_hash if profile is not None else None
+        self.annotations = self.concordance = self.word_positions = None
+        with self.stage("detect_language"):
+            if profile is None or profile.language is None:
+                self.detected_language = self.detect_language(text[:FileProfile.SAMPLE_CHARS])
+                if profile is not None:
+                    profile.language = self.detected_language
+            else:
+                self.detected_language = profile.language
+        if segments is None:
+            with self.stage("detect_segments"):
+                segments = self.detect_segment_languages(text)
+        self.language_segments = segments
+        self.selected_file = path
+    
+    def load_parsed(self, text, language, tables=None):
+        """Make an already parsed single-language text the current document (no detection)"""
+        self.file_content = text
+        self.detected_language = language
+        self.language_segments = [[language, 0, len(text)]]
+        self.annotations = tables
+        self.concordance = self.word_positions = self.file_hash = self.file_profile = None
+        self.selected_file = None
+    
+    def get_language_flag(self, language):
+        """Get flag emoji for language"""
+        flags = {
+            'English': '🇺🇸', 'French': '🇫🇷', 'Spanish': '🇪🇸', 'German': '🇩🇪',
+            'Italian': '🇮🇹', 'Portuguese': '🇵🇹', 'Dutch': '🇳🇱', 'Russian': '🇷🇺',
+            'Chinese': '🇨🇳', 'Japanese': '🇯🇵', 'Korean': '🇰🇷', 'Arabic': '🇸🇦',
+            'Modern Greek': '🇬🇷', 'Ancient Greek': '🏛️'
+        }
+        return flags.get(language, '🏳️')
+        
+    def handle_analysis(self, option):
+        """Main handler for analyses - NO FILE SELECTION"""
+        # Check if file is loaded
+        if self.file_loading:
+            messagebox.showinfo("Loading", "⏳ The file is still loading; its statistics appear when it is ready.")
+            return
+        if not self.selected_file or not self.file_content:
+            messagebox.showwarning("No File Selected", 
+                                 "⚠️ Please select a text file first using the 'Browse File' button!")
+            return
+            
+        # Analysis configuration
+        analysis_config = {
+            1: ("words", "📝 Word Analysis"),
+            2: ("nouns", "🏷️ Noun Analysis"),
+            3: ("persons", "👥 Person Analysis"),
+            4: ("locations", "🌍 Location Analysis"),
+            5: ("lemmas", "🔤 Lemmatization Analysis"),
+            6: ("patterns", "🎯 Pattern Extraction"),
+            7: ("collocations", "🔗 Collocation Analysis")
+        }
+        
+        if option not in analysis_config:
+            return
+            
+        export_name, title = analysis_config[option]
+        if self.cached_result(title, export_name):
+            return
+        result_key = self.result_key(export_name)
+        analyze_func = self.analysis_function(export_name)
+        
+        # Progress display
+        self.update_status(f"Analysis in progress...", self.colors['accent'])
+        self.start_progress()
+        self.reset_results_progress()
+        self.text_area.config(state=tk.NORMAL)
+        self.text_area.delete(1.0, tk.END)
+        self.text_area.insert(tk.END, f"{title}\n{'='*50}\n\n⏳ Processing...")
+        self.text_area.config(state=tk.DISABLED)
+        self.window.update_idletasks()
+        
+        self.begin_run(export_name)
+        
+        # Background analysis with timeout check
+        def run_analysis():
+            try:
+                with self.stage("analysis"), PeakMemorySampler(0.05) as memory:
+                    result = analyze_func()
+                self.peak_rss = self.peak_rss or memory.peak  # Set by the NLP worker when it ran the analysis
+                if result:
+                    if self.result_cache is not None:
+                        self.result_cache.put(result_key, result)
+                    self.window.after(0, lambda: self.display_results(title, result, export_name))
+                else:
+                    self.window.after(0, lambda: self.update_status("Analysis completed (no results)", self.colors['warning']))
+            except Exception as e:
+                self.window.after(0, lambda: messagebox.showerror("Error", f"Analysis error: {str(e)}"))
+            finally:
+                self.window.after(0, self.stop_progress)
+                self.window.after(0, lambda: self.update_results_progress(100))
+                
+        # Start analysis thread with timeout monitor
+        analysis_thread = threading.Thread(target=run_analysis, daemon=True)
+        analysis_thread.start()
+        
+        # Monitor thread completion
+        self.monitor_analysis_thread(analysis_thread, title)
+
+    def monitor_analysis_thread(self, thread, title, timeout=300):
+        """Monitor analysis thread with timeout"""
+        start_time = time.time()
+        
+        def check_thread():
+            if thread.is_alive():
+                elapsed = time.time() - start_time
+                if elapsed < timeout:
+                    # Update progress based on elapsed time
+                    progress = min(90, int((elapsed / timeout) * 90))  # Cap at 90% until completion
+                    self.update_results_progress(progress)
+                    
                     # Thread still running, check again in 500ms
                     self.window.after(500, check_thread)
                 else:
@@ -761,232 +2652,524 @@ class TextAnalyzer:
         
         check_thread()
 
+    def analysis_function(self, name, pattern=None):
+        """Analysis callable by name: words, nouns, persons, locations, lemmas, patterns,
+        collocations or custom"""
+        if self.backend_url:
+            return lambda: self.remote_analysis(name, pattern)
+        if self.nlp_worker is not None:
+            return lambda: self.worker_analysis(name, pattern)
+        
+        functions = {
+            "words": self.analyze_words,
+            "nouns": self.analyze_nouns,
+            "persons": lambda: self.analyze_entities("PERSON"),
+            "locations": lambda: self.analyze_entities("GPE"),
+            "lemmas": self.analyze_lemmas,
+            "patterns": self.analyze_patterns,
+            "collocations": self.analyze_collocations,
+            "custom": lambda: self.analyze_custom_patterns(pattern)
+        }
+        return functions[name]
+
+    def worker_analysis(self, name, pattern=None):
+        """Run an analysis in the NLP worker process; its stage timings, peak memory and plan
+        become those of the current run"""
+        reply = self.nlp_worker.analyze(self, name, pattern, self.post_progress)
+        if self.trace is not None:
+            self.trace.add_events(reply["events"])
+        self.peak_rss = reply["peak_rss"]
+        self.memory_plan = reply["memory_plan"]
+        self.cache_run = reply["cache_run"]
+        self.checkpoint_run = reply["checkpoint_run"]
+        self.run_models = reply["models"]
+        return result_from_json(reply["result"], self.vocab) if reply["result"] else {}
+
+    def remote_analysis(self, name, pattern=None):
+        """Run an analysis on the analysis service at backend_url (see --serve)"""
+        import urllib.error
+        import urllib.request
+        
+        from urllib.parse import urlsplit
+        
+        request = {"pattern": pattern, "segment_routing": self.segment_routing}
+        if (self.selected_file and os.path.exists(self.selected_file) and
+                is_loopback(urlsplit(self.backend_url).hostname)):
+            request["path"] = os.path.abspath(self.selected_file)  # The service runs on this machine
+        else:
+            request["text"] = self.file_content
+            
+        url = f"{self.backend_url.rstrip('/')}/analyze/{name}"
+        try:
+            http_request = urllib.request.Request(url, data=json.dumps(request).encode('utf-8'),
+                                                  headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(http_request, timeout=300) as response:
+                data = json.load(response)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.load(e).get("error", str(e))
+            except ValueError:
+                message = str(e)
+            self.show_error("Service Error", f"Analysis service error: {message}")
+            return {}
+        except (urllib.error.URLError, OSError) as e:
+            self.show_error("Service Error", f"Analysis service at {self.backend_url} is not reachable: {e}")
+            return {}
+        
+        return result_from_json(data, self.vocab)
+
+    WORD_RE = re.compile(r'\b[a-zA-ZÀ-ÿα-ωΑ-Ωά-ώ]+\b')
+    # The same words found in text that is not lowercased (lowercasing may change its length)
+    WORD_CASELESS_RE = re.compile(WORD_RE.pattern, re.IGNORECASE)
+
     def analyze_words(self):
         """Enhanced word analysis"""
         try:
-            content = self.file_content.lower()
-            # Enhanced cleaning
-            words = re.findall(r'\b[a-zA-ZÀ-ÿα-ωΑ-Ωά-ώ]+\b', content)
-            words = [word for word in words if len(word) > 2]  # Filter short words
+            by_language = {}
+            for language, spans in self.language_groups().items():
+                words = Counter()
+                for start, end in spans:
+                    content = self.file_content[start:end].lower()
+                    # Enhanced cleaning
+                    words.update(word for word in self.WORD_RE.findall(content)
+                                 if len(word) > 2)  # Filter short words
+                by_language[language] = words
             
-            return Counter(words)
+            return self.merge_results(by_language)
         except Exception as e:
-            messagebox.showerror("Error", f"Word analysis error: {e}")
+            self.show_error("Error", f"Word analysis error: {e}")
             return {}
 
+    # Default pattern templates (up to 5 positions)
+    PATTERN_TEMPLATES = [
+        # 2-word patterns
+        ["ADJ", "NOUN"],           # beautiful house
+        ["NOUN", "NOUN"],          # computer science
+        ["VERB", "NOUN"],          # read book
+        
+        # 3-word patterns
+        ["ADJ", "ADJ", "NOUN"],    # big red car
+        ["NOUN", "ADP", "NOUN"],   # book of poems
+        ["DET", "ADJ", "NOUN"],    # the blue sky
+        
+        # 4-word patterns
+        ["DET", 'ADJ', 'ADJ', 'NOUN'],      # the big red car
+        ['NOUN', 'ADP', 'DET', 'NOUN'],     # book of the author
+    ]
+
     def analyze_patterns(self):
         """Default pattern extraction for backward compatibility"""
-        if not self.lazy_load_nlp(self.detected_language):
+        tables = self.annotate()
+        if not tables:
             return {}
             
         try:
-            doc = self.get_nlp_doc(self.file_content, self.detected_language)
-            if doc is None:
-                return {}
-                
-            patterns = []
-            
-            # Define common pattern templates (up to 5 positions)
-            pattern_templates = [
-                # 2-word patterns
-                ["ADJ", "NOUN"],           # beautiful house
-                ["NOUN", "NOUN"],          # computer science
-                ["VERB", "NOUN"],          # read book
+            templates = [[self.vocab.add(pos) for pos in template] for template in self.PATTERN_TEMPLATES]
+            by_language = {}
+            
+            for table in tables:
+                patterns = by_language.setdefault(table.language, Counter())
                 
-                # 3-word patterns
-                ["ADJ", "ADJ", "NOUN"],    # big red car
-                ["NOUN", "ADP", "NOUN"],   # book of poems
-                ["DET", "ADJ", "NOUN"],    # the blue sky
+                # Extract patterns from text as parallel POS ID / word ID sequences
+                pos_ids, word_ids, _ = self.pattern_sequences(table)
+                total_tokens = len(pos_ids)
                 
-                # 4-word patterns
-                ["DET", 'ADJ', 'ADJ', 'NOUN'],      # the big red car
-                ['NOUN', 'ADP', 'DET', 'NOUN'],     # book of the author
-            ]
+                for template_ids in templates:
+                    pattern_length = len(template_ids)
+                    pos_key = tuple(template_ids)
+                    first_pos = template_ids[0]
+                    
+                    for i in range(total_tokens - pattern_length + 1):
+                        if pos_ids[i] == first_pos and pos_ids[i:i + pattern_length] == template_ids:
+                            # Store as (POS IDs, word IDs)
+                            patterns[(pos_key, tuple(word_ids[i:i + pattern_length]))] += 1
             
-            # Extract patterns from text
-            if self.detected_language == "Ancient Greek":
-                # For Stanza, adapt token access logic
-                tokens = [word for sent in doc.sentences for word in sent.words if word.text.isalpha()]
-            else:
-                # For spaCy, standard logic
-                tokens = [token for token in doc if not token.is_space and token.is_alpha]
+            return self.merge_results(by_language, PatternCounter(vocab=self.vocab))
+            
+        except Exception as e:
+            self.show_error("Error", f"Pattern extraction error: {e}")
+            return {}
+
+    # Candidate pairs for collocation scoring: first word vs the rest of the n-gram
+    COLLOCATION_TEMPLATES = [["ADJ", "NOUN"], ["NOUN", "ADP", "NOUN"]]
+    COLLOCATION_MIN_COUNT = 2
+
+    def analyze_collocations(self):
+        """Collocation strength (PMI, log-likelihood, t-score) of ADJ NOUN and NOUN ADP NOUN
+        n-grams, counted and scored in bulk over integer ID arrays"""
+        tables = self.annotate()
+        if not tables:
+            return {}
+        
+        try:
+            import numpy as np
+        except ImportError:
+            self.show_error("Error", "Collocation analysis requires numpy.\nRun: pip install numpy")
+            return {}
             
-            total_tokens = len(tokens)
+        try:
+            templates = [[self.vocab.add(pos) for pos in template] for template in self.COLLOCATION_TEMPLATES]
+            language_tables = {}
+            for table in tables:
+                language_tables.setdefault(table.language, []).append(table)
             
-            for template_idx, template in enumerate(pattern_templates):
-                pattern_length = len(template)
+            by_language, scores = {}, {}
+            for language, group in language_tables.items():
+                # Alphabetic tokens of all tables, with a -1 separator so n-grams never span tables
+                pos_parts, word_parts = [], []
+                for table in group:
+                    alpha = (np.frombuffer(table.flags, dtype=np.uint8) & TokenTable.ALPHA).astype(bool)
+                    pos_parts += [np.frombuffer(table.pos, dtype=np.intc)[alpha], [-1]]
+                    word_parts += [np.frombuffer(table.lower, dtype=np.intc)[alpha], [-1]]
+                pos_ids = np.concatenate(pos_parts)
+                word_ids = np.concatenate(word_parts)
+                collocations = by_language[language] = Counter()
                 
-                for i in range(len(tokens) - pattern_length + 1):
-                    token_sequence = tokens[i:i + pattern_length]
+                for template in templates:
+                    n = len(template)
+                    span = len(pos_ids) - n + 1
+                    if span <= 0:
+                        continue
+                    match = np.ones(span, dtype=bool)
+                    for j, pos_id in enumerate(template):
+                        match &= pos_ids[j:j + span] == pos_id
+                    starts = np.flatnonzero(match)
+                    if not len(starts):
+                        continue
                     
-                    if self.detected_language == "Ancient Greek":
-                        # For Stanza
-                        pos_sequence = [token.upos for token in token_sequence]
-                        words = [token.text.lower() for token in token_sequence]
-                    else:
-                        # For spaCy
-                        pos_sequence = [token.pos_ for token in token_sequence]
-                        words = [token.text.lower() for token in token_sequence]
-                    
-                    if pos_sequence == template:
-                        # Create pattern string
-                        pos_pattern = "_".join(template)
-                        word_pattern = " ".join(words)
-                        
-                        # Store as "POS_PATTERN: word pattern"
-                        pattern_string = f"[{pos_pattern}]: {word_pattern}"
-                        patterns.append(pattern_string)
+                    # Rows of word IDs; the pair is (first word, remaining words as one unit)
+                    grams = np.stack([word_ids[starts + j] for j in range(n)], axis=1)
+                    _, left = np.unique(grams[:, 0], return_inverse=True)
+                    _, right = np.unique(grams[:, 1:], axis=0, return_inverse=True)
+                    left, right = left.reshape(-1), right.reshape(-1)
+                    pair_codes = left.astype(np.int64) * (int(right.max()) + 1) + right
+                    _, first, o11 = np.unique(pair_codes, return_index=True, return_counts=True)
+                    r1 = np.bincount(left)[left[first]]
+                    c1 = np.bincount(right)[right[first]]
+                    pmi, log_likelihood, t_score = association_scores(o11, r1, c1, len(starts))
                     
-                    # Update progress periodically
-                    if i % 100 == 0:
-                        progress = ((template_idx * total_tokens) + i) / (len(pattern_templates) * total_tokens) * 100
-                        self.window.after(0, lambda p=progress: self.update_results_progress(p))
+                    pos_key = tuple(template)
+                    for i in np.flatnonzero(o11 >= self.COLLOCATION_MIN_COUNT):
+                        key = (pos_key, tuple(grams[first[i]].tolist()))
+                        collocations[key] = int(o11[i])
+                        scores[key] = (float(pmi[i]), float(log_likelihood[i]), float(t_score[i]))
             
-            return Counter(patterns)
+            return self.merge_results(by_language, CollocationResult(vocab=self.vocab, scores=scores))
             
         except Exception as e:
-            messagebox.showerror("Error", f"Pattern extraction error: {e}")
+            self.show_error("Error", f"Collocation analysis error: {e}")
             return {}
 
+    def pattern_sequences(self, table, lemmas=False):
+        """POS ID, lowercase word ID and lemma ID sequences of the alphabetic tokens of a table
+        (lemma IDs only if lemmas is set, otherwise -1 for every token)"""
+        alpha = TokenTable.ALPHA
+        keep = [i for i, flags in enumerate(table.flags) if flags & alpha]
+        pos, lower, lemma = table.pos, table.lower, table.lemma
+        lemma_ids = [lemma[i] for i in keep] if lemmas else [-1] * len(keep)
+        return [pos[i] for i in keep], [lower[i] for i in keep], lemma_ids
+
     def analyze_nouns(self):
         """Noun analysis with lazy loading"""
-        if not self.lazy_load_nlp(self.detected_language):
+        tables = self.annotate()
+        if not tables:
             return {}
             
         try:
-            doc = self.get_nlp_doc(self.file_content, self.detected_language)
-            if doc is None:
-                return {}
-            
-            nouns = []
-            
-            if self.detected_language == "Ancient Greek":
-                # For Stanza
-                total_sents = len(doc.sentences)
-                for sent_idx, sent in enumerate(doc.sentences):
-                    for word in sent.words:
-                        if word.upos == "NOUN" and len(word.text) > 2 and word.text.isalpha():
-                            nouns.append(word.text.lower())
-                    
-                    # Update progress
-                    progress = (sent_idx / total_sents) * 100
-                    self.window.after(0, lambda p=progress: self.update_results_progress(p))
-            else:
-                # For spaCy
-                nouns = [token.text.lower() for token in doc 
-                        if token.pos_ == "NOUN" and len(token.text) > 2 and token.is_alpha]
+            strings = self.vocab.strings
+            noun = self.vocab.add("NOUN")
+            alpha = TokenTable.ALPHA
+            by_language = {}
+            
+            for table in tables:
+                noun_ids = Counter(lower for pos, lower, flags in zip(table.pos, table.lower, table.flags)
+                                   if pos == noun and flags & alpha)
+                nouns = by_language.setdefault(table.language, Counter())
+                for lower, count in noun_ids.items():
+                    if len(strings[lower]) > 2:
+                        nouns[strings[lower]] += count
             
-            return Counter(nouns)
+            return self.merge_results(by_language)
         except Exception as e:
-            messagebox.showerror("Error", f"Noun analysis error: {e}")
+            self.show_error("Error", f"Noun analysis error: {e}")
             return {}
 
     def analyze_entities(self, entity_type):
         """Optimized named entity analysis with progress feedback"""
-        if not self.lazy_load_nlp(self.detected_language):
+        tables = self.annotate()
+        if not tables:
             return {}
             
         try:
-            doc = self.get_nlp_doc(self.file_content, self.detected_language)
-            if doc is None:
-                return {}
+            start_time = time.time()
+            strings = self.vocab.strings
+            label = self.vocab.add(entity_type)
+            name_tags = {self.vocab.add("PROPN"), self.vocab.add("NOUN")}
+            by_language = {}
+            
+            for table in tables:
+                entities = by_language.setdefault(table.language, Counter())
+                
+                if table.engine == 'stanza':
+                    # Ancient Greek: capitalised proper nouns and nouns
+                    for form, pos in zip(table.form, table.pos):
+                        if pos in name_tags:
+                            text = strings[form]
+                            if text[0].isupper() and len(text) > 2:
+                                entities[text] += 1
+                else:
+                    # Modern languages: spaCy named entities
+                    for start, end, entity_label in table.entity_spans():
+                        if entity_label == label:
+                            entities[table.span_text(start, end, strings)] += 1
             
-            entities = []
-            processed_chars = 0
-            total_chars = len(self.file_content)
+            # Final update to show completion
+            elapsed = time.time() - start_time
             
-            def update_progress():
-                progress = min(100, int(processed_chars / total_chars * 100))
+            def show_completion():
                 self.text_area.config(state=tk.NORMAL)
                 self.text_area.delete("end-2l", "end-1l")
-                self.text_area.insert(tk.END, f"\n⏳ Processing... {progress}%")
+                self.text_area.insert(tk.END, f"\n⏳ Processing... 100% ({elapsed:.1f}s)")
                 self.text_area.see(tk.END)
                 self.text_area.config(state=tk.DISABLED)
-                self.update_results_progress(progress)
-                self.window.update()
+                self.update_results_progress(100)
             
-            start_time = time.time()
+            if self.window is not None:
+                self.window.after(0, show_completion)
             
-            if self.detected_language == "Ancient Greek":
-                # Ancient Greek processing with stanza
-                total_sents = len(doc.sentences)
-                for sent_idx, sent in enumerate(doc.sentences):
-                    for word in sent.words:
-                        if (word.text[0].isupper() and len(word.text) > 2 and 
-                            word.upos in ["PROPN", "NOUN"]):
-                            entities.append(word.text)
-                            
-                    processed_chars += len(sent.text)
-                    
-                    # Update progress
-                    progress = (sent_idx / total_sents) * 100
-                    self.window.after(0, lambda p=progress: self.update_results_progress(p))
-            else:
-                # Modern language processing with spaCy
-                total_ents = len(doc.ents)
-                for i, ent in enumerate(doc.ents):
-                    if ent.label_ == entity_type:
-                        entities.append(ent.text)
-                    
-                    processed_chars = ent.end_char
-                    
-                    # Update progress periodically
-                    if i % 10 == 0:
-                        progress = (i / total_ents) * 100
-                        self.window.after(0, lambda p=progress: self.update_results_progress(p))
+            return self.merge_results(by_language)
             
-            # Final update to show completion
-            self.text_area.config(state=tk.NORMAL)
-            self.text_area.delete("end-2l", "end-1l")
-            self.text_area.insert(tk.END, f"\n⏳ Processing... 100% ({(time.time()-start_time):.1f}s)")
-            self.text_area.see(tk.END)
-            self.text_area.config(state=tk.DISABLED)
-            self.update_results_progress(100)
-            self.window.update()
+        except Exception as e:
+            self.show_error("Error", f"Entity analysis error: {e}")
+            return {}
+
+    def analyze_lemmas(self):
+        """Lemmatization analysis"""
+        tables = self.annotate()
+        if not tables:
+            return {}
+            
+        try:
+            strings = self.vocab.strings
+            alpha, stop = TokenTable.ALPHA, TokenTable.STOP
+            by_language = {}
             
-            return Counter(entities)
+            for table in tables:
+                lemmas = by_language.setdefault(table.language, Counter())
+                
+                if table.engine == 'stanza':
+                    # For Stanza: keep lemmas that differ from the word form
+                    for form, lemma, flags in zip(table.form, table.lemma, table.flags):
+                        if flags & alpha:
+                            text, lemma_text = strings[form], strings[lemma]
+                            if len(text) > 2 and lemma_text and lemma_text.lower() != text.lower():
+                                lemmas[lemma_text.lower()] += 1
+                else:
+                    # For spaCy: skip stop words
+                    lemma_ids = Counter(lemma for form, lemma, flags in zip(table.form, table.lemma, table.flags)
+                                        if flags & alpha and not flags & stop and len(strings[form]) > 2)
+                    for lemma, count in lemma_ids.items():
+                        lemmas[strings[lemma].lower()] += count
             
+            return self.merge_results(by_language)
         except Exception as e:
-            messagebox.showerror("Error", f"Entity analysis error: {e}")
+            self.show_error("Error", f"Lemmatization error: {e}")
             return {}
 
-    def analyze_lemmas(self):
-        """Lemmatization analysis"""
-        if not self.lazy_load_nlp(self.detected_language):
-            return {}
-            
+    def headless_copy(self):
+        """Headless engine sharing this engine's loaded models and settings. It has its own vocabulary
+        and annotation cache: neither is thread-safe, and GUI analyses may run alongside it."""
+        engine = TextAnalyzer(headless=True)
+        engine.spacy_models = self.spacy_models
+        engine.stanza_nlp = self.stanza_nlp
+        engine.segment_routing = self.segment_routing
+        engine.memory_governor = self.memory_governor
+        engine.checkpoints = self.checkpoints
+        engine.token_stores = self.token_stores
+        engine.backend_url = self.backend_url
+        return engine
+
+    def show_corpus_matrix_dialog(self):
+        """Choose a feature and files, then build and save a document x term matrix"""
+        dialog = tk.Toplevel(self.window)
+        dialog.title("📚 Corpus Matrix")
+        dialog.geometry("420x330")
+        dialog.configure(bg=self.colors['bg_primary'])
+        dialog.grab_set()
+        dialog.transient(self.window)
+        
+        tk.Label(dialog,
+                text="📚 Document × Term Matrix",
+                font=('Segoe UI', 14, 'bold'),
+                fg=self.colors['accent'],
+                bg=self.colors['bg_primary']).pack(pady=(20, 5))
+        tk.Label(dialog,
+                text="One row per file, saved as .npz with vocabulary and document lists",
+                font=('Segoe UI', 9),
+                fg=self.colors['text_secondary'],
+                bg=self.colors['bg_primary']).pack(pady=(0, 15))
+        
+        dedupe_var = tk.BooleanVar(value=False)
+        feature_var = tk.StringVar(value="words")
+        for feature, label in (("words", "📝 Words"), ("lemmas", "🔤 Lemmas"), ("nouns", "🏷️ Nouns")):
+            tk.Radiobutton(dialog, text=label, variable=feature_var, value=feature,
+                           font=('Segoe UI', 10), fg=self.colors['text_primary'], bg=self.colors['bg_primary'],
+                           selectcolor=self.colors['bg_secondary'],
+                           activebackground=self.colors['bg_primary']).pack(anchor=tk.W, padx=120)
+        tk.Checkbutton(dialog, text="Analyse one file per near-duplicate cluster (MinHash)", variable=dedupe_var,
+                       font=('Segoe UI', 9), fg=self.colors['text_secondary'], bg=self.colors['bg_primary'],
+                       selectcolor=self.colors['bg_secondary'],
+                       activebackground=self.colors['bg_primary']).pack(pady=(10, 0))
+        
+        def choose_files():
+            feature = feature_var.get()
+            dedupe_threshold = 0.8 if dedupe_var.get() else None
+            dialog.destroy()
+            paths = filedialog.askopenfilenames(filetypes=TEXT_FILETYPES, title="Select the corpus files")
+            if not paths:
+                return
+            target = filedialog.asksaveasfilename(defaultextension=".npz",
+                                                  filetypes=[("NumPy sparse matrix", "*.npz")],
+                                                  initialfile=f"corpus_{feature}_{time.strftime('%Y%m%d_%H%M%S')}.npz",
+                                                  title="Save document-term matrix")
+            if target:
+                self.run_corpus_matrix(list(paths), feature, target, dedupe_threshold)
+        
+        tk.Button(dialog,
+                 text="📂 Select files and build",
+                 command=choose_files,
+                 bg=self.colors['accent'],
+                 fg='white',
+                 font=('Segoe UI', 10, 'bold'),
+                 relief=tk.FLAT,
+                 padx=20, pady=10).pack(pady=20)
+
+    def run_corpus_matrix(self, paths, feature, target, dedupe_threshold=None):
+        """Build and save the matrix in the background, one file at a time: in the NLP worker
+        process when there is one, like the analyses, otherwise on a headless copy of this engine"""
+        in_worker = self.nlp_worker is not None and not self.backend_url
+        engine = None if in_worker else self.headless_copy()
+        self.update_status(f"Building {feature} matrix over {len(paths)} files...", self.colors['accent'])
+        self.start_progress()
+        self.reset_results_progress()
+        
+        def progress(done, total):
+            self.window.after(0, lambda: self.update_results_progress(done / total * 100))
+            self.window.after(0, lambda: self.update_status(f"Corpus matrix: {done}/{total} files",
+                                                            self.colors['accent']))
+        
+        def build():
+            try:
+                if in_worker:
+                    reply = self.nlp_worker.corpus_matrix(paths, feature, target, dedupe_threshold,
+                                                          self.segment_routing, lambda value: progress(*value))
+                    (rows, columns), nnz, clusters, files = reply["shape"], reply["nnz"], reply["clusters"], reply["files"]
+                else:
+                    matrix, terms, documents, clusters = build_document_term_matrix(engine, paths, feature, progress,
+                                                                                    dedupe_threshold)
+                    files = save_document_term_matrix(target, matrix, terms, documents, clusters)
+                    (rows, columns), nnz = matrix.shape, matrix.nnz
+                density = nnz / max(1, rows * columns)
+                message = (f"✅ {rows:,} documents × {columns:,} terms "
+                           f"({nnz:,} non-zero, density {density:.2%})\n")
+                if clusters:
+                    skipped = sum(len(members) for members in clusters.values())
+                    message += f"♻️ {skipped} near-duplicate files reused {len(clusters)} representatives\n"
+                message += "\n" + "\n".join(files)
+                self.window.after(0, lambda: self.update_status("Corpus matrix saved", self.colors['success']))
+                self.window.after(0, lambda: messagebox.showinfo("Corpus Matrix", message))
+            except Exception as e:
+                error = f"Corpus matrix error: {e}"
+                self.window.after(0, lambda: messagebox.showerror("Error", error))
+            finally:
+                self.window.after(0, self.stop_progress)
+        
+        threading.Thread(target=build, daemon=True).start()
+
+    def show_past_runs(self):
+        """List the runs of the result store; opening one displays it without recomputation"""
+        import sqlite3
+        
+        if self.result_store is None:
+            messagebox.showinfo("Past Runs", "The result store is disabled (TALOS_RESULT_STORE=0).")
+            return
+        try:
+            runs = self.result_store.runs()
+        except (sqlite3.Error, OSError) as e:
+            messagebox.showerror("Past Runs", f"Cannot open the result store:\n{e}")
+            return
+        if not runs:
+            messagebox.showinfo("Past Runs", "No analysis has been recorded yet.")
+            return
+        
+        dialog = tk.Toplevel(self.window)
+        dialog.title("🗂️ Past Runs")
+        dialog.geometry("780x460")
+        dialog.configure(bg=self.colors['bg_primary'])
+        dialog.transient(self.window)
+        
+        tk.Label(dialog,
+                text="🗂️ Stored Analysis Runs",
+                font=('Segoe UI', 14, 'bold'),
+                fg=self.colors['accent'],
+                bg=self.colors['bg_primary']).pack(pady=(15, 5))
+        tk.Label(dialog,
+                text=f"{self.result_store.path} · double-click a run to reopen it",
+                font=('Segoe UI', 9),
+                fg=self.colors['text_secondary'],
+                bg=self.colors['bg_primary']).pack(pady=(0, 10))
+        
+        table_frame = tk.Frame(dialog, bg=self.colors['bg_primary'])
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=15)
+        columns = [("id", "#", 50, tk.E), ("created", "Date", 140, tk.W), ("file", "File", 220, tk.W),
+                   ("analysis", "Analysis", 140, tk.W), ("language", "Language", 100, tk.W),
+                   ("unique", "Unique", 70, tk.E)]
+        tree = ttk.Treeview(table_frame, columns=[column for column, *_ in columns], show='headings')
+        for column, heading, width, anchor in columns:
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=anchor)
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        for run in runs:
+            analysis = f"{run['analysis']} [{run['pattern']}]" if run['pattern'] else run['analysis']
+            tree.insert("", tk.END, iid=str(run['id']), values=(
+                run['id'], run['created'].replace("T", " "), Path(run['file']).name if run['file'] else "-",
+                analysis, run['language'], f"{run['unique_count']:,}"))
+        
+        def open_selected(event=None):
+            selection = tree.selection()
+            if selection:
+                dialog.destroy()
+                self.open_stored_run(int(selection[0]))
+        
+        tree.bind("<Double-Button-1>", open_selected)
+        tk.Button(dialog, text="📂 Open", command=open_selected, bg=self.colors['accent'], fg='white',
+                  font=('Segoe UI', 10, 'bold'), relief=tk.FLAT, padx=20, pady=8).pack(pady=15)
+
+    def open_stored_run(self, run_id):
+        """Display a stored run from the result store"""
+        import sqlite3
+        
         try:
-            doc = self.get_nlp_doc(self.file_content, self.detected_language)
-            if doc is None:
-                return {}
-            
-            lemmas = []
-            
-            if self.detected_language == "Ancient Greek":
-                # For Stanza
-                total_sents = len(doc.sentences)
-                for sent_idx, sent in enumerate(doc.sentences):
-                    for word in sent.words:
-                        if (word.text.isalpha() and len(word.text) > 2 and 
-                            word.lemma and word.lemma.lower() != word.text.lower()):
-                            lemmas.append(word.lemma.lower())
-                    
-                    # Update progress
-                    progress = (sent_idx / total_sents) * 100
-                    self.window.after(0, lambda p=progress: self.update_results_progress(p))
-            else:
-                # For spaCy
-                lemmas = [token.lemma_.lower() for token in doc 
-                         if token.is_alpha and len(token.text) > 2 and not token.is_stop]
-            
-            return Counter(lemmas)
-        except Exception as e:
-            messagebox.showerror("Error", f"Lemmatization error: {e}")
-            return {}
+            run, result = self.result_store.load(run_id, self.vocab)
+        except (KeyError, sqlite3.Error, OSError) as e:
+            messagebox.showerror("Past Runs", f"Cannot open run #{run_id}:\n{e}")
+            return
+        # Nothing is being analysed: no timings, memory or cache figures to show
+        self.trace = None
+        self.memory_plan = self.peak_rss = self.cache_run = self.checkpoint_run = None
+        self.display_results(run['title'] or f"🗂️ {run['analysis']}", result, run['analysis'], run)
+        self.update_status(f"Reopened stored run #{run_id}", self.colors['success'])
 
     def show_pattern_selector(self):
         """Show pattern selection dialog"""
         # Check if file is loaded first
+        if self.file_loading:
+            messagebox.showinfo("Loading", "⏳ The file is still loading; its statistics appear when it is ready.")
+            return
         if not self.selected_file or not self.file_content:
             messagebox.showwarning("No File Selected", 
                                  "⚠️ Please select a text file first using the 'Browse File' button!")
@@ -994,7 +3177,7 @@ class TextAnalyzer:
             
         pattern_window = tk.Toplevel(self.window)
         pattern_window.title("🎯 Custom Pattern Builder")
-        pattern_window.geometry("500x700")
+        pattern_window.geometry("560x820")
         pattern_window.configure(bg=self.colors['bg_primary'])
         pattern_window.grab_set()  # Make it modal
         
@@ -1011,7 +3194,8 @@ class TextAnalyzer:
         
         # Instructions
         instructions = tk.Label(pattern_window,
-                               text="Select which positions to fill (1-5) and choose POS tags:",
+                               text="Select which positions to fill (1-5) and choose POS tags,\n"
+                                    "or write any pattern in the expression box:",
                                font=('Segoe UI', 10),
                                fg=self.colors['text_secondary'],
                                bg=self.colors['bg_primary'])
@@ -1037,12 +3221,16 @@ class TextAnalyzer:
             "NUM",    # Number
             "CONJ",   # Conjunction
             "PART",   # Particle
+            "PROPN",  # Proper noun
             "*"       # Any POS (wildcard)
         ]
+        # Repetition of a position ('' = exactly once)
+        repeats = ["", "?", "*", "+"]
         
         # Pattern positions (5 positions)
         self.pattern_vars = []
         self.pattern_enabled = []
+        self.pattern_repeats = []
         
         tk.Label(builder_frame, 
                 text="Pattern Positions:",
@@ -1078,7 +3266,17 @@ class TextAnalyzer:
                                    state='readonly',
                                    width=8,
                                    font=('Segoe UI', 9))
-            pos_combo.pack(side=tk.LEFT, padx=(0, 10))
+            pos_combo.pack(side=tk.LEFT, padx=(0, 5))
+            
+            # Repetition dropdown
+            repeat_var = tk.StringVar(value="")
+            self.pattern_repeats.append(repeat_var)
+            ttk.Combobox(pos_frame,
+                         textvariable=repeat_var,
+                         values=repeats,
+                         state='readonly',
+                         width=2,
+                         font=('Segoe UI', 9)).pack(side=tk.LEFT, padx=(0, 10))
             
             # POS description
             descriptions = {
@@ -1092,6 +3290,7 @@ class TextAnalyzer:
                 "NUM": "Number (one, first)",
                 "CONJ": "Conjunction (and, or)",
                 "PART": "Particle (to, not)",
+                "PROPN": "Proper noun (London, John)",
                 "*": "Any word type"
             }
             
@@ -1108,6 +3307,29 @@ class TextAnalyzer:
             
             pos_combo.bind('<<ComboboxSelected>>', update_desc)
         
+        # Expression box: the positions above write it; it can be edited into any TokenPattern
+        expression_frame = tk.Frame(main_frame, bg=self.colors['bg_secondary'])
+        expression_frame.pack(padx=20, fill=tk.X)
+        tk.Label(expression_frame,
+                text="Expression:",
+                font=('Segoe UI', 10, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['bg_secondary']).pack(side=tk.LEFT, padx=(0, 10))
+        expression_var = tk.StringVar()
+        tk.Entry(expression_frame,
+                textvariable=expression_var,
+                font=('Consolas', 10),
+                bg=self.colors['bg_primary'],
+                fg=self.colors['text_primary'],
+                insertbackground=self.colors['text_primary']).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        def update_expression(*_):
+            expression_var.set(" ".join(pos_var.get() + repeat_var.get() for enabled, pos_var, repeat_var
+                                        in zip(self.pattern_enabled, self.pattern_vars, self.pattern_repeats)
+                                        if enabled.get()))
+        for variable in self.pattern_enabled + self.pattern_vars + self.pattern_repeats:
+            variable.trace_add('write', update_expression)
+        
         # Example patterns section
         example_frame = tk.Frame(main_frame, bg=self.colors['bg_secondary'])
         example_frame.pack(pady=20, padx=20, fill=tk.X)
@@ -1119,11 +3341,12 @@ class TextAnalyzer:
                 bg=self.colors['bg_secondary']).pack(anchor='w')
         
         examples = [
-            "ADJ + NOUN → 'beautiful house'",
-            "DET + ADJ + NOUN → 'the red car'", 
-            "NOUN + ADP + NOUN → 'cup of coffee'",
-            "ADJ + ADJ + NOUN → 'big red balloon'",
-            "VERB + DET + NOUN → 'read the book'"
+            "ADJ NOUN → 'beautiful house'",
+            "DET? ADJ* NOUN|PROPN → 'the big red car', 'old London'",
+            "NOUN ADP NOUN → 'cup of coffee'",
+            "NOUN word=of DET? NOUN → 'cup of the coffee'",
+            "lemma=be ADV? ADJ → 'was very happy'",
+            "(ADJ NOUN | NOUN ADP NOUN) VERB → 'red car stops'"
         ]
         
         for example in examples:
@@ -1138,40 +3361,46 @@ class TextAnalyzer:
         button_frame.pack(fill=tk.X, pady=(0, 20))
         
         def extract_custom_pattern():
-            # Get selected pattern
-            selected_pattern = []
-            for i, (enabled, pos_var) in enumerate(zip(self.pattern_enabled, self.pattern_vars)):
-                if enabled.get():
-                    selected_pattern.append(pos_var.get())
-            
+            # Get the pattern expression
+            selected_pattern = " ".join(expression_var.get().split())
             if not selected_pattern:
                 messagebox.showwarning("No Pattern", "Please select at least one position!")
                 return
-            
-            if len(selected_pattern) > 5:
-                messagebox.showwarning("Pattern Too Long", "Maximum 5 positions allowed!")
+            try:
+                TokenPattern(selected_pattern, self.vocab)
+            except ValueError as e:
+                messagebox.showwarning("Invalid Pattern", str(e), parent=pattern_window)
                 return
             
             # Close dialog and start analysis
             pattern_window.destroy()
             self.custom_pattern = selected_pattern
+            pattern_str = TokenPattern.name(selected_pattern)
+            title = f"🎯 Custom Pattern [{pattern_str}]"
+            if self.cached_result(title, f"pattern_{pattern_str}", selected_pattern):
+                return
+            result_key = self.result_key(f"pattern_{pattern_str}", selected_pattern)
             
             # Start analysis (no file selection needed)
             self.update_status("Extracting custom patterns...", self.colors['accent'])
             self.start_progress()
             self.reset_results_progress()
             self.text_area.config(state=tk.NORMAL)
-            pattern_str = "_".join(selected_pattern)
             self.text_area.delete(1.0, tk.END)
             self.text_area.insert(tk.END, f"🎯 Custom Pattern Extraction [{pattern_str}]\n{'='*60}\n\n⏳ Processing...")
             self.text_area.config(state=tk.DISABLED)
-            self.window.update()
+            self.window.update_idletasks()
+            
+            self.begin_run(f"pattern_{pattern_str}", selected_pattern)
             
             def run_custom_analysis():
                 try:
-                    result = self.analyze_custom_patterns(selected_pattern)
+                    with self.stage("analysis"), PeakMemorySampler(0.05) as memory:
+                        result = self.analysis_function("custom", selected_pattern)()
+                    self.peak_rss = self.peak_rss or memory.peak  # Set by the NLP worker when it ran the analysis
                     if result:
-                        title = f"🎯 Custom Pattern [{pattern_str}]"
+                        if self.result_cache is not None:
+                            self.result_cache.put(result_key, result)
                         self.window.after(0, lambda: self.display_results(title, result, f"pattern_{pattern_str}"))
                     else:
                         self.window.after(0, lambda: self.update_status("No patterns found", self.colors['warning']))
@@ -1212,72 +3441,78 @@ class TextAnalyzer:
                               pady=10)
         cancel_btn.pack(side=tk.RIGHT, padx=(10, 50))
         
-    def analyze_custom_patterns(self, pattern_template):
-        """Extract custom lexical-syntactic patterns"""
-        if not self.lazy_load_nlp(self.detected_language):
+    def analyze_custom_patterns(self, pattern):
+        """Extract custom lexical-syntactic patterns: pattern is a TokenPattern expression, or a
+        list of its elements (the POS template of the pattern builder)"""
+        tables = self.annotate()
+        if not tables:
             return {}
             
         try:
-            doc = self.get_nlp_doc(self.file_content, self.detected_language)
-            if doc is None:
-                return {}
-                
-            patterns = []
+            matcher = TokenPattern(pattern, self.vocab)
+            by_language = {}
             
-            # Extract patterns from text
-            if self.detected_language == "Ancient Greek":
-                # For Stanza
-                tokens = [word for sent in doc.sentences for word in sent.words if word.text.isalpha()]
-            else:
-                # For spaCy
-                tokens = [token for token in doc if not token.is_space and token.is_alpha]
-            
-            pattern_length = len(pattern_template)
-            total_tokens = len(tokens)
-            
-            for i in range(len(tokens) - pattern_length + 1):
-                token_sequence = tokens[i:i + pattern_length]
-                
-                if self.detected_language == "Ancient Greek":
-                    # For Stanza
-                    pos_sequence = [token.upos for token in token_sequence]
-                    words = [token.text.lower() for token in token_sequence]
-                else:
-                    # For spaCy
-                    pos_sequence = [token.pos_ for token in token_sequence]
-                    words = [token.text.lower() for token in token_sequence]
-                
-                # Check if pattern matches (with wildcard support)
-                match = True
-                for j, (expected, actual) in enumerate(zip(pattern_template, pos_sequence)):
-                    if expected != "*" and expected != actual:
-                        match = False
-                        break
+            for table in tables:
+                patterns = by_language.setdefault(table.language, Counter())
                 
-                if match:
-                    # Create pattern string
-                    pos_pattern = "_".join([p if p != "*" else actual_pos 
-                                          for p, actual_pos in zip(pattern_template, pos_sequence)])
-                    word_pattern = " ".join(words)
-                    
-                    # Store as "POS_PATTERN: word pattern"
-                    pattern_string = f"[{pos_pattern}]: {word_pattern}"
-                    patterns.append(pattern_string)
+                # Match over the alphabetic tokens as parallel POS / word / lemma ID sequences
+                pos_ids, word_ids, lemma_ids = self.pattern_sequences(table, lemmas=bool(matcher.lemma_bits))
                 
-                # Update progress periodically
-                if i % 100 == 0:
-                    progress = (i / total_tokens) * 100
-                    self.window.after(0, lambda p=progress: self.update_results_progress(p))
+                for start, end in matcher.finditer(pos_ids, word_ids, lemma_ids):
+                    # Store actual POS IDs (wildcards resolved) with the word IDs
+                    patterns[(tuple(pos_ids[start:end]), tuple(word_ids[start:end]))] += 1
             
-            return Counter(patterns)
+            return self.merge_results(by_language, PatternCounter(vocab=self.vocab))
             
         except Exception as e:
-            messagebox.showerror("Error", f"Custom pattern extraction error: {e}")
+            self.show_error("Error", f"Custom pattern extraction error: {e}")
             return {}
             
-    def display_file_preview(self):
-        """Display beginning of selected text file in results area"""
-        if not self.file_content:
+    def concordance_spans(self, export_name, item):
+        """Character spans of the occurrences of a result item, in text order
+        (None when the annotations needed were not kept)"""
+        if export_name == "words":
+            if self.word_positions is None:
+                # One pass over the text, then every word is a dictionary lookup. Offsets are taken
+                # in the original text, keys lowercased like analyze_words
+                positions = {}
+                for spans in self.language_groups().values():
+                    for start, end in spans:
+                        for m in self.WORD_CASELESS_RE.finditer(self.file_content[start:end]):
+                            offsets = positions.setdefault(m.group().lower(), array('q'))
+                            offsets.append(start + m.start())
+                            offsets.append(start + m.end())
+                self.word_positions = positions
+            offsets = self.word_positions.get(item, ())
+            return list(zip(offsets[::2], offsets[1::2]))
+        
+        if self.nlp_worker is not None and not self.backend_url:
+            return self.nlp_worker.concordance(export_name, item, self.vocab)
+        index = self.concordance
+        if index is None:
+            return None
+        if export_name in ("patterns", "collocations") or export_name.startswith("pattern_"):
+            token_spans = index.token_spans('pattern', item)
+        elif export_name in ("persons", "locations"):
+            token_spans = index.token_spans('entity', item, label="PERSON" if export_name == "persons" else "GPE")
+        elif export_name == "lemmas":
+            token_spans = index.token_spans('lemma', item)
+        else:
+            token_spans = index.token_spans('word', item, pos="NOUN" if export_name == "nouns" else None)
+        return sorted(index.char_span(*span) for span in token_spans)
+
+    def kwic_line(self, start, end, width=60):
+        """(left context, keyword, right context) of a character span, on one line"""
+        text = self.file_content
+        left = " ".join(text[max(0, start - width * 2):start].split())[-width:]
+        right = " ".join(text[end:end + width * 2].split())[:width]
+        return left, " ".join(text[start:end].split()), right
+    
+    def display_file_preview(self, head=None):
+        """Display beginning of selected text file in results area (head: the start of a file
+        that is still loading, shown before its statistics are known)"""
+        text = self.file_content if head is None else head
+        if not text:
             return
             
         self.text_area.config(state=tk.NORMAL)
@@ -1289,66 +3524,274 @@ class TextAnalyzer:
         header = f"📄 File Preview: {file_name} {language_flag}\n{'='*60}\n\n"
         
         # Text preview (first 2000 characters)
-        preview_text = self.file_content[:2000]
-        if len(self.file_content) > 2000:
+        preview_text = text[:2000]
+        if len(text) > 2000:
             preview_text += "\n\n... [Text continues, select an analysis to see full results]"
         
-        # Word count info
-        word_count = len(self.file_content.split())
-        char_count = len(self.file_content)
-        
         header += f"📊 Text Statistics:\n"
+        if head is not None:
+            header += f"   • Language detected: {self.detected_language} (first {len(head):,} characters)\n"
+            header += f"   • ⏳ Reading the whole file: counts and language segments follow...\n"
+            header += f"   • Preview (first 2000 chars):\n\n"
+            header += f"{'-'*60}\n\n"
+            self.text_area.insert(tk.END, header + preview_text)
+            self.text_area.config(state=tk.DISABLED)
+            return
+        
+        # Counts from the file profile (one pass at load time)
+        profile = self.file_profile
+        if profile is None:
+            profile = self.file_profile = FileProfile.for_text(self.file_content)
+            self.file_hash = profile.content_hash
+        
         header += f"   • Language detected: {self.detected_language}\n"
-        if self.detected_language == "Ancient Greek":
+        header += self.language_breakdown_text()
+        engine = self.engine_name()
+        if engine == "Stanza":
             header += f"   • NLP Engine: Stanza (specialized for Ancient Greek)\n"
         else:
-            header += f"   • NLP Engine: spaCy\n"
-        header += f"   • Total characters: {char_count:,}\n"
-        header += f"   • Total words: {word_count:,}\n"
+            header += f"   • NLP Engine: {engine}\n"
+        header += f"   • Total characters: {profile.chars:,}\n"
+        header += f"   • Total words: {profile.words:,}\n"
+        header += f"   • Lines: {profile.lines:,} | Paragraphs: {profile.paragraphs:,}\n"
         header += f"   • Preview (first 2000 chars):\n\n"
         header += f"{'-'*60}\n\n"
         
         self.text_area.insert(tk.END, header + preview_text)
         self.text_area.config(state=tk.DISABLED)
             
-    def display_results(self, title, result, export_name):
-        """Modern results display"""
+    # Stage labels in pipeline order
+    STAGE_LABELS = [
+        ('read_file', 'read file'), ('detect_language', 'detect language'), ('detect_segments', 'segments'),
+        ('load_model', 'load model'), ('store', 'token store'), ('checkpoint', 'checkpoint'), ('cache', 'cache'),
+        ('parse', 'parse'), ('encode', 'encode'), ('index', 'index'),
+        ('extract', 'extract'),
+        ('display', 'display'), ('export', 'export')
+    ]
+
+    def timing_text(self, trace):
+        """One-line stage breakdown, e.g. 'read file: 12 ms · parse: 4.2 s · extract: 40 ms'"""
+        durations = trace.durations()
+        return " · ".join(f"{label}: {format_duration(durations[stage])}"
+                          for stage, label in self.STAGE_LABELS if stage in durations)
+
+    def stage(self, name):
+        """Context manager timing a stage of the current run (no-op when not tracing)"""
+        trace = self.trace
+        return trace.stage(name) if trace is not None else nullcontext()
+
+    def begin_run(self, name, pattern=None):
+        """Start tracing an analysis run (file loading stages are included)"""
+        self.memory_plan = self.peak_rss = self.cache_run = self.checkpoint_run = self.run_models = None
+        self.run_pattern = pattern
+        self.trace = RunTrace(name)
+        self.trace.add_events(self.load_events)
+        return self.trace
+
+    def finish_run(self, result, title=None):
+        """Record the run in the result store, append it to the metrics log and write
+        its Chrome trace if enabled"""
+        trace = self.trace
+        if trace is None:
+            return
+        self.append_metrics({
+            "kind": "analysis",
+            "run": trace.name,
+            "file": Path(self.selected_file).name if self.selected_file else None,
+            "file_chars": len(self.file_content or ""),
+            "language": self.detected_language,
+            "languages": list(self.language_groups()),
+            "engine": self.engine_name(),
+            "unique": len(result),
+            "total": sum(result.values()),
+            "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in trace.durations().items()},
+            "peak_rss_mb": round(self.peak_rss / 1024 ** 2, 1) if self.peak_rss else None,
+            "estimated_mb": round(self.memory_plan.estimate / 1024 ** 2, 1) if self.memory_plan else None,
+            "cache_hits": self.cache_run[0] if self.cache_run else None,
+            "cache_lookups": self.cache_run[1] if self.cache_run else None,
+            "resumed_chunks": self.checkpoint_run[0] if self.checkpoint_run else None,
+            "run_id": self.record_run(result, trace.name, title)
+        }, trace)
+        self.write_trace(trace)
+
+    def text_hash(self):
+        """Content hash of the loaded text (identifies a file across renames and copies)"""
+        if self.file_hash is None and self.file_content is not None:
+            self.file_hash = hashlib.blake2b(self.file_content.encode('utf-8', 'surrogatepass'),
+                                             digest_size=16).hexdigest()
+        return self.file_hash
+
+    def current_models(self):
+        """Language -> model key of the models behind the current run (those the worker
+        reported, or the loaded ones of the text's languages)"""
+        return self.run_models or {
+            language: self.model_key(language) for language in self.language_groups()
+            if (self.stanza_nlp is not None if language == "Ancient Greek" else language in self.spacy_models)}
+
+    def record_run(self, result, analysis, title=None):
+        """Store result in the result store; returns the run ID (None if the store is disabled or unavailable)"""
+        import sqlite3
+        
+        if self.result_store is None:
+            return None
+        languages = list(self.language_groups())
+        models = self.current_models()
+        try:
+            return self.result_store.record(
+                result, analysis, TokenPattern.name(self.run_pattern) if self.run_pattern else None, title,
+                file=str(self.selected_file) if self.selected_file else None, file_hash=self.text_hash(),
+                file_chars=len(self.file_content or ""), language=self.detected_language, languages=languages,
+                engine=self.engine_name(), models=models)
+        except (sqlite3.Error, OSError):
+            return None  # The store is best effort, like the metrics log
+
+    def append_metrics(self, record, trace=None):
+        """Append one JSON line to TALOS_HOME/metrics.jsonl (for aggregation across users)"""
+        import getpass
+        import platform
+        
+        record = dict(record, timestamp=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                      started=trace.started if trace else None,
+                      user=getpass.getuser(), host=platform.node())
+        try:
+            TALOS_HOME.mkdir(parents=True, exist_ok=True)
+            with open(TALOS_HOME / "metrics.jsonl", 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # Metrics are best effort
+
+    def write_trace(self, trace):
+        """Write trace as Chrome-trace JSON into trace_dir (if tracing is enabled)"""
+        if not self.trace_dir:
+            return
+        try:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(trace.started))
+            name = re.sub(r'[^\w-]+', '_', trace.name)
+            path = os.path.join(self.trace_dir, f"talos_trace_{stamp}_{name}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(trace.to_chrome_trace(), f)
+        except OSError:
+            pass
+
+    def language_breakdown_text(self):
+        """Header line listing the language segments of a mixed-language text"""
+        shares = self.language_shares()
+        if len(shares) < 2:
+            return ""
+        parts = [f"{self.get_language_flag(language)} {language} {share:.0%}" for language, share in shares]
+        return f"   • Language segments: {' · '.join(parts)}\n"
+            
+    def display_results(self, title, result, export_name, run=None, cached=None):
+        """Modern results display (run: stored run dict when reopening a past result;
+        cached: time the result was cached, when it comes from the result cache)"""
         self.text_area.config(state=tk.NORMAL)
         self.text_area.delete(1.0, tk.END)
         
         total = sum(result.values())
         unique = len(result)
+        # A reopened run has its concordance only while the same text is loaded
+        concordance = run is None or (self.file_content is not None and run["file_hash"] == self.text_hash())
+        language = run["language"] if run else self.detected_language
+        source_file = run["file"] if run else self.selected_file
         
         # Results header
-        language_flag = self.get_language_flag(self.detected_language)
+        language_flag = self.get_language_flag(language)
         header = f"{title} {language_flag}\n{'='*60}\n\n"
         header += f"📈 Statistics:\n"
         header += f"   • Total occurrences: {total:,}\n"
         header += f"   • Unique elements: {unique:,}\n"
-        header += f"   • Source file: {Path(self.selected_file).name}\n"
-        header += f"   • Detected language: {self.detected_language}\n"
-        if self.detected_language == "Ancient Greek":
-            header += f"   • NLP Engine: Stanza\n"
-        else:
-            header += f"   • NLP Engine: spaCy\n"
+        header += f"   • Source file: {Path(source_file).name if source_file else '-'}\n"
+        header += f"   • Detected language: {language}\n"
+        header += self.language_breakdown_text() if run is None else ""
+        header += f"   • NLP Engine: {run['engine'] if run else self.engine_name()}\n"
+        if run:
+            header += f"   • 🗂️ Stored run #{run['id']} of {run['created'].replace('T', ' ')} (no recomputation)\n"
+        if cached:
+            cache = self.result_cache
+            header += (f"   • ⚡ Cached result of {time.strftime('%H:%M:%S', time.localtime(cached))} (no recomputation) · "
+                       f"result cache hit rate {cache.hit_rate():.0%}, {len(cache.entries):,} results, "
+                       f"{format_bytes(cache.bytes)}\n")
+        if concordance:
+            header += f"   • 🔎 Double-click a row for its concordance (keyword in context)\n"
+        
+        # Per-language breakdown of the results (mixed-language texts)
+        by_language = getattr(result, 'by_language', {})
+        if by_language:
+            header += f"\n🌐 Results by language:\n"
+            for language, counter in by_language.items():
+                header += (f"   • {self.get_language_flag(language)} {language}: "
+                           f"{sum(counter.values()):,} occurrences, {len(counter):,} unique\n")
         header += "\n"
         
         self.text_area.insert(tk.END, header)
         
+        # Stage timings of this run; the display time is filled in once rendering is done
+        trace = self.trace  # Kept for the exports below: cached results must not be modified
+        if trace is not None:
+            self.text_area.insert(tk.END, f"⏱️ Stage timings:\n   • {self.timing_text(trace)}")
+            self.text_area.mark_set("timing_end", "end-1c")
+            self.text_area.mark_gravity("timing_end", tk.LEFT)
+            self.text_area.insert(tk.END, "\n\n")
+        
+        # Memory: measured peak of the run against the governor's plan
+        if self.peak_rss:
+            memory_text = f"⚙️ Memory:\n   • peak RSS {format_bytes(self.peak_rss)}"
+            if self.memory_plan is not None:
+                memory_text += f" · {self.memory_plan.summary()}"
+            self.text_area.insert(tk.END, memory_text + "\n\n")
+        
+        # Annotation cache: paragraphs of this parse served from the cache, and overall
+        cache = self.annotation_cache
+        if self.cache_run and cache is not None:
+            hits, lookups = self.cache_run
+            self.text_area.insert(tk.END, f"♻️ Annotation cache:\n   • {hits:,}/{lookups:,} paragraphs reused "
+                                          f"({hits / lookups:.0%}) · overall hit rate {cache.hit_rate():.0%} · "
+                                          f"{cache.tokens:,}/{cache.max_tokens:,} tokens cached\n\n")
+        
+        # Checkpointed parse resumed after an interruption
+        if self.checkpoint_run and self.checkpoint_run[0]:
+            resumed, chunks = self.checkpoint_run
+            self.text_area.insert(tk.END, f"💾 Checkpoint:\n   • resumed {resumed:,} of {chunks:,} chunks "
+                                          f"from an interrupted parse\n\n")
+        
         if result:
-            # Results table
-            self.text_area.insert(tk.END, f"{'Element':<50} {'Occurrences':>12}\n")
-            self.text_area.insert(tk.END, f"{'-'*50} {'-'*12}\n")
-            
-            # Sort by frequency (descending)
-            for item, count in sorted(result.items(), key=lambda x: x[1], reverse=True):
-                display_item = (item[:47] + '...') if len(item) > 47 else item
-                self.text_area.insert(tk.END, f"{display_item:<50} {count:>12}\n")
+            with self.stage("display"):
+                # Results table
+                is_collocation = isinstance(result, CollocationResult)
+                if is_collocation:
+                    self.text_area.insert(tk.END, f"{'Element':<42} {'Freq':>7} {'PMI':>7} {'LL':>10} {'t':>7}\n")
+                    self.text_area.insert(tk.END, f"{'-'*42} {'-'*7} {'-'*7} {'-'*10} {'-'*7}\n")
+                else:
+                    self.text_area.insert(tk.END, f"{'Element':<50} {'Occurrences':>12}\n")
+                    self.text_area.insert(tk.END, f"{'-'*50} {'-'*12}\n")
+                
+                # Sort by frequency (descending), collocations by log-likelihood;
+                # rows are remembered for the concordance view
+                first_line = int(self.text_area.index("end-1c").split(".")[0])
+                rows = result.ranked() if is_collocation else sorted(result.items(), key=lambda x: x[1], reverse=True)
+                for item, count in rows:
+                    if is_collocation:
+                        pmi, log_likelihood, t_score = result.scores[item]
+                        label = result.label(item)
+                        label = (label[:39] + '...') if len(label) > 39 else label
+                        self.text_area.insert(tk.END, f"{label:<42} {count:>7} {pmi:>7.2f} {log_likelihood:>10.1f} "
+                                                      f"{t_score:>7.2f}\n")
+                        continue
+                    if isinstance(result, PatternCounter):
+                        item = result.label(item)
+                    display_item = (item[:47] + '...') if len(item) > 47 else item
+                    self.text_area.insert(tk.END, f"{display_item:<50} {count:>12}\n")
+                self.result_rows = (first_line, [item for item, _ in rows], result, export_name) if concordance else None
+            
+            if trace is not None:
+                self.text_area.insert("timing_end", f" · display: {format_duration(trace.durations()['display'])}")
+                self.finish_run(result, title)
                 
             # Export offer with format choice
             export_window = tk.Toplevel(self.window)
             export_window.title("💾 Export Results")
-            export_window.geometry("400x250")
+            export_window.geometry("460x330")
             export_window.configure(bg=self.colors['bg_primary'])
             export_window.grab_set()
             export_window.transient(self.window)
@@ -1367,7 +3810,7 @@ class TextAnalyzer:
                     bg=self.colors['bg_primary']).pack(pady=(20, 15))
             
             # Info
-            info_text = f"📊 {unique} unique elements to export\n🌍 Language: {self.detected_language}"
+            info_text = f"📊 {unique} unique elements to export\n🌍 Language: {language}"
             tk.Label(export_window,
                     text=info_text,
                     font=('Segoe UI', 10),
@@ -1386,11 +3829,11 @@ class TextAnalyzer:
             
             def export_excel():
                 export_window.destroy()
-                self.save_to_file(result, export_name, title, 'excel')
+                self.save_to_file(result, export_name, title, 'excel', trace, run)
             
             def export_csv():
                 export_window.destroy()
-                self.save_to_file(result, export_name, title, 'csv')
+                self.save_to_file(result, export_name, title, 'csv', trace, run)
             
             def cancel_export():
                 export_window.destroy()
@@ -1417,6 +3860,37 @@ class TextAnalyzer:
                               padx=20, pady=10)
             csv_btn.pack(side=tk.LEFT, padx=10)
             
+            # Columnar and compressed formats for downstream pipelines (pandas, DuckDB)
+            tk.Label(export_window,
+                    text="Data pipeline formats:",
+                    font=('Segoe UI', 10, 'bold'),
+                    fg=self.colors['text_secondary'],
+                    bg=self.colors['bg_primary']).pack()
+            
+            pipeline_frame = tk.Frame(export_window, bg=self.colors['bg_primary'])
+            pipeline_frame.pack(pady=(5, 0))
+            
+            pipeline_formats = [
+                ("Parquet", 'parquet'),
+                ("Arrow", 'arrow'),
+                ("CSV.gz", 'csv_gzip'),
+                ("CSV.zst", 'csv_zstd')
+            ]
+            
+            for text, format_type in pipeline_formats:
+                def export_format(fmt=format_type):
+                    export_window.destroy()
+                    self.save_to_file(result, export_name, title, fmt, trace, run)
+                
+                tk.Button(pipeline_frame,
+                         text=text,
+                         command=export_format,
+                         bg=self.colors['bg_secondary'],
+                         fg='white',
+                         font=('Segoe UI', 9, 'bold'),
+                         relief=tk.FLAT,
+                         padx=12, pady=6).pack(side=tk.LEFT, padx=5)
+            
             # Cancel button
             cancel_btn = tk.Button(export_window,
                                  text="❌ Cancel",
@@ -1430,139 +3904,2141 @@ class TextAnalyzer:
         else:
             self.text_area.insert(tk.END, "❌ No results found.")
             
-        self.text_area.config(state=tk.DISABLED)
-        self.update_status(f"Analysis complete - {unique} elements found", self.colors['success'])
+        self.text_area.config(state=tk.DISABLED)
+        self.update_status(f"Analysis complete - {unique} elements found", self.colors['success'])
+        
+    # Export formats: (extension, file dialog filter, status label)
+    EXPORT_FORMATS = {
+        'excel': (".xlsx", [("Excel files", "*.xlsx")], "Excel"),
+        'csv': (".csv", [("CSV files", "*.csv")], "CSV"),
+        'csv_gzip': (".csv.gz", [("Gzip-compressed CSV", "*.csv.gz")], "CSV (gzip)"),
+        'csv_zstd': (".csv.zst", [("Zstandard-compressed CSV", "*.csv.zst")], "CSV (zstd)"),
+        'parquet': (".parquet", [("Parquet files", "*.parquet")], "Parquet"),
+        'arrow': (".arrow", [("Arrow IPC files", "*.arrow")], "Arrow IPC")
+    }
+
+    def on_result_double_click(self, event):
+        """Open the concordance of the result row under the mouse"""
+        if not self.result_rows:
+            return
+        first_line, items, result, export_name = self.result_rows
+        row = int(self.text_area.index(f"@{event.x},{event.y}").split(".")[0]) - first_line
+        if 0 <= row < len(items):
+            item = items[row]
+            label = result.label(item) if isinstance(result, PatternCounter) else item
+            self.show_concordance(item, label, export_name)
+        return "break"
+
+    CONCORDANCE_PAGE_SIZE = 100
+
+    def show_concordance(self, item, label, export_name):
+        """Keyword-in-context view of a result item, paginated"""
+        start_time = time.perf_counter()
+        spans = self.concordance_spans(export_name, item)
+        elapsed = time.perf_counter() - start_time
+        if spans is None:
+            messagebox.showinfo("Concordance",
+                                "The concordance needs the annotations of this file, which were not kept "
+                                "(memory budget or analysis service). Increase --memory-budget to enable it.")
+            return
+        
+        window = tk.Toplevel(self.window)
+        window.title(f"🔎 Concordance: {label}")
+        window.geometry("1000x560")
+        window.configure(bg=self.colors['bg_primary'])
+        
+        tk.Label(window,
+                text=f"🔎 {label} — {len(spans):,} occurrences (lookup {format_duration(elapsed)})",
+                font=('Segoe UI', 12, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['bg_primary']).pack(anchor=tk.W, padx=15, pady=(15, 10))
+        
+        text = ScrolledText(window, wrap=tk.NONE, font=('Consolas', 10), bg='#ffffff', fg='#1f2937',
+                            borderwidth=0, padx=10, pady=10)
+        text.pack(fill=tk.BOTH, expand=True, padx=15)
+        text.tag_configure("keyword", foreground=self.colors['accent'], font=('Consolas', 10, 'bold'))
+        
+        nav = tk.Frame(window, bg=self.colors['bg_primary'])
+        nav.pack(pady=10)
+        page_size = self.CONCORDANCE_PAGE_SIZE
+        pages = max(1, -(-len(spans) // page_size))
+        page = [0]
+        
+        def show_page():
+            text.config(state=tk.NORMAL)
+            text.delete(1.0, tk.END)
+            first = page[0] * page_size
+            for number, (start, end) in enumerate(spans[first:first + page_size], first + 1):
+                left, keyword, right = self.kwic_line(start, end)
+                text.insert(tk.END, f"{number:>6}  {left:>60} ")
+                text.insert(tk.END, keyword, "keyword")
+                text.insert(tk.END, f" {right}\n")
+            text.config(state=tk.DISABLED)
+            page_label.config(text=f"Page {page[0] + 1} / {pages}")
+            prev_btn.config(state=tk.NORMAL if page[0] > 0 else tk.DISABLED)
+            next_btn.config(state=tk.NORMAL if page[0] < pages - 1 else tk.DISABLED)
+        
+        def move(step):
+            page[0] = max(0, min(pages - 1, page[0] + step))
+            show_page()
+        
+        prev_btn = tk.Button(nav, text="◀ Previous", command=lambda: move(-1),
+                             bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                             font=('Segoe UI', 10), relief=tk.FLAT, padx=15, pady=5)
+        prev_btn.pack(side=tk.LEFT, padx=5)
+        page_label = tk.Label(nav, font=('Segoe UI', 10), fg=self.colors['text_secondary'],
+                              bg=self.colors['bg_primary'], width=16)
+        page_label.pack(side=tk.LEFT, padx=5)
+        next_btn = tk.Button(nav, text="Next ▶", command=lambda: move(1),
+                             bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                             font=('Segoe UI', 10), relief=tk.FLAT, padx=15, pady=5)
+        next_btn.pack(side=tk.LEFT, padx=5)
+        show_page()
+
+    def save_to_file(self, data, default_name, title, format_type, trace=None, run=None):
+        """Enhanced export with format choice and pattern-specific handling (trace: RunTrace of
+        the run that produced data, which records the export; run: stored run dict of a reopened result)"""
+        timestamp = time.strftime('%Y%m%d_%H%M')
+        
+        # Determine file extension and filter
+        extension, filetypes, label = self.EXPORT_FORMATS.get(format_type, self.EXPORT_FORMATS['csv'])
+            
+        filename = f"talos_{default_name}_{timestamp}{extension}"
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=extension,
+            initialfile=filename,
+            filetypes=filetypes,
+            title=f"Save Analysis Results ({label})"
+        )
+        
+        if file_path:
+            try:
+                self.update_status(f"Saving {label} file...", self.colors['accent'])
+                self.start_progress()
+                
+                start = time.perf_counter()
+                with trace.stage("export") if trace is not None else nullcontext():
+                    self.write_results(data, file_path, format_type, title, run)
+                
+                if trace is not None:
+                    self.append_metrics({"kind": "export", "run": trace.name, "format": format_type,
+                                         "export_ms": round((time.perf_counter() - start) * 1000, 3)}, trace)
+                    self.write_trace(trace)
+                
+                self.stop_progress()
+                messagebox.showinfo("✅ Success", 
+                                  f"Analysis saved successfully!\n\n📄 {Path(file_path).name}")
+                self.update_status(f"Exported: {Path(file_path).name}", self.colors['success'])
+                
+            except Exception as e:
+                self.stop_progress()
+                messagebox.showerror("❌ Error", f"Save error:\n{str(e)}")
+
+    def write_results(self, data, file_path, format_type, title="", run=None):
+        """Write analysis results to file_path in the requested format (no dialogs). The statistics
+        describe the stored run run, if given, otherwise the loaded text and models."""
+        import pandas as pd
+        
+        # Pattern data carries structured (POS IDs, word IDs) keys
+        is_pattern_data = isinstance(data, PatternCounter)
+        columnar = format_type in ('parquet', 'arrow')
+        
+        if is_pattern_data:
+            # Special handling for lexical-syntactic patterns
+            if columnar:
+                df = self.create_columnar_pattern_dataframe(data)
+            else:
+                df = self.create_pattern_dataframe(data)
+        else:
+            # Standard handling for other analyses
+            df = pd.DataFrame(list(data.items()), columns=["Element", "Occurrences"])
+            df = df.sort_values("Occurrences", ascending=False)
+        
+        # Add statistics
+        if run:
+            language, engine, source_file = run['language'], run['engine'], run['file']
+            models = json.loads(run['models']) if run['models'] else {}
+        else:
+            language, engine, source_file = self.detected_language, self.engine_name(), self.selected_file
+            models = self.current_models()
+        stats_df = pd.DataFrame({
+            'Statistic': ['Total Occurrences', 'Unique Elements', 'Average per Element', 'Language Detected', 'NLP Engine',
+                          'Models'],
+            'Value': [df['Occurrences'].sum() if 'Occurrences' in df.columns else sum(data.values()), 
+                     len(df), 
+                     df['Occurrences'].mean() if 'Occurrences' in df.columns else sum(data.values())/len(data), 
+                     language,
+                     engine,
+                     ", ".join(f"{model_language}: {key}" for model_language, key in models.items()) or '-']
+        })
+        
+        # Per-language breakdown (mixed-language texts)
+        by_language = getattr(data, 'by_language', {})
+        language_df = None
+        if by_language:
+            label = data.label if is_pattern_data else str
+            language_df = pd.DataFrame([(language, label(item), count)
+                                        for language, counter in by_language.items()
+                                        for item, count in counter.items()],
+                                       columns=['Language', 'Element', 'Occurrences'])
+        
+        if format_type == 'excel':
+            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+                df.to_excel(writer, sheet_name='Results', index=False)
+                stats_df.to_excel(writer, sheet_name='Statistics', index=False)
+                if language_df is not None:
+                    language_df.to_excel(writer, sheet_name='By Language', index=False)
+        elif format_type == 'csv_gzip':
+            df.to_csv(file_path, index=False, encoding='utf-8', compression='gzip')
+        elif format_type == 'csv_zstd':
+            # Requires the 'zstandard' package
+            df.to_csv(file_path, index=False, encoding='utf-8', compression='zstd')
+        elif columnar:
+            self.write_columnar(df, stats_df, file_path, format_type, title, source_file)
+        else:
+            df.to_csv(file_path, index=False, encoding='utf-8-sig')
+
+    def write_columnar(self, df, stats_df, file_path, format_type, title="", source_file=None):
+        """Write a typed Parquet or Arrow IPC file with statistics as schema metadata"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise RuntimeError("Parquet/Arrow export requires pyarrow.\nRun: pip install pyarrow")
+        
+        # Statistics block (same content as the Excel 'Statistics' sheet)
+        statistics = {str(k): str(v) for k, v in zip(stats_df['Statistic'], stats_df['Value'])}
+        statistics['Title'] = title
+        statistics['Source File'] = Path(source_file).name if source_file else ''
+        
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'talos.statistics'] = json.dumps(statistics, ensure_ascii=False).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+        
+        if format_type == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, file_path, compression='zstd')
+        else:
+            # Uncompressed IPC file so readers can memory-map it (pa.memory_map / pa.ipc.open_file)
+            with pa.OSFile(file_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+    def create_pattern_dataframe(self, pattern_data):
+        """Create specialized DataFrame for lexical-syntactic patterns"""
+        import pandas as pd
+        
+        vocab = pattern_data.vocab
+        keys = list(pattern_data.keys())
+        row_count = len(keys)
+        
+        # Column names per distinct POS pattern, named by POS type (e.g., ADJ, NOUN, NOUN_2)
+        pos_columns = {}
+        for pos_ids, _ in keys:
+            if pos_ids not in pos_columns:
+                names = []
+                for pos_id in pos_ids:
+                    col_name = vocab[pos_id]
+                    counter = 1
+                    while col_name in names:
+                        counter += 1
+                        col_name = f"{vocab[pos_id]}_{counter}"
+                    names.append(col_name)
+                pos_columns[pos_ids] = names
+        
+        columns = {
+            'Pattern': [pattern_data.pos_pattern(key) for key in keys],
+            'Full_Example': [pattern_data.words(key) for key in keys],
+            'Occurrences': [pattern_data[key] for key in keys]
+        }
+        if isinstance(pattern_data, CollocationResult):
+            columns.update(pattern_data.score_columns(keys))
+        
+        # Word columns, filled position by position
+        for names in pos_columns.values():
+            for col_name in names:
+                if col_name not in columns:
+                    columns[col_name] = [None] * row_count
+        
+        for row, (pos_ids, word_ids) in enumerate(keys):
+            for col_name, word_id in zip(pos_columns[pos_ids], word_ids):
+                columns[col_name][row] = vocab[word_id]
+        
+        df = pd.DataFrame(columns)
+        sort_column = 'Log_Likelihood' if isinstance(pattern_data, CollocationResult) else 'Occurrences'
+        df = df.sort_values(sort_column, ascending=False)
+        
+        return df
+    
+    def create_columnar_pattern_dataframe(self, pattern_data):
+        """Create a typed pattern DataFrame (one column per position) for Parquet/Arrow"""
+        import pandas as pd
+        
+        strings = pattern_data.vocab.strings
+        keys = list(pattern_data.keys())
+        max_length = max((len(word_ids) for _, word_ids in keys), default=0)
+        
+        columns = {
+            'Pattern': pd.Categorical([pattern_data.pos_pattern(key) for key in keys]),
+            'Length': pd.array([len(word_ids) for _, word_ids in keys], dtype='int8' if max_length < 128 else 'int16'),
+        }
+        for i in range(max_length):
+            columns[f'Word_{i+1}'] = pd.array([strings[word_ids[i]] if i < len(word_ids) else None
+                                               for _, word_ids in keys], dtype='string')
+        columns['Occurrences'] = pd.array([pattern_data[key] for key in keys], dtype='int64')
+        sort_column = 'Occurrences'
+        if isinstance(pattern_data, CollocationResult):
+            for name, values in pattern_data.score_columns(keys).items():
+                columns[name] = pd.array(values, dtype='float64')
+            sort_column = 'Log_Likelihood'
+        
+        df = pd.DataFrame(columns)
+        df = df.sort_values(sort_column, ascending=False, kind='stable')
+        
+        return df
+    
+    def mark_startup(self, label):
+        """Print elapsed time since module import started (--startup-timing)"""
+        if self.startup_timing:
+            print(f"[startup] {label:<28} {(time.perf_counter() - _MODULE_START) * 1000:8.1f} ms", flush=True)
+    
+    def prewarm_imports(self, modules=PREWARM_MODULES):
+        """Import heavy optional modules in a background thread so first use is fast"""
+        def worker():
+            for name in modules:
+                if name in sys.modules:
+                    continue
+                start = time.perf_counter()
+                try:
+                    importlib.import_module(name)
+                except Exception:
+                    continue  # Optional dependency not installed
+                if self.startup_timing:
+                    print(f"[prewarm] {name:<28} {(time.perf_counter() - start) * 1000:8.1f} ms", flush=True)
+            # Build the shared language identifier (seeds langdetect once)
+            get_language_identifier()
+            # Start the NLP worker process, so that it is ready by the first analysis
+            if self.nlp_worker is not None:
+                self.nlp_worker.start()
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def run(self):
+        """Launch the application"""
+        try:
+            # Window icon (optional)
+            # self.window.iconbitmap()  # Use .ico file if available
+            pass
+        except:
+            pass
+            
+        try:
+            self.window.mainloop()
+        finally:
+            if self.nlp_worker is not None:
+                self.nlp_worker.stop()
+
+# #################################
+# Memory measurement and budget
+# #################################
+
+def current_rss_bytes():
+    """Resident set size of this process in bytes (0 if unknown)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        pass
+    try:
+        import resource
+        # Peak, not current, where /proc and psutil are unavailable (bytes on macOS, KB elsewhere)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except Exception:
+        return 0
+
+
+class PeakMemorySampler:
+    """Context manager sampling RSS in a background thread; .peak holds the maximum in bytes,
+    .start the RSS on entry"""
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start = self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+        
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_bytes())
+            self._stop.wait(self.interval)
+            
+    def __enter__(self):
+        self.start = self.peak = current_rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return False
+    
+    @property
+    def growth(self):
+        """Peak RSS above the RSS on entry in bytes: what the measured block itself needed"""
+        return self.peak - self.start
+
+
+def available_memory_bytes():
+    """Memory available to new allocations in bytes (None if unknown)"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except Exception:
+        return None
+
+
+def format_bytes(size):
+    """Human-readable size: '850 MB' or '1.2 GB'"""
+    return f"{size / 1024 ** 2:.0f} MB" if size < 1024 ** 3 else f"{size / 1024 ** 3:.1f} GB"
+
+
+class MemoryPlan:
+    """Outcome of MemoryGovernor.plan(): how to parse the text and what it is expected to cost"""
+    def __init__(self, estimate, limit, chunk_chars=None, batch_size=64, workers=1,
+                 keep_annotations=True, fits=True):
+        self.estimate = estimate                  # Expected peak RSS in bytes
+        self.limit = limit                        # Budget, capped by available memory
+        self.chunk_chars = chunk_chars            # None: segments are parsed whole
+        self.batch_size = batch_size              # Documents in flight per parse batch
+        self.workers = workers                    # spaCy nlp.pipe processes
+        self.keep_annotations = keep_annotations  # Reuse the TokenTables for further analyses
+        self.fits = fits                          # False: over the limit even at the smallest chunk size
+        
+    def summary(self):
+        """One-line description for the results header"""
+        parts = [f"estimated {format_bytes(self.estimate)} of {format_bytes(self.limit)}"]
+        parts.append(f"chunks of {self.chunk_chars:,} chars" if self.chunk_chars else "whole segments")
+        parts.append(f"{self.workers} worker{'s' if self.workers > 1 else ''}")
+        parts.append("annotations kept" if self.keep_annotations else "annotations dropped")
+        return " · ".join(parts)
+
+
+class MemoryGovernor:
+    """Estimates the peak memory of an analysis from text size, languages and engine, and plans
+    chunk size, worker count and annotation reuse to stay within a memory budget"""
+    
+    # Resident size of a loaded pipeline (small spaCy models, Stanza grc with its torch runtime)
+    MODEL_BYTES = {'spacy': 150 * 1024 ** 2, 'stanza': 900 * 1024 ** 2}
+    # Peak bytes per character while a parsed document of that size is alive
+    PARSE_BYTES_PER_CHAR = {'spacy': 300, 'stanza': 1500}
+    TABLE_BYTES_PER_CHAR = 16      # TokenTable columns (about 40 bytes per token), vocabulary, concordance postings
+    TEXT_BYTES_PER_CHAR = 4        # str (up to 2 bytes/char for Greek) plus slices and lowercase copies
+    
+    MIN_CHUNK_CHARS = 2000         # Below this, parse quality suffers more than memory gains
+    MAX_CHUNK_CHARS = 200000
+    MAX_DOC_CHARS = 1000000        # spaCy's default nlp.max_length
+    PARALLEL_MIN_CHARS = 500000    # Worker processes only pay off on large texts
+    DEFAULT_BUDGET_SHARE = 0.75    # Share of available memory used when no budget is configured
+    KEEP_ANNOTATIONS_SHARE = 0.25  # Largest share of the limit kept for annotations between runs
+    
+    def __init__(self, budget_bytes=None, max_workers=None, keep_annotations=True):
+        self.budget_bytes = budget_bytes
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.keep_annotations = keep_annotations
+        
+    def limit(self):
+        """Memory limit in bytes for the whole process: the budget capped by available memory"""
+        rss = current_rss_bytes()
+        available = available_memory_bytes()
+        headroom = rss + int(available * self.DEFAULT_BUDGET_SHARE) if available is not None else None
+        if self.budget_bytes and headroom is not None:
+            return min(self.budget_bytes, headroom)
+        return self.budget_bytes or headroom or rss + 2 * 1024 ** 3
+        
+    def check_file(self, file_size):
+        """(fits, estimate, limit) for loading a file of file_size bytes"""
+        estimate = current_rss_bytes() + file_size * self.TEXT_BYTES_PER_CHAR
+        limit = self.limit()
+        return estimate <= limit, estimate, limit
+    
+    def plan(self, groups, loaded_engines=(), parse=True):
+        """Plan an analysis over groups ({language: [(start, end), ...]}).
+        loaded_engines are the engines whose models are already resident."""
+        rss = current_rss_bytes()
+        limit = self.limit()
+        total_chars = sum(end - start for spans in groups.values() for start, end in spans)
+        if not parse:
+            estimate = rss + total_chars * self.TEXT_BYTES_PER_CHAR
+            return MemoryPlan(estimate, limit, keep_annotations=False, fits=estimate <= limit)
+        
+        engines = {'stanza' if language == "Ancient Greek" else 'spacy' for language in groups}
+        per_char = max(self.PARSE_BYTES_PER_CHAR[engine] for engine in engines)
+        fixed = (rss + total_chars * self.TEXT_BYTES_PER_CHAR + total_chars * self.TABLE_BYTES_PER_CHAR +
+                 sum(self.MODEL_BYTES[engine] for engine in engines - set(loaded_engines)))
+        headroom = limit - fixed
+        
+        # Whole segments if the largest document fits, otherwise the largest chunk that does.
+        # Large spaCy texts are always chunked so that worker processes have documents to share,
+        # and no document may exceed the pipelines' length limit.
+        largest = max((end - start for spans in groups.values() for start, end in spans), default=0)
+        parallel = engines == {'spacy'} and total_chars >= self.PARALLEL_MIN_CHARS and self.max_workers > 1
+        batch_size, chunk_chars = TextAnalyzer.PIPE_BATCH_SIZE, None
+        if largest * per_char > headroom or parallel or largest > self.MAX_DOC_CHARS:
+            batch_size = 4
+            chunk_chars = int(headroom / (per_char * batch_size)) if headroom > 0 else 0
+            chunk_chars = max(self.MIN_CHUNK_CHARS, min(self.MAX_CHUNK_CHARS, chunk_chars))
+            largest = chunk_chars * batch_size
+        in_flight = largest * per_char
+        estimate = fixed + in_flight
+        
+        # Extra spaCy processes each hold a model and their own documents in flight
+        workers = 1
+        if parallel:
+            per_worker = self.MODEL_BYTES['spacy'] + in_flight
+            spare = max(0, headroom - in_flight)
+            workers = max(1, min(self.max_workers, 1 + int(spare // per_worker)))
+            estimate += (workers - 1) * per_worker
+        
+        # Annotations stay resident for further analyses only while they are a small part of the limit
+        keep = (self.keep_annotations and estimate <= limit and
+                total_chars * self.TABLE_BYTES_PER_CHAR <= limit * self.KEEP_ANNOTATIONS_SHARE)
+        return MemoryPlan(estimate, limit, chunk_chars, batch_size, workers, keep, estimate <= limit)
+
+
+# #################################
+# Benchmark suite (python Talos_Text_Analyser.py --benchmark)
+# #################################
+
+# Synthetic lexicons: POS -> words; VERB entries are (form, lemma)
+BENCHMARK_LEXICONS = {
+    "English": {
+        "DET": ["the", "a", "this", "every"],
+        "ADJ": ["big", "red", "old", "bright", "quiet", "ancient", "small", "green"],
+        "NOUN": ["house", "river", "city", "ship", "letter", "garden", "mountain", "story"],
+        "VERB": [("sees", "see"), ("builds", "build"), ("finds", "find"), ("carries", "carry"), ("writes", "write")],
+        "ADP": ["of", "in", "near", "with", "from"],
+        "PERSON": ["John", "Mary", "Homer", "Helen"],
+        "GPE": ["London", "Athens", "Crete", "Paris"]
+    },
+    "Modern Greek": {
+        "DET": ["ο", "η", "το", "ένα"],
+        "ADJ": ["μεγάλο", "κόκκινο", "παλιό", "ήσυχο", "όμορφο", "μικρό"],
+        "NOUN": ["σπίτι", "ποτάμι", "πλοίο", "γράμμα", "βουνό", "δέντρο"],
+        "VERB": [("βλέπει", "βλέπω"), ("χτίζει", "χτίζω"), ("βρίσκει", "βρίσκω"), ("γράφει", "γράφω")],
+        "ADP": ["σε", "από", "με", "για"],
+        "PERSON": ["Γιάννης", "Μαρία", "Νίκος"],
+        "GPE": ["Αθήνα", "Κρήτη", "Θεσσαλονίκη"]
+    },
+    "Ancient Greek": {
+        "DET": ["ὁ", "ἡ", "τὸ", "τοῦ"],
+        "ADJ": ["καλὸς", "μέγας", "σοφός", "ἀγαθὸς", "παλαιός"],
+        "NOUN": ["λόγος", "ἄνθρωπος", "θεός", "πόλις", "ναῦς", "οἶκος", "ποταμός"],
+        "VERB": [("ὁρᾷ", "ὁράω"), ("γράφει", "γράφω"), ("λέγει", "λέγω"), ("φέρει", "φέρω"), ("ἔχει", "ἔχω")],
+        "ADP": ["ἐν", "εἰς", "ἐκ", "πρὸς", "ἀπὸ"],
+        "PERSON": ["Ὅμηρος", "Ἀχιλλεύς", "Ἑλένη", "Ὀδυσσεύς"],
+        "GPE": ["Ἀθῆναι", "Τροία", "Κρήτη"]
+    }
+}
+
+BENCHMARK_SENTENCES = [
+    ["DET", "ADJ", "NOUN", "VERB", "DET", "NOUN", "ADP", "DET", "NOUN"],
+    ["PERSON", "VERB", "DET", "ADJ", "ADJ", "NOUN", "ADP", "GPE"],
+    ["DET", "NOUN", "ADP", "NOUN", "VERB", "DET", "ADJ", "NOUN"],
+    ["PERSON", "VERB", "NOUN", "ADP", "DET", "NOUN", "ADP", "GPE"]
+]
+
+
+def generate_synthetic_text(language, n_words, seed=0):
+    """Deterministic synthetic corpus of about n_words words built from BENCHMARK_LEXICONS"""
+    import random
+    rng = random.Random(f"{language}/{n_words}/{seed}")
+    lexicon = BENCHMARK_LEXICONS[language]
+    paragraphs, sentences, words = [], [], 0
+    
+    while words < n_words:
+        template = rng.choice(BENCHMARK_SENTENCES)
+        tokens = []
+        for pos in template:
+            entry = rng.choice(lexicon[pos])
+            tokens.append(entry[0] if isinstance(entry, tuple) else entry)
+        sentence = " ".join(tokens)
+        sentences.append(sentence[0].upper() + sentence[1:] + ".")
+        words += len(tokens)
+        if len(sentences) == 8:
+            paragraphs.append(" ".join(sentences))
+            sentences = []
+    if sentences:
+        paragraphs.append(" ".join(sentences))
+    
+    return "\n\n".join(paragraphs)
+
+
+class StubPipeline:
+    """Model-free pipeline with a Stanza-like interface: tags tokens from
+    BENCHMARK_LEXICONS so analyses can be benchmarked without downloaded models"""
+    TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+    
+    class Word:
+        __slots__ = ('text', 'upos', 'lemma', 'start_char')
+        
+        def __init__(self, text, upos, lemma, start_char):
+            self.text, self.upos, self.lemma, self.start_char = text, upos, lemma, start_char
+            
+        @property
+        def parent(self):
+            # Stanza words reach start_char through their token
+            return self
+    
+    class Sentence:
+        def __init__(self, words, text):
+            self.words, self.text = words, text
+            
+    class Document:
+        def __init__(self, sentences, text):
+            self.sentences, self.text = sentences, text
+    
+    def __init__(self, language):
+        self.tags = {}
+        for pos, entries in BENCHMARK_LEXICONS[language].items():
+            upos = "PROPN" if pos in ("PERSON", "GPE") else pos
+            for entry in entries:
+                form, lemma = entry if isinstance(entry, tuple) else (entry, entry)
+                self.tags[form.lower()] = (upos, lemma)
+                
+    def __call__(self, text):
+        if isinstance(text, list):
+            return [self(getattr(document, 'text', document)) for document in text]
+        
+        sentences = []
+        start = 0
+        for m in list(SENTENCE_END_RE.finditer(text)) + [None]:
+            end = m.start() if m else len(text)
+            words = []
+            for token in self.TOKEN_RE.finditer(text, start, end):
+                form = token.group()
+                upos, lemma = self.tags.get(form.lower(), ("NOUN" if form.isalpha() else "PUNCT", form.lower()))
+                words.append(self.Word(form, upos, lemma, token.start()))
+            if words:
+                sentences.append(self.Sentence(words, text[start:end]))
+            start = m.end() if m else end
+        return self.Document(sentences, text)
+    
+    def pipe(self, texts, batch_size=None):
+        return (self(text) for text in texts)
+
+
+def make_spacy_stub(language):
+    """spacy.blank pipeline with a stub component tagging POS, lemmas and entities from the lexicons"""
+    import spacy
+    from spacy.language import Language
+    from spacy.tokens import Span
+    
+    codes = {"English": "en", "Modern Greek": "el"}
+    
+    if not Language.has_factory("talos_stub_tagger"):
+        @Language.factory("talos_stub_tagger", default_config={"language": "English"})
+        def create_stub_tagger(nlp, name, language):
+            tagger = StubPipeline(language)
+            entity_labels = {entry.lower(): pos for pos in ("PERSON", "GPE")
+                             for entry in BENCHMARK_LEXICONS[language][pos]}
+            
+            def tag(doc):
+                entities = []
+                for token in doc:
+                    upos, lemma = tagger.tags.get(token.lower_, ("NOUN" if token.is_alpha else "PUNCT", token.lower_))
+                    token.pos_ = upos
+                    token.lemma_ = lemma
+                    if token.lower_ in entity_labels:
+                        entities.append(Span(doc, token.i, token.i + 1, label=entity_labels[token.lower_]))
+                doc.ents = entities
+                return doc
+            return tag
+    
+    nlp = spacy.blank(codes.get(language, "xx"))
+    nlp.add_pipe("sentencizer")
+    nlp.add_pipe("talos_stub_tagger", config={"language": language})
+    return nlp
+
+
+def install_stub_models(engine, languages):
+    """Attach stub pipelines to a headless engine; returns the stub kind per language"""
+    kinds = {}
+    for language in languages:
+        if language == "Ancient Greek":
+            engine.stanza_nlp = StubPipeline(language)
+            kinds[language] = "stanza-stub"
+            continue
+        try:
+            engine.spacy_models[language] = make_spacy_stub(language)
+            kinds[language] = "spacy.blank+stub"
+        except ImportError:
+            engine.spacy_models[language] = StubPipeline(language)
+            kinds[language] = "stanza-stub"
+    return kinds
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_benchmarks(sizes=(1000, 10000, 100000), languages=("English", "Modern Greek", "Ancient Greek"),
+                   repeat=5, baseline_path=None, save_baseline=False, tolerance=0.25):
+    """Run every analysis path headlessly on synthetic corpora; compare with / write a JSON baseline.
+    Returns the number of regressions against the baseline."""
+    import gc
+    import platform
+    import tempfile
+    
+    engine = TextAnalyzer(headless=True)
+    # Every run parses in one process, so latencies stay comparable with the baseline
+    engine.memory_governor = MemoryGovernor(engine.memory_governor.budget_bytes, max_workers=1, keep_annotations=False)
+    engine.annotation_cache = None  # Repeated runs would otherwise measure cache hits
+    engine.checkpoints = False
+    stubs = install_stub_models(engine, languages)
+    export_dir = tempfile.mkdtemp(prefix="talos_bench_")
+    
+    paths = [
+        ("detect_language", None),
+        ("words", "words"),
+        ("nouns", "nouns"),
+        ("entities", "persons"),
+        ("lemmas", "lemmas"),
+        ("patterns", "patterns"),
+        ("collocations", "collocations"),
+        ("custom_patterns", "custom"),
+        ("save_to_file", None)
+    ]
+    export_formats = ['csv', 'excel', 'parquet']
+    
+    results = {}
+    for language in languages:
+        for size in sizes:
+            text = generate_synthetic_text(language, size)
+            n_words = len(text.split())
+            engine.load_text(text, f"synthetic_{language}_{size}.txt")
+            last_result = None
+            
+            for path_name, analysis in paths:
+                latencies = []
+                # All paths share this process: memory is measured as growth over the path's own start
+                gc.collect()
+                with PeakMemorySampler() as memory:
+                    # One extra warm-up run (lazy imports, first allocations) is not timed
+                    for run_index in range(repeat + 1):
+                        start = time.perf_counter()
+                        if path_name == "detect_language":
+                            engine.detect_language(text[:5000])
+                        elif path_name == "save_to_file":
+                            for format_type in list(export_formats):
+                                target = os.path.join(export_dir, f"bench{engine.EXPORT_FORMATS[format_type][0]}")
+                                try:
+                                    engine.write_results(last_result, target, format_type, "benchmark")
+                                except (ImportError, RuntimeError):
+                                    export_formats.remove(format_type)  # Optional writer missing
+                        else:
+                            function = engine.analysis_function(analysis, ["ADJ", "NOUN"])
+                            last_result = function()
+                        if run_index > 0:
+                            latencies.append(time.perf_counter() - start)
+                
+                median = percentile(latencies, 0.5)
+                key = f"{language}/{size}/{path_name}"
+                # Language detection only reads the first 5000 characters
+                path_words = len(text[:5000].split()) if path_name == "detect_language" else n_words
+                results[key] = {
+                    "words": path_words,
+                    "throughput_words_per_s": path_words / median if median > 0 else None,
+                    "latency_p50_ms": median * 1000,
+                    "latency_p90_ms": percentile(latencies, 0.9) * 1000,
+                    "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+                    "peak_rss_growth_mb": memory.growth / (1024 * 1024)
+                }
+                print(f"{key:<45} p50 {median * 1000:9.2f} ms   "
+                      f"{results[key]['throughput_words_per_s'] or 0:12,.0f} words/s   "
+                      f"RSS +{results[key]['peak_rss_growth_mb']:7.1f} MB", flush=True)
+    
+    report = {
+        "meta": {
+            "created": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "pipelines": stubs,
+            "export_formats": export_formats
+        },
+        "results": results
+    }
+    
+    # Compare against the baseline
+    regressions = 0
+    if baseline_path and os.path.exists(baseline_path) and not save_baseline:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f).get("results", {})
+        print(f"\nComparison with {baseline_path} (tolerance {tolerance:.0%}):")
+        for key, metrics in results.items():
+            if key not in baseline:
+                continue
+            ratio = metrics["latency_p50_ms"] / max(baseline[key]["latency_p50_ms"], 1e-6)
+            status = "REGRESSION" if ratio > 1 + tolerance else ("faster" if ratio < 1 - tolerance else "ok")
+            regressions += status == "REGRESSION"
+            print(f"  {key:<45} {ratio:6.2f}x  {status}")
+        print(f"{regressions} regression(s)")
+    
+    if baseline_path and (save_baseline or not os.path.exists(baseline_path)):
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline written to {baseline_path}")
+    
+    return regressions
+
+
+def check_token_patterns(trials=1000, seed=0):
+    """Compare TokenPattern matching with a reference on random patterns and token sequences.
+    The reference turns each token into one character (the mask of the tests it passes) and the
+    pattern into a Python regex over them; the longest match ending at a token is the earliest
+    start, at most MAX_MATCH tokens back, at which re.fullmatch succeeds. Prints a summary;
+    returns the number of mismatches."""
+    import random
+    
+    rng = random.Random(seed)
+    vocab = Vocabulary()
+    tags, words, lemmas = ["ADJ", "NOUN", "DET", "ADP", "VERB", "PROPN"], ["big", "red", "car", "the", "of"], ["big", "car", "be"]
+    
+    def random_test():
+        options = []
+        for _ in range(rng.choice([1, 1, 2])):
+            kind = rng.choice(["pos", "pos", "*", "word", "lemma", "and"])
+            options.append({"pos": lambda: rng.choice(tags), "*": lambda: "*",
+                            "word": lambda: "word=" + rng.choice(words),
+                            "lemma": lambda: "lemma=" + rng.choice(lemmas).upper(),
+                            "and": lambda: rng.choice(tags) + "&word=" + rng.choice(words)}[kind]())
+        return "|".join(options)
+    
+    def random_pattern(depth=0):
+        items = []
+        for _ in range(rng.randint(1, 3)):
+            if depth > 1 or rng.random() < 0.7:
+                items.append(random_test() + rng.choice(["", "", "", "?", "*", "+", "{1,2}", "{2}", "{0,3}"]))
+            else:
+                # Bounded repeats of groups only: re backtracks exponentially on nested unbounded ones
+                items.append(f"({random_pattern(depth + 1)})" + rng.choice(["", "", "?", "{1,2}", "{2}"]))
+        pattern = " ".join(items)
+        return pattern + " | " + random_pattern(depth + 1) if depth < 2 and rng.random() < 0.2 else pattern
+    
+    def to_regex(matcher, node):
+        kind = node[0]
+        if kind == 'test':
+            masks = [mask for mask in range(1 << len(matcher.atoms))
+                     if any(mask & required == required for required in matcher.tests[node[1]])]
+            return "[" + "".join(re.escape(chr(0x100 + mask)) for mask in masks) + "]"
+        if kind == 'seq':
+            return "".join(f"(?:{to_regex(matcher, item)})" for item in node[1])
+        if kind == 'alt':
+            return "(?:" + "|".join(to_regex(matcher, option) for option in node[1]) + ")"
+        _, item, low, high = node
+        return f"(?:{to_regex(matcher, item)}){{{low},{'' if high is None else high}}}"
+    
+    checked = rejected = mismatches = 0
+    for _ in range(trials):
+        pattern = random_pattern()
+        try:
+            matcher = TokenPattern(pattern, vocab)
+        except ValueError:
+            rejected += 1  # Patterns that can match no tokens
+            continue
+        matcher.MAX_MATCH = rng.choice([TokenPattern.MAX_MATCH, 3, 8])  # Short bounds exercise the window
+        tokens = [(vocab.add(rng.choice(tags)), vocab.add(rng.choice(words)), vocab.add(rng.choice(lemmas)))
+                  for _ in range(rng.randint(1, 25))]
+        pos_ids, word_ids, lemma_ids = zip(*tokens)
+        encoded = "".join(chr(0x100 + (matcher.pos_bits.get(pos, 0) | matcher.word_bits.get(word, 0) |
+                                       matcher.lemma_bits.get(vocab[lemma], 0)))
+                          for pos, word, lemma in tokens)
+        regex = re.compile(to_regex(matcher, matcher.parse(pattern)))
+        expected = []
+        for end in range(1, len(tokens) + 1):
+            start = next((start for start in range(max(0, end - matcher.MAX_MATCH), end)
+                          if regex.fullmatch(encoded, start, end)), None)
+            if start is not None:
+                expected.append((start, end))
+        checked += 1
+        if list(matcher.finditer(pos_ids, word_ids, lemma_ids)) != expected:
+            mismatches += 1
+            print(f"  MISMATCH  {pattern}")
+    print(f"Token patterns: {checked} random patterns checked against re.fullmatch, {rejected} rejected, "
+          f"{mismatches} mismatch(es)")
+    return mismatches
+
+
+# #################################
+# Corpus document-term matrix
+# #################################
+DTM_FEATURES = ("words", "lemmas", "nouns")
+
+
+class NearDuplicateDetector:
+    """MinHash signatures over word shingles with LSH banding: finds texts whose estimated
+    Jaccard similarity reaches threshold. Texts are normalised (case, accents/breathings)
+    so that witnesses differing only in diacritics still match."""
+    PRIME = (1 << 61) - 1
+    BLOCK = 1 << 16  # Shingles hashed per NumPy block
+    
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=5, seed=1):
+        import numpy as np
         
-    def save_to_file(self, data, default_name, title, format_type):
-        """Enhanced export with format choice and pattern-specific handling"""
-        timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M')
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+        # Band count whose S-curve threshold (1/b)^(1/r) is closest to the requested one
+        self.bands = min((b for b in range(1, num_perm + 1) if num_perm % b == 0),
+                         key=lambda b: abs((1 / b) ** (b / num_perm) - threshold))
+        self.rows = num_perm // self.bands
+        self.buckets = [{} for _ in range(self.bands)]  # band -> {band hash: [keys]}
+        self.signatures = {}
         
-        # Determine file extension and filter
-        if format_type == 'excel':
-            extension = ".xlsx"
-            filetypes = [("Excel files", "*.xlsx")]
+    def shingles(self, text):
+        """32-bit hashes of the normalised word shingles of text"""
+        import unicodedata
+        import zlib
+        
+        normalised = "".join(c for c in unicodedata.normalize("NFD", text.lower()) if not unicodedata.combining(c))
+        words = re.findall(r"\w+", normalised)
+        size = min(self.shingle_size, len(words)) or 1
+        return {zlib.crc32(" ".join(words[i:i + size]).encode('utf-8'))
+                for i in range(max(1, len(words) - size + 1))}
+    
+    def signature(self, text):
+        """MinHash signature (uint64 array of num_perm values) of text"""
+        import numpy as np
+        
+        hashes = np.fromiter(self.shingles(text), dtype=np.uint64)
+        signature = np.full(len(self.a), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(hashes), self.BLOCK):
+            block = hashes[start:start + self.BLOCK]
+            permuted = (self.a[:, None] * block[None, :] + self.b[:, None]) % np.uint64(self.PRIME)
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature
+    
+    def similarity(self, first, second):
+        """Estimated Jaccard similarity of two signatures"""
+        return float((first == second).mean())
+    
+    def query(self, signature):
+        """Best earlier key at or above the threshold (None if there is none)"""
+        candidates = set()
+        for band, buckets in enumerate(self.buckets):
+            candidates.update(buckets.get(signature[band * self.rows:(band + 1) * self.rows].tobytes(), ()))
+        scored = [(self.similarity(signature, self.signatures[key]), key) for key in candidates]
+        scored = [(score, key) for score, key in scored if score >= self.threshold]
+        return max(scored, key=lambda item: item[0])[1] if scored else None
+    
+    def add(self, key, signature):
+        """Index signature under key"""
+        self.signatures[key] = signature
+        for band, buckets in enumerate(self.buckets):
+            buckets.setdefault(signature[band * self.rows:(band + 1) * self.rows].tobytes(), []).append(key)
+
+
+def build_document_term_matrix(engine, paths, feature="words", progress=None, dedupe_threshold=None, pool=None):
+    """Document x term count matrix (scipy CSR) over paths, holding one file in memory at a time
+    and growing the term vocabulary as it goes. With dedupe_threshold, a file whose MinHash
+    similarity to an earlier representative reaches it is not analysed: it reuses the
+    representative's row. With a ForkedWorkerPool, the files are analysed in its workers.
+    Returns (matrix, terms, documents, clusters), clusters mapping each representative to its
+    near-duplicates."""
+    try:
+        import numpy as np
+        import scipy.sparse as sparse
+    except ImportError:
+        raise RuntimeError("The document-term matrix requires scipy.\nRun: pip install scipy")
+    if feature not in DTM_FEATURES:
+        raise ValueError(f"Unknown feature '{feature}' (expected one of: {', '.join(DTM_FEATURES)})")
+    
+    term_ids, terms, documents = {}, [], []
+    rows, columns, counts = array('i'), array('i'), array('q')  # COO triplets
+    detector = NearDuplicateDetector(dedupe_threshold) if dedupe_threshold else None
+    clusters = {}  # representative row -> duplicate rows
+    representative_rows = {}  # representative row -> (first, end) of its triplets
+    duplicates = []  # (row, representative row): copied once every representative is counted
+    pending, languages = [], set()  # Rows left to the worker pool, languages its parent loads
+    if engine.backend_url:
+        pool = None
+    
+    def add_counts(row, result):
+        first = len(rows)
+        for term, count in result.items():
+            term_id = term_ids.get(term)
+            if term_id is None:
+                term_id = term_ids[term] = len(terms)
+                terms.append(term)
+            rows.append(row)
+            columns.append(term_id)
+            counts.append(count)
+        representative_rows[row] = (first, len(rows))
+        if progress is not None:
+            progress(len(representative_rows) + len(duplicates), len(paths))
+    
+    for row, path in enumerate(paths):
+        text, _, _ = read_text_file(path)
+        documents.append(str(path))
+        
+        if detector is not None:
+            signature = detector.signature(text)
+            representative = detector.query(signature)
+            if representative is not None:
+                # Near-duplicate: copy the representative's counts instead of parsing
+                clusters[representative].append(row)
+                duplicates.append((row, representative))
+                if progress is not None:
+                    progress(len(representative_rows) + len(duplicates), len(paths))
+                continue
+            detector.add(row, signature)
+            clusters[row] = []
+        
+        if pool is not None:
+            # Analysed in a worker: the parent only notes which pipelines to load before forking,
+            # detecting languages and segments as the worker will (so none loads a model privately)
+            pending.append(row)
+            if feature != "words":
+                engine.load_text(text, path)
+                languages.update(engine.language_groups())
+            continue
+        engine.load_text(text, path)
+        del text
+        try:
+            result = engine.analysis_function(feature)()
+        except RuntimeError as e:
+            raise RuntimeError(f"{Path(path).name}: {e}")
+        add_counts(row, result)
+    
+    if pending:
+        engine.load_parsed("", engine.detected_language)  # Not copied into the workers
+        pool.start(sorted(languages))
+        for row, result in pool.analyze_files(feature, [(row, paths[row]) for row in pending]):
+            add_counts(row, result)
+    for row, representative in duplicates:
+        first, end = representative_rows[representative]
+        rows.extend(array('i', [row]) * (end - first))
+        columns.extend(columns[first:end])
+        counts.extend(counts[first:end])
+    
+    engine.load_parsed("", engine.detected_language)  # Release the last file and its annotations
+    matrix = sparse.csr_matrix((np.frombuffer(counts, dtype=np.int64),
+                                (np.frombuffer(rows, dtype=np.intc), np.frombuffer(columns, dtype=np.intc))),
+                               shape=(len(documents), len(terms)))
+    clusters = {documents[row]: [documents[member] for member in members]
+                for row, members in clusters.items() if members}
+    return matrix, terms, documents, clusters
+
+
+def save_document_term_matrix(path, matrix, terms, documents, clusters=None):
+    """Save matrix as .npz with .vocab.txt (one term per column), .docs.txt (one file per row)
+    and, if there are near-duplicates, .clusters.tsv (representative, member) next to it;
+    returns the written paths"""
+    import scipy.sparse as sparse
+    
+    base = path[:-4] if path.endswith(".npz") else path
+    files = [f"{base}.npz", f"{base}.vocab.txt", f"{base}.docs.txt"]
+    sparse.save_npz(files[0], matrix)
+    for file_path, lines in zip(files[1:], (terms, documents)):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{line}\n" for line in lines)
+    if clusters:
+        files.append(f"{base}.clusters.tsv")
+        with open(files[-1], 'w', encoding='utf-8') as f:
+            f.write("representative\tmember\n")
+            f.writelines(f"{representative}\t{member}\n"
+                         for representative, members in clusters.items() for member in members)
+    return files
+
+
+# #################################
+# Result store (SQLite, TALOS_HOME/results.sqlite)
+# #################################
+RESULT_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created TEXT NOT NULL,
+    file TEXT,
+    file_hash TEXT,
+    file_chars INTEGER,
+    analysis TEXT NOT NULL,
+    pattern TEXT,
+    title TEXT,
+    language TEXT,
+    languages TEXT,
+    engine TEXT,
+    models TEXT,
+    kind TEXT NOT NULL,
+    unique_count INTEGER,
+    total INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    language TEXT,
+    element TEXT NOT NULL,
+    pattern TEXT,
+    count INTEGER NOT NULL,
+    pmi REAL,
+    log_likelihood REAL,
+    t_score REAL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS results_element ON results(element);
+CREATE INDEX IF NOT EXISTS results_pattern ON results(pattern);
+CREATE INDEX IF NOT EXISTS runs_file ON runs(file_hash, analysis, pattern);
+CREATE VIEW IF NOT EXISTS frequencies AS
+    SELECT runs.id AS run_id, runs.file, runs.analysis, runs.pattern AS run_pattern, runs.engine,
+           results.language, results.element, results.pattern, results.count,
+           results.pmi, results.log_likelihood, results.t_score
+    FROM results JOIN runs ON runs.id = results.run_id
+    WHERE runs.id IN (SELECT MAX(id) FROM runs GROUP BY file_hash, analysis, pattern);
+"""
+
+
+class ResultStore:
+    """Every displayed analysis result, recorded in a local SQLite database: one 'runs' row per
+    run (file hash, analysis, pattern, language, models, totals) and one 'results' row per
+    element (language NULL for the merged counts, else the per-language breakdown). The
+    'frequencies' view keeps the latest run of each file and analysis, for cross-file queries."""
+    def __init__(self, path):
+        self.path = Path(path)
+        self.connection = None
+        self.lock = threading.Lock()  # Runs are recorded from the GUI and service threads
+        
+    def connect(self):
+        """Open (and if needed create) the database"""
+        import sqlite3
+        
+        if self.connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            connection.executescript(RESULT_STORE_SCHEMA)
+            self.connection = connection
+        return self.connection
+    
+    def record(self, result, analysis, pattern=None, title=None, file=None, file_hash=None, file_chars=None,
+               language=None, languages=(), engine=None, models=None):
+        """Store result as a new run; returns its ID"""
+        data = result_to_json(result)
+        
+        def rows(language_rows, language):
+            for row in language_rows:
+                if "item" in row:
+                    yield (language, row["item"], None, row["count"], None, None, None)
+                else:
+                    yield (language, " ".join(row["words"]), "_".join(row["pos"]), row["count"],
+                           row.get("pmi"), row.get("log_likelihood"), row.get("t_score"))
+        
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO runs (created, file, file_hash, file_chars, analysis, pattern, title, language, "
+                    "languages, engine, models, kind, unique_count, total) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                    (time.strftime('%Y-%m-%dT%H:%M:%S'), file, file_hash, file_chars, analysis, pattern, title,
+                     language, json.dumps(list(languages), ensure_ascii=False),
+                     engine, json.dumps(models, ensure_ascii=False) if models else None,
+                     data["kind"], data["unique"], data["total"]))
+                run_id = cursor.lastrowid
+                insert = ("INSERT INTO results (run_id, language, element, pattern, count, pmi, log_likelihood, "
+                          "t_score) VALUES (?,?,?,?,?,?,?,?)")
+                connection.executemany(insert, ((run_id, *row) for row in rows(data["results"], None)))
+                for breakdown_language, language_rows in data["by_language"].items():
+                    connection.executemany(insert, ((run_id, *row) for row in rows(language_rows, breakdown_language)))
+        return run_id
+    
+    def runs(self, limit=500):
+        """Most recent runs first, as dicts"""
+        with self.lock:
+            cursor = self.connect().execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def load(self, run_id, vocab):
+        """(run dict, result) of a stored run, the result rebuilt with keys interned in vocab"""
+        with self.lock:
+            connection = self.connect()
+            cursor = connection.execute("SELECT * FROM runs WHERE id = ?", (run_id,))
+            row = cursor.fetchone()
+            if row is None:
+                raise KeyError(f"No stored run {run_id}")
+            run = dict(zip([column[0] for column in cursor.description], row))
+            stored = connection.execute("SELECT language, element, pattern, count, pmi, log_likelihood, t_score "
+                                        "FROM results WHERE run_id = ? ORDER BY count DESC", (run_id,)).fetchall()
+        
+        data = {"kind": run["kind"], "results": [], "by_language": {}}
+        for language, element, pattern, count, pmi, log_likelihood, t_score in stored:
+            if run["kind"] == "items":
+                row = {"item": element, "count": count}
+            else:
+                row = {"pos": pattern.split("_"), "words": element.split(" "), "count": count,
+                       "pmi": pmi, "log_likelihood": log_likelihood, "t_score": t_score}
+            (data["results"] if language is None else data["by_language"].setdefault(language, [])).append(row)
+        return run, result_from_json(data, vocab)
+    
+    def query(self, sql, parameters=()):
+        """(column names, rows) of a read-only SQL query over the store"""
+        import sqlite3
+        
+        self.connect()  # Creates the schema on first use
+        connection = sqlite3.connect(f"{self.path.as_uri()}?mode=ro", uri=True)
+        try:
+            cursor = connection.execute(sql, parameters)
+            return [column[0] for column in cursor.description or ()], cursor.fetchall()
+        finally:
+            connection.close()
+
+
+# #################################
+# Local analysis service (python Talos_Text_Analyser.py --serve)
+# #################################
+SERVICE_ANALYSES = ("words", "nouns", "persons", "locations", "lemmas", "patterns", "collocations", "custom")
+DEFAULT_SERVICE_PORT = 8765
+
+
+def result_to_json(result):
+    """JSON form of an analysis result: rows by frequency, per-language rows and totals.
+    Pattern rows carry their POS tags and words as lists, collocation rows also their scores."""
+    is_pattern = isinstance(result, PatternCounter)
+    scores = getattr(result, 'scores', None)
+    
+    def rows(counter):
+        if is_pattern:
+            pattern_rows = []
+            for key, count in counter.most_common():
+                row = {"pos": [result.vocab[pos_id] for pos_id in key[0]],
+                       "words": [result.vocab[word_id] for word_id in key[1]], "count": count}
+                if scores is not None:
+                    row.update(zip(("pmi", "log_likelihood", "t_score"), scores[key]))
+                pattern_rows.append(row)
+            return pattern_rows
+        return [{"item": item, "count": count} for item, count in counter.most_common()]
+    
+    return {
+        "kind": ("collocations" if scores is not None else "patterns") if is_pattern else "items",
+        "unique": len(result),
+        "total": sum(result.values()),
+        "results": rows(Counter(result)),
+        "by_language": {language: rows(counter) for language, counter in getattr(result, 'by_language', {}).items()}
+    }
+
+
+def result_from_json(data, vocab):
+    """Rebuild an AnalysisResult / PatternCounter (keys interned in vocab) from result_to_json output"""
+    if data["kind"] in ("patterns", "collocations"):
+        def key(row):
+            return (tuple(vocab.add(pos) for pos in row["pos"]), tuple(vocab.add(word) for word in row["words"]))
+        
+        def counter(rows):
+            return Counter({key(row): row["count"] for row in rows})
+        if data["kind"] == "collocations":
+            scores = {key(row): (row["pmi"], row["log_likelihood"], row["t_score"]) for row in data["results"]}
+            result = CollocationResult(counter(data["results"]), vocab=vocab, scores=scores)
         else:
-            extension = ".csv" 
-            filetypes = [("CSV files", "*.csv")]
+            result = PatternCounter(counter(data["results"]), vocab=vocab)
+    else:
+        def counter(rows):
+            return Counter({row["item"]: row["count"] for row in rows})
+        result = AnalysisResult(counter(data["results"]))
+    result.by_language = {language: counter(rows) for language, rows in data.get("by_language", {}).items()}
+    return result
+
+
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def is_loopback(host):
+    """Whether host (a name or an address) is this machine's loopback interface"""
+    import ipaddress
+    
+    if host is None:
+        return False
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host.lower() == "localhost"
+
+
+class AnalysisService:
+    """Headless engine with warm pipelines, serving analyses to local clients over HTTP/JSON.
+    Models are loaded once and shared by every client; analyses run one at a time.
+    Files ('path' requests) are read for loopback clients only, and only under root if one is set."""
+    def __init__(self, preload=(), root=None):
+        self.engine = TextAnalyzer(headless=True)
+        self.root = Path(root).resolve() if root else None
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        for language in preload:
+            self.engine.lazy_load_nlp(language)
             
-        filename = f"talos_{default_name}_{timestamp}{extension}"
+    def status(self):
+        """Service health: loaded pipelines, uptime, requests served, memory"""
+        engine = self.engine
+        return {
+            "status": "ok",
+            "analyses": list(SERVICE_ANALYSES),
+            "models": sorted(engine.spacy_models) + (["Ancient Greek"] if engine.stanza_nlp is not None else []),
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "rss_mb": round(current_rss_bytes() / 1024 ** 2, 1),
+            "annotation_cache": engine.annotation_cache.stats() if engine.annotation_cache is not None else None
+        }
+    
+    def analyze(self, analysis, request, local=True):
+        """Run analysis on request["text"] or the text file (any supported encoding or compression) at
+        request["path"] (local: the client is on this machine); returns the JSON response.
+        Raises ValueError for invalid requests and PermissionError for files it may not read."""
+        if analysis not in SERVICE_ANALYSES:
+            raise ValueError(f"Unknown analysis '{analysis}' (expected one of: {', '.join(SERVICE_ANALYSES)})")
         
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=extension,
-            initialfile=filename,
-            filetypes=filetypes,
-            title=f"Save Analysis Results ({format_type.upper()})"
-        )
+        pattern = request.get("pattern")
+        if analysis == "custom":
+            if not (isinstance(pattern, str) or
+                    isinstance(pattern, list) and pattern and all(isinstance(element, str) for element in pattern)):
+                raise ValueError("Custom analysis needs 'pattern': a token pattern such as 'DET? ADJ* NOUN|PROPN', "
+                                 "or a list of its elements such as [\"ADJ\", \"NOUN\"]")
+            TokenPattern(pattern, Vocabulary())  # Raises ValueError for invalid patterns
         
-        if file_path:
+        if isinstance(request.get("text"), str):
+            text, name = request["text"], request.get("name")
+        elif isinstance(request.get("path"), str):
+            name = request["path"]
+            if not local:
+                raise PermissionError("'path' is only accepted from clients on this machine; send 'text'")
+            if self.root is not None and not Path(name).resolve().is_relative_to(self.root):
+                raise PermissionError(f"'path' must be under {self.root}")
+            text, _, _ = read_text_file(name)
+        else:
+            raise ValueError("Request needs 'text' or 'path'")
+        
+        with self.lock:
+            engine = self.engine
+            self.requests += 1
+            trace = engine.begin_run(analysis, pattern)
             try:
-                self.update_status(f"Saving {format_type.upper()} file...", self.colors['accent'])
-                self.start_progress()
+                # A repeated text keeps its detected segments and, if kept, its annotations
+                routing = bool(request.get("segment_routing", True))
+                if text != engine.file_content or routing != engine.segment_routing:
+                    engine.segment_routing = routing
+                    engine.load_text(text, name)
+                engine.selected_file = name
                 
-                # Check if this is pattern data (contains brackets and colons)
-                is_pattern_data = any('[' in str(key) and ']:' in str(key) for key in data.keys())
-                
-                if is_pattern_data:
-                    # Special handling for lexical-syntactic patterns
-                    df = self.create_pattern_dataframe(data)
-                else:
-                    # Standard handling for other analyses
-                    df = pd.DataFrame(list(data.items()), columns=["Element", "Occurrences"])
-                    df = df.sort_values("Occurrences", ascending=False)
+                with engine.stage("analysis"), PeakMemorySampler(0.05) as memory:
+                    result = engine.analysis_function(analysis, pattern)()
+                engine.peak_rss = memory.peak
+                engine.finish_run(result)
                 
-                # Add statistics
-                stats_df = pd.DataFrame({
-                    'Statistic': ['Total Occurrences', 'Unique Elements', 'Average per Element', 'Language Detected', 'NLP Engine'],
-                    'Value': [df['Occurrences'].sum() if 'Occurrences' in df.columns else sum(data.values()), 
-                             len(df), 
-                             df['Occurrences'].mean() if 'Occurrences' in df.columns else sum(data.values())/len(data), 
-                             self.detected_language,
-                             'Stanza' if self.detected_language == 'Ancient Greek' else 'spaCy']
+                response = result_to_json(result)
+                response.update({
+                    "analysis": analysis,
+                    "language": engine.detected_language,
+                    "languages": {language: round(share, 4) for language, share in engine.language_shares()},
+                    "engine": engine.engine_name(),
+                    "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in trace.durations().items()},
+                    "peak_rss_mb": round(memory.peak / 1024 ** 2, 1)
                 })
-                
-                if format_type == 'excel':
-                    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                        df.to_excel(writer, sheet_name='Results', index=False)
-                        stats_df.to_excel(writer, sheet_name='Statistics', index=False)
-                else:
-                    df.to_csv(file_path, index=False, encoding='utf-8-sig')
-                
-                self.stop_progress()
-                messagebox.showinfo("✅ Success", 
-                                  f"Analysis saved successfully!\n\n📄 {Path(file_path).name}")
-                self.update_status(f"Exported: {Path(file_path).name}", self.colors['success'])
-                
+                return response
+            finally:
+                engine.trace = None  # Also when the analysis fails: it must not reach the next request
+
+
+def make_service_handler(service, allowed_hosts=()):
+    """HTTP request handler class for an AnalysisService:
+    GET /health, POST /analyze/<analysis> with a JSON body.
+    Requests must name the service by a loopback name or one of allowed_hosts, in Host and in
+    Origin if sent, so that web pages cannot reach it (cross-site requests, DNS rebinding)."""
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlsplit
+    
+    hosts = {host.lower() for host in (*LOOPBACK_HOSTS, *allowed_hosts)}
+    
+    class ServiceHandler(BaseHTTPRequestHandler):
+        def foreign(self):
+            """Error message if Host or Origin names another site, else None"""
+            host = urlsplit("//" + (self.headers.get("Host") or "")).hostname
+            if host not in hosts:
+                return f"Host '{self.headers.get('Host')}' is not allowed"
+            origin = self.headers.get("Origin")
+            if origin is not None and urlsplit(origin).hostname not in hosts:
+                return f"Origin '{origin}' is not allowed"
+            return None
+        
+        def send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_GET(self):
+            error = self.foreign()
+            if error:
+                self.send_json(403, {"error": error})
+            elif self.path.rstrip("/") in ("", "/health"):
+                self.send_json(200, service.status())
+            else:
+                self.send_json(404, {"error": f"Unknown endpoint {self.path}"})
+        
+        def do_POST(self):
+            prefix = "/analyze/"
+            if not self.path.startswith(prefix):
+                self.send_json(404, {"error": f"Unknown endpoint {self.path}"})
+                return
+            error = self.foreign()
+            if error:
+                self.send_json(403, {"error": error})
+                return
+            # Not a type a web form can send without a CORS preflight
+            if (self.headers.get("Content-Type") or "").split(";")[0].strip().lower() != "application/json":
+                self.send_json(415, {"error": "Content-Type must be application/json"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("Request body must be a JSON object")
+                self.send_json(200, service.analyze(self.path[len(prefix):].strip("/"), request,
+                                                    local=is_loopback(self.client_address[0])))
+            except PermissionError as e:
+                self.send_json(403, {"error": str(e)})
+            except (ValueError, OSError) as e:
+                self.send_json(400, {"error": str(e)})
             except Exception as e:
-                self.stop_progress()
-                messagebox.showerror("❌ Error", f"Save error:\n{str(e)}")
-                
-    def create_pattern_dataframe(self, pattern_data):
-        """Create specialized DataFrame for lexical-syntactic patterns"""
-        rows = []
+                self.send_json(500, {"error": str(e)})
+    
+    return ServiceHandler
+
+
+def serve(host="127.0.0.1", port=DEFAULT_SERVICE_PORT, preload=(), root=None, allowed_hosts=()):
+    """Run the analysis service until interrupted (root: directory 'path' requests may read;
+    allowed_hosts: names other than loopback by which clients may address the service)"""
+    from http.server import ThreadingHTTPServer
+    
+    service = AnalysisService(preload, root)
+    if not is_loopback(host) and host not in ("0.0.0.0", "::"):
+        allowed_hosts = (*allowed_hosts, host)
+    server = ThreadingHTTPServer((host, port), make_service_handler(service, allowed_hosts))
+    print(f"TALOS analysis service on http://{host}:{port} "
+          f"(models: {', '.join(service.status()['models']) or 'loaded on demand'})", flush=True)
+    if not is_loopback(host):
+        print("⚠️ The service is reachable from other machines. They can send 'text' only, and must address it "
+              f"as one of: {', '.join(sorted({*LOOPBACK_HOSTS, *allowed_hosts}))} (--allowed-hosts)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# #################################
+# Micro-batching front end for many small documents
+# #################################
+class MicroBatcher:
+    """asyncio ingestion API for streams of short texts (inscriptions, catalogue entries).
+    Concurrent submissions are grouped per language into micro-batches, flushed when a batch
+    is full or its latency window expires, parsed together with nlp.pipe / Stanza bulk
+    processing and answered with one result per document.
+    
+        async with MicroBatcher(max_latency=0.02) as batcher:
+            results = await asyncio.gather(*(batcher.analyze(text, "nouns") for text in texts))
+    """
+    def __init__(self, engine=None, max_batch=64, max_latency=0.05):
+        import concurrent.futures
+        
+        if engine is None:
+            engine = TextAnalyzer(headless=True)
+            engine.backend_url = None
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_latency = max_latency  # Seconds the first document of a batch may wait for others
+        self.pending = {}  # language -> [(text, analysis, pattern, future)]
+        self.timers = {}  # language -> flush timer of its pending batch
+        self.tasks = set()
+        self.documents = 0
+        self.batches = 0
+        # One worker thread: the engine (models, vocabulary) is used by one batch at a time
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="talos-batch")
+        
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+        return False
+    
+    async def analyze(self, text, analysis="nouns", pattern=None, language=None):
+        """Analyse one document; language is detected offline when not given"""
+        import asyncio
+        
+        if analysis not in SERVICE_ANALYSES:
+            raise ValueError(f"Unknown analysis '{analysis}'")
+        if language is None:
+            language = get_language_identifier().detect(text, use_langdetect=False)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self.pending.setdefault(language, [])
+        batch.append((text, analysis, pattern, future))
+        if len(batch) >= self.max_batch:
+            self.flush(language)
+        elif language not in self.timers:
+            self.timers[language] = loop.call_later(self.max_latency, self.flush, language)
+        return await future
+    
+    def flush(self, language):
+        """Send the pending batch of language to the worker"""
+        import asyncio
+        
+        timer = self.timers.pop(language, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.pending.pop(language, None)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self.run_batch(language, batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+    
+    async def run_batch(self, language, batch):
+        """Process one batch in the worker thread and resolve its futures"""
+        import asyncio
+        
+        items = [(text, analysis, pattern) for text, analysis, pattern, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.process_batch, language, items)
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        # process_batch returns an item's exception in place of its result
+        for (*_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    def process_batch(self, language, items):
+        """Parse the (text, analysis, pattern) items of one language together; one result per item,
+        or the exception the item raised, so one bad document fails only its own future"""
+        engine = self.engine
+        self.batches += 1
+        self.documents += len(items)
         
-        for pattern_string, count in pattern_data.items():
+        # Word counts need no parse; everything else shares one nlp.pipe / Stanza bulk call
+        parse_indices = [i for i, (_, analysis, _) in enumerate(items) if analysis != "words"]
+        tables = {}
+        if parse_indices:
+            if not engine.lazy_load_nlp(language):
+                raise RuntimeError(f"No NLP model available for {language}")
+            texts = [items[i][0] for i in parse_indices]
             try:
-                # Parse pattern string: "[ADJ_NOUN]: beautiful house"
-                if ']:' in pattern_string:
-                    pos_part, word_part = pattern_string.split(']:')
-                    pos_pattern = pos_part.strip('[')
-                    word_pattern = word_part.strip()
-                    
-                    # Split POS pattern and words
-                    pos_tags = pos_pattern.split('_')
-                    words = word_pattern.split()
-                    
-                    # Create row with POS-named columns
-                    row = {'Pattern': pos_pattern, 'Full_Example': word_pattern, 'Occurrences': count}
-                    
-                    # Add columns named by POS type (e.g., ADJ, NOUN, VERB, etc.)
-                    for i, pos_tag in enumerate(pos_tags):
-                        if i < len(words):
-                            # Handle duplicate POS tags by adding suffix
-                            col_name = pos_tag
-                            counter = 1
-                            while col_name in row:
-                                counter += 1
-                                col_name = f"{pos_tag}_{counter}"
-                            
-                            row[col_name] = words[i]
-                    
-                    rows.append(row)
-                else:
-                    # Fallback for malformed patterns
-                    rows.append({
-                        'Pattern': pattern_string,
-                        'Full_Example': '',
-                        'Occurrences': count
-                    })
+                for i, doc in zip(parse_indices, engine.get_nlp_docs(texts, language, self.max_batch)):
+                    tables[i] = [engine.encode_doc(doc, language)]
             except Exception:
-                # Fallback for any parsing errors
-                rows.append({
-                    'Pattern': str(pattern_string),
-                    'Full_Example': '',
-                    'Occurrences': count
-                })
+                # Parse the rest one by one to find the document(s) that failed
+                for i in parse_indices:
+                    if i in tables:
+                        continue
+                    try:
+                        tables[i] = [engine.encode_doc(engine.get_nlp_doc(items[i][0], language), language)]
+                    except Exception as e:
+                        tables[i] = e
         
-        df = pd.DataFrame(rows)
-        df = df.sort_values('Occurrences', ascending=False)
+        results = []
+        for i, (text, analysis, pattern) in enumerate(items):
+            table = tables.get(i)
+            if isinstance(table, Exception):
+                results.append(table)
+                continue
+            try:
+                engine.load_parsed(text, language, table)
+                results.append(engine.analysis_function(analysis, pattern)())
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    def stats(self):
+        """Documents and batches processed so far"""
+        return {"documents": self.documents, "batches": self.batches,
+                "mean_batch": self.documents / self.batches if self.batches else 0.0}
+    
+    async def close(self):
+        """Flush pending batches, wait for them and stop the worker"""
+        import asyncio
         
-        return df
+        for language in list(self.pending):
+            self.flush(language)
+        if self.tasks:
+            await asyncio.gather(*self.tasks)
+        self.executor.shutdown(wait=True)
+
+
+# #################################
+# NLP worker process (GUI analyses off the Tk process)
+# #################################
+SHARED_PAYLOAD_BYTES = 1024 * 1024  # Larger messages travel through shared memory
+
+
+def send_message(connection, kind, payload=None):
+    """Send (kind, payload) over a multiprocessing connection. Payloads pickle to bytes; from
+    SHARED_PAYLOAD_BYTES on they are copied into a shared memory block that the receiver unlinks."""
+    import pickle
+    from multiprocessing import shared_memory
     
-    def run(self):
-        """Launch the application"""
+    data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) < SHARED_PAYLOAD_BYTES:
+        connection.send((kind, "inline", data))
+        return
+    block = shared_memory.SharedMemory(create=True, size=len(data))
+    block.buf[:len(data)] = data
+    connection.send((kind, "shared", (block.name, len(data))))
+    block.close()
+
+
+def receive_message(connection):
+    """(kind, payload) sent by send_message"""
+    import pickle
+    from multiprocessing import shared_memory
+    
+    kind, transport, data = connection.recv()
+    if transport == "shared":
+        name, size = data
+        block = shared_memory.SharedMemory(name=name)
         try:
-            # Window icon (optional)
-            # self.window.iconbitmap()  # Use .ico file if available
-            pass
-        except:
-            pass
-            
-        self.window.mainloop()
+            data = bytes(block.buf[:size])
+        finally:
+            block.close()
+            block.unlink()
+    return kind, pickle.loads(data)
+
+
+def nlp_worker_main(connection, settings):
+    """Entry point of the NLP worker process: a headless engine whose models stay loaded,
+    serving load / analyze / concordance / corpus_matrix requests until 'stop' or until the pipe closes"""
+    engine = TextAnalyzer(headless=True)
+    engine.backend_url = None
+    if settings.get("budget_bytes"):
+        engine.memory_governor.budget_bytes = settings["budget_bytes"]
+    last_progress = [-1]
+    
+    def progress(value):
+        if int(value) != last_progress[0]:
+            last_progress[0] = int(value)
+            send_message(connection, "progress", value)
+    engine.post_progress = progress
+    
+    while True:
+        try:
+            kind, request = receive_message(connection)
+        except (EOFError, OSError):
+            break
+        if kind == "stop":
+            break
+        try:
+            if kind == "load":
+                # Language detection already ran in the GUI: take its segments as they are
+                engine.load_parsed(request["text"], request["language"])
+                engine.language_segments = request["segments"]
+                engine.segment_routing = request["routing"]
+                engine.selected_file = request["name"]
+                reply = None
+            elif kind == "analyze":
+                last_progress[0] = -1
+                analysis, pattern = request["analysis"], request["pattern"]
+                trace = engine.begin_run(analysis, pattern)
+                with engine.stage("analysis"), PeakMemorySampler(0.05) as memory:
+                    result = engine.analysis_function(analysis, pattern)()
+                engine.trace = None
+                languages = list(engine.language_groups())
+                reply = {
+                    "result": result_to_json(result) if result else None,
+                    "events": [event for event in trace.events if event[0] != "analysis"],
+                    "peak_rss": memory.peak,
+                    "memory_plan": engine.memory_plan,
+                    "cache_run": engine.cache_run,
+                    "checkpoint_run": engine.checkpoint_run,
+                    "models": {language: engine.model_key(language) for language in languages
+                               if (engine.stanza_nlp is not None if language == "Ancient Greek"
+                                   else language in engine.spacy_models)}
+                }
+            elif kind == "concordance":
+                item = request["item"]
+                if isinstance(item, list):
+                    # Pattern key as ([POS], [words]) strings: intern them in this process
+                    item = (tuple(engine.vocab.add(pos) for pos in item[0]),
+                            tuple(engine.vocab.add(word) for word in item[1]))
+                reply = engine.concordance_spans(request["analysis"], item)
+            elif kind == "corpus_matrix":
+                # Replaces the loaded text; progress messages are (done, total) file counts
+                engine.segment_routing = request["routing"]
+                post_progress, engine.post_progress = engine.post_progress, lambda value: None
+                try:
+                    matrix, terms, documents, clusters = build_document_term_matrix(
+                        engine, request["paths"], request["feature"],
+                        lambda done, total: send_message(connection, "progress", (done, total)),
+                        request["dedupe_threshold"])
+                finally:
+                    engine.post_progress = post_progress
+                reply = {
+                    "files": save_document_term_matrix(request["target"], matrix, terms, documents, clusters),
+                    "shape": matrix.shape,
+                    "nnz": matrix.nnz,
+                    "clusters": clusters
+                }
+            else:
+                raise ValueError(f"Unknown request '{kind}'")
+            send_message(connection, "result", reply)
+        except Exception as e:
+            send_message(connection, "error", str(e))
+
+
+class NLPWorker:
+    """GUI side of the long-lived NLP worker process. The worker keeps the loaded spaCy/Stanza
+    models, so parsing never competes with Tk for the GIL and a crashing model cannot take the
+    window down; it is restarted for the next request."""
+    def __init__(self, settings=None):
+        self.settings = settings or {}
+        self.process = None
+        self.connection = None
+        self.loaded = None  # Identity of the text the worker holds
+        self.lock = threading.Lock()  # One request at a time over the pipe
+        self.stop_at_exit = False
+        
+    def start(self):
+        """Start the worker process if it is not running"""
+        import atexit
+        import multiprocessing
+        
+        with self.lock:
+            if self.alive():
+                return
+            # Spawned, not forked: the child must not inherit the Tk connection. Not daemonic, so
+            # that large texts can be parsed with several processes (nlp.pipe(n_process=...)):
+            # stop() ends it, at the latest at interpreter exit (before multiprocessing joins it)
+            context = multiprocessing.get_context("spawn")
+            self.connection, child = context.Pipe()
+            self.process = context.Process(target=nlp_worker_main, args=(child, self.settings),
+                                           name="talos-nlp-worker")
+            self.process.start()
+            child.close()
+            self.loaded = None
+            if not self.stop_at_exit:
+                atexit.register(self.stop)
+                self.stop_at_exit = True
+    
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+    
+    def request(self, kind, payload=None, progress=None):
+        """Send a request and wait for its reply, passing progress messages to progress.
+        Raises RuntimeError for errors in the worker and when the worker process dies."""
+        if not self.alive():
+            self.start()
+        with self.lock:
+            try:
+                send_message(self.connection, kind, payload)
+                while True:
+                    reply_kind, reply = receive_message(self.connection)
+                    if reply_kind == "progress":
+                        if progress is not None:
+                            progress(reply)
+                        continue
+                    if reply_kind == "error":
+                        raise RuntimeError(reply)
+                    return reply
+            except (EOFError, OSError):
+                self.process.join(timeout=1)
+                exit_code = self.process.exitcode
+                self.process = self.loaded = None
+                raise RuntimeError(f"The NLP worker process stopped unexpectedly (exit code {exit_code}). "
+                                   "It will be restarted for the next analysis.")
+    
+    def analyze(self, engine, analysis, pattern=None, progress=None):
+        """Run analysis on engine's loaded text in the worker (sending the text first if the
+        worker does not hold it); returns the reply dict"""
+        identity = (engine.text_hash(), engine.segment_routing, engine.selected_file,
+                    tuple(map(tuple, engine.language_segments)))
+        if self.loaded != identity or not self.alive():
+            self.request("load", {"text": engine.file_content, "language": engine.detected_language,
+                                  "segments": engine.language_segments, "routing": engine.segment_routing,
+                                  "name": engine.selected_file})
+            self.loaded = identity
+        return self.request("analyze", {"analysis": analysis, "pattern": pattern}, progress)
+    
+    def concordance(self, analysis, item, vocab):
+        """Concordance spans computed in the worker (None while it is busy or unavailable)"""
+        if self.lock.locked() or not self.alive() or self.loaded is None:
+            return None
+        if isinstance(item, tuple):
+            item = [[vocab[pos_id] for pos_id in item[0]], [vocab[word_id] for word_id in item[1]]]
+        try:
+            return self.request("concordance", {"analysis": analysis, "item": item})
+        except RuntimeError:
+            return None
+    
+    def corpus_matrix(self, paths, feature, target, dedupe_threshold=None, routing=True, progress=None):
+        """Build and save a document-term matrix in the worker, passing (done, total) file counts
+        to progress; returns the reply dict (shape, nnz, clusters and written files)"""
+        try:
+            return self.request("corpus_matrix", {"paths": paths, "feature": feature, "target": target,
+                                                  "dedupe_threshold": dedupe_threshold, "routing": routing},
+                                progress)
+        finally:
+            self.loaded = None  # The worker no longer holds the GUI's text
+    
+    def stop(self):
+        """Ask the worker to exit; terminate it if it is busy or does not exit in time"""
+        if not self.alive():
+            return
+        if self.lock.acquire(timeout=0.5):
+            try:
+                send_message(self.connection, "stop")
+            except OSError:
+                pass
+            finally:
+                self.lock.release()
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2)
+
+
+# #################################
+# Forked worker pool (pipelines shared copy-on-write)
+# #################################
+def process_memory(pid):
+    """(private, shared) bytes of process pid, from /proc/<pid>/smaps_rollup; elsewhere the
+    unique set size from psutil and None. (None, None) if unknown."""
+    try:
+        fields = {}
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[name] = int(value.split()[0]) * 1024
+        return (fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+                fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0))
+    except (OSError, ValueError):
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_full_info().uss, None
+    except Exception:
+        return None, None
+
+
+def pool_worker_main(connection, engine):
+    """Loop of a forked pool worker: engine, a copy of the parent's with its loaded pipelines,
+    analyses one file per job until 'stop' or until the pipe closes"""
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)  # For Stanza: one core per worker
+    engine.post_progress = lambda progress: None
+    # Set in this process's copy only. Daemonic workers cannot start nlp.pipe(n_process=...) processes,
+    # and the pool already runs one parse per core
+    engine.memory_governor.max_workers = 1
+    while True:
+        try:
+            kind, job = receive_message(connection)
+        except (EOFError, OSError):
+            break
+        if kind == "stop":
+            break
+        try:
+            text, _, _ = read_text_file(job["path"])
+            engine.load_text(text, job["path"])
+            del text
+            result = engine.analysis_function(job["analysis"])()
+            engine.load_parsed("", engine.detected_language)  # Release the file and its annotations
+            send_message(connection, "result", result_to_json(result) if result else None)
+        except Exception as e:
+            send_message(connection, "error", str(e))
+    connection.close()
+
+
+class ForkedWorkerPool:
+    """Worker processes forked from a headless engine once its pipelines are loaded, so they
+    share the model weights copy-on-write instead of each loading its own copy. Workers are
+    reused across jobs; memory() reports what each one holds privately."""
+    def __init__(self, engine, size, preload=()):
+        self.engine = engine
+        self.size = size
+        self.preload = list(preload)
+        self.workers = []  # [process, connection, jobs done]
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def start(self, languages=()):
+        """Load the pipelines of the preload languages and of languages in this process, then
+        fork the workers (nothing to do while they run)"""
+        import gc
+        import multiprocessing
+        
+        if self.workers:
+            return
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            raise RuntimeError("Pooled workers need fork() (Linux or macOS); use one worker on this platform.")
+        for language in dict.fromkeys(self.preload + list(languages)):
+            self.engine.lazy_load_nlp(language)
+        # Objects so far go to the permanent generation: collections in the workers then leave
+        # the pages holding the pipelines alone instead of copying them
+        gc.collect()
+        gc.freeze()
+        try:
+            for number in range(self.size):
+                connection, child = context.Pipe()
+                process = context.Process(target=pool_worker_main, args=(child, self.engine),
+                                          name=f"talos-pool-{number + 1}", daemon=True)
+                process.start()
+                child.close()
+                self.workers.append([process, connection, 0])
+        finally:
+            gc.unfreeze()
+    
+    def analyze_files(self, analysis, jobs):
+        """Run analysis on the file of each (key, path) in jobs; yields (key, result) as the
+        workers finish them. Raises RuntimeError for analysis errors and dead workers."""
+        from multiprocessing.connection import wait
+        
+        self.start()
+        queue = list(reversed(jobs))
+        busy = {}  # connection -> (worker, key, path)
+        try:
+            while queue or busy:
+                for worker in self.workers:
+                    if queue and worker[1] not in busy:
+                        key, path = queue.pop()
+                        send_message(worker[1], "analyze", {"analysis": analysis, "path": str(path)})
+                        busy[worker[1]] = (worker, key, path)
+                for connection in wait(list(busy)):
+                    worker, key, path = busy.pop(connection)
+                    try:
+                        kind, reply = receive_message(connection)
+                    except (EOFError, OSError):
+                        self.close()
+                        raise RuntimeError(f"{Path(path).name}: a pool worker stopped unexpectedly "
+                                           f"(exit code {worker[0].exitcode}).")
+                    worker[2] += 1
+                    if kind == "error":
+                        raise RuntimeError(f"{Path(path).name}: {reply}")
+                    yield key, result_from_json(reply, self.engine.vocab) if reply else {}
+        finally:
+            # Jobs still running when the caller stops: wait for them, so the workers are free
+            for connection in busy:
+                try:
+                    receive_message(connection)
+                except (EOFError, OSError):
+                    pass
+    
+    def memory(self):
+        """Per worker: pid, jobs done, private and shared bytes (see process_memory)"""
+        report = []
+        for process, _, jobs in self.workers:
+            private, shared = process_memory(process.pid)
+            report.append({"pid": process.pid, "jobs": jobs, "private": private, "shared": shared})
+        return report
+    
+    def close(self):
+        """Stop the workers"""
+        for process, connection, _ in self.workers:
+            try:
+                send_message(connection, "stop")
+            except OSError:
+                pass
+        for process, connection, _ in self.workers:
+            process.join(timeout=2)
+            connection.close()
+        self.workers = []
+
 
 # Main entry point
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="TALOS - Advanced Text File Analyzer")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="print startup and background import timings "
+                             "(for a per-module breakdown use: python -X importtime)")
+    parser.add_argument("--trace-dir", default=os.environ.get("TALOS_TRACE_DIR"),
+                        help="write a Chrome-trace JSON file per analysis run into this directory")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="MB",
+                        help="memory budget for analyses in MB (default: TALOS_MEMORY_BUDGET_MB or "
+                             "75%% of available memory)")
+    parser.add_argument("--annotation-cache", type=int, default=None, metavar="TOKENS",
+                        help="size of the paragraph annotation cache in tokens, 0 to disable "
+                             f"(default: TALOS_ANNOTATION_CACHE_TOKENS or {AnnotationCache.DEFAULT_TOKENS:,})")
+    parser.add_argument("--result-cache", type=float, default=None, metavar="MB",
+                        help="memory for finished results kept to answer repeated analyses instantly, 0 to disable "
+                             f"(default: TALOS_RESULT_CACHE_MB or {ResultCache.DEFAULT_MB})")
+    parser.add_argument("--token-store", action="store_true",
+                        help="keep parsed tokens on disk (memory-mapped columns under TALOS_HOME/tokens) and re-analyse "
+                             "texts from there without parsing (or TALOS_TOKEN_STORE=1)")
+    parser.add_argument("--no-worker", action="store_true",
+                        help="run GUI analyses in a thread of the GUI process instead of the NLP worker process "
+                             "(or TALOS_NLP_WORKER=0)")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the local analysis service (warm models, HTTP/JSON) instead of the GUI")
+    parser.add_argument("--host", default="127.0.0.1", help="service address")
+    parser.add_argument("--port", type=int, default=DEFAULT_SERVICE_PORT, help="service port")
+    parser.add_argument("--service-root", default=os.environ.get("TALOS_SERVICE_ROOT"), metavar="DIR",
+                        help="directory under which the service reads files sent as 'path' (default: any file "
+                             "the service can read; 'path' is refused for clients on other machines)")
+    parser.add_argument("--allowed-hosts", default=os.environ.get("TALOS_SERVICE_HOSTS", ""),
+                        help="comma-separated names besides localhost by which clients may address the service")
+    parser.add_argument("--preload", default="",
+                        help="comma-separated languages whose models the service (or the --corpus-workers "
+                             "parent) loads at startup")
+    parser.add_argument("--backend", default=os.environ.get("TALOS_BACKEND_URL"), metavar="URL",
+                        help="run the GUI's analyses on an analysis service, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--corpus-matrix", metavar="OUT.npz",
+                        help="build a document x term matrix over --corpus-files and exit")
+    parser.add_argument("--corpus-feature", default="words", choices=DTM_FEATURES,
+                        help="terms of the corpus matrix")
+    parser.add_argument("--corpus-files", nargs="+", default=[], metavar="FILE", help="corpus files (one row each)")
+    parser.add_argument("--corpus-dedupe", type=float, nargs="?", const=0.8, default=None, metavar="THRESHOLD",
+                        help="analyse one representative per cluster of near-duplicate files "
+                             "(MinHash Jaccard similarity, default 0.8)")
+    parser.add_argument("--corpus-workers", type=int, default=1, metavar="N",
+                        help="analyse the corpus files in N worker processes forked after the models are loaded, "
+                             "sharing them copy-on-write (Linux/macOS)")
+    parser.add_argument("--runs", action="store_true", help="list the runs of the result store and exit")
+    parser.add_argument("--query", metavar="SQL",
+                        help="run a read-only SQL query over the result store (tables runs, results; "
+                             "view frequencies) and exit")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="run the headless benchmark suite (no models needed) and exit")
+    parser.add_argument("--check-patterns", type=int, nargs="?", const=1000, default=None, metavar="TRIALS",
+                        help="check custom pattern matching against a regex reference on random patterns and exit")
+    parser.add_argument("--bench-sizes", default="1000,10000,100000",
+                        help="comma-separated corpus sizes in words")
+    parser.add_argument("--bench-languages", default="English,Modern Greek,Ancient Greek",
+                        help="comma-separated languages")
+    parser.add_argument("--bench-repeat", type=int, default=5, help="runs per path (latency percentiles)")
+    parser.add_argument("--bench-baseline", default="talos_benchmark_baseline.json",
+                        help="JSON baseline to compare against (written if missing)")
+    parser.add_argument("--bench-save", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--bench-tolerance", type=float, default=0.25,
+                        help="allowed p50 latency increase before a path counts as a regression")
+    args = parser.parse_args()
+    if args.memory_budget is not None and args.memory_budget <= 0:
+        parser.error("--memory-budget must be a positive number of MB")
+    if args.annotation_cache is not None:
+        os.environ["TALOS_ANNOTATION_CACHE_TOKENS"] = str(args.annotation_cache)  # For every engine created below
+    if args.result_cache is not None:
+        os.environ["TALOS_RESULT_CACHE_MB"] = str(args.result_cache)
+    if args.token_store:
+        os.environ["TALOS_TOKEN_STORE"] = "1"
+    if args.no_worker:
+        os.environ["TALOS_NLP_WORKER"] = "0"
+    
+    if args.check_patterns is not None:
+        sys.exit(1 if check_token_patterns(args.check_patterns) else 0)
+    
+    if args.benchmark:
+        regressions = run_benchmarks(sizes=[int(size) for size in args.bench_sizes.split(",")],
+                                     languages=[language.strip() for language in args.bench_languages.split(",")],
+                                     repeat=args.bench_repeat,
+                                     baseline_path=args.bench_baseline,
+                                     save_baseline=args.bench_save,
+                                     tolerance=args.bench_tolerance)
+        sys.exit(1 if regressions else 0)
+    
+    if args.runs or args.query:
+        store = ResultStore(TALOS_HOME / "results.sqlite")
+        if args.query:
+            import sqlite3
+            
+            try:
+                columns, rows = store.query(args.query)
+            except sqlite3.Error as e:
+                print(f"Query error: {e}", file=sys.stderr)
+                sys.exit(1)
+        else:
+            columns = ["id", "created", "file", "analysis", "pattern", "language", "unique_count", "total"]
+            rows = [[run[column] for column in columns] for run in store.runs()]
+        print("\t".join(columns))
+        for row in rows:
+            print("\t".join("" if value is None else str(value) for value in row))
+        sys.exit(0)
+    
+    if args.corpus_matrix:
+        engine = TextAnalyzer(headless=True)
+        if args.backend:
+            engine.backend_url = args.backend
+        pool = None
+        if args.corpus_workers > 1:
+            pool = ForkedWorkerPool(engine, args.corpus_workers,
+                                    [language.strip() for language in args.preload.split(",") if language.strip()])
+        try:
+            matrix, terms, documents, clusters = build_document_term_matrix(
+                engine, args.corpus_files, args.corpus_feature,
+                lambda done, total: print(f"\r{done}/{total} files", end="", file=sys.stderr, flush=True),
+                dedupe_threshold=args.corpus_dedupe, pool=pool)
+            for file_path in save_document_term_matrix(args.corpus_matrix, matrix, terms, documents, clusters):
+                print(f"\nwrote {file_path}", end="")
+            print(f"\n{matrix.shape[0]} documents x {matrix.shape[1]} terms, {matrix.nnz} non-zero")
+            for representative, members in clusters.items():
+                print(f"near-duplicates of {representative}: {', '.join(members)}")
+            if pool is not None and pool.workers:
+                # Private memory well below the parent's resident size means the models are shared
+                print(f"parent: {format_bytes(current_rss_bytes())} resident")
+                for worker in pool.memory():
+                    private = format_bytes(worker["private"]) if worker["private"] is not None else "?"
+                    shared = f", {format_bytes(worker['shared'])} shared" if worker["shared"] is not None else ""
+                    print(f"worker {worker['pid']}: {worker['jobs']} files, {private} private{shared}")
+        finally:
+            if pool is not None:
+                pool.close()
+        sys.exit(0)
+    
+    if args.serve:
+        serve(args.host, args.port, [language.strip() for language in args.preload.split(",") if language.strip()],
+              args.service_root, [host.strip() for host in args.allowed_hosts.split(",") if host.strip()])
+        sys.exit(0)
+    
     try:
-        app = TextAnalyzer()
+        app = TextAnalyzer(startup_timing=args.startup_timing or os.environ.get("TALOS_STARTUP_TIMING", "0") != "0")
+        app.trace_dir = args.trace_dir
+        app.backend_url = args.backend
+        if args.memory_budget:
+            app.memory_governor.budget_bytes = args.memory_budget * 1024 ** 2
+            if app.nlp_worker is not None:
+                app.nlp_worker.settings["budget_bytes"] = app.memory_governor.budget_bytes
         app.run()
     except Exception as e:
         import traceback